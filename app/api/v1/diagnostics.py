@@ -0,0 +1,150 @@
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from app.api.v1 import weather
+from app.config import settings
+from app.loop_monitor import loop_monitor
+from app.memory_profiler import allocation_tracker, process_memory, structure_sizes
+from app.services.admission import admission
+from app.services.cache_service import WeatherCache
+from app.services.metrics import metrics
+from app.services.rate_limiter import rate_limiter
+from app.services.ttl_policy import ttl_policy
+
+
+async def require_diagnostics(
+    x_diagnostics_token: Optional[str] = Header(None),
+):
+    """Hide diagnostics unless enabled, and check the token when one is set"""
+    if not settings.DIAGNOSTICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.DIAGNOSTICS_TOKEN and x_diagnostics_token != settings.DIAGNOSTICS_TOKEN:
+        raise HTTPException(status_code=403, detail="Invalid diagnostics token")
+
+
+router = APIRouter(dependencies=[Depends(require_diagnostics)])
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Counters, gauges and timings recorded by the running worker"""
+    return metrics.snapshot()
+
+
+@router.get("/loop")
+async def get_loop_lag():
+    """Event loop lag histogram and, in debug mode, recent blocking stacks"""
+    return loop_monitor.snapshot()
+
+
+@router.get("/admission")
+async def get_admission():
+    """Current limits, in-flight work and queue depth per admission class"""
+    return admission.snapshot()
+
+
+@router.put("/admission/{name}")
+async def set_admission_limit(
+    name: str, limit: int = Query(..., ge=1, description="New concurrency limit")
+):
+    """Override a limit; the miss limit keeps adapting from there"""
+    limiters = {"hit": admission.hits, "miss": admission.misses}
+    if name not in limiters:
+        raise HTTPException(status_code=404, detail=f"Unknown admission class: {name}")
+    limiters[name].set_limit(limit)
+    return limiters[name].snapshot()
+
+
+@router.get("/ttl")
+async def get_ttl_policy():
+    """Spread of adaptive TTLs and the upstream fetch rate they imply"""
+    return ttl_policy.snapshot()
+
+
+async def require_worker(x_worker_pid: Optional[int] = Header(None)):
+    """Refuse a request meant for another worker.
+
+    Each worker has its own memory and allocation tracer, and a request may
+    reach any of them. Responses name the worker that served them; sending
+    that pid back in X-Worker-Pid makes sure follow-up requests, such as
+    reading the allocations after starting a trace, land on the same one or
+    get 409 and can be retried on a new connection.
+    """
+    if x_worker_pid is not None and x_worker_pid != os.getpid():
+        raise HTTPException(
+            status_code=409,
+            detail=f"Served by worker {os.getpid()}, not {x_worker_pid}",
+            headers={"X-Worker-Pid": str(os.getpid())},
+        )
+
+
+def _memory_structures():
+    """Long-lived structures of this worker, as ``(object, entries)``"""
+    cache = weather.weather_cache
+    return {
+        # Counts entries still in a loaded snapshot as well
+        "weather_cache": (
+            cache,
+            len(cache.keys()) if isinstance(cache, WeatherCache) else len(cache),
+        ),
+        "aggregation": (weather.aggregation_service, len(weather.aggregation_service)),
+        "field_selection": (weather.field_selection, len(weather.field_selection)),
+        "forecast_history": (weather.forecast_history, len(weather.forecast_history)),
+        "spatial_index": (weather.spatial_index, len(weather.spatial_index)),
+        "write_behind": (weather.write_behind, weather.write_behind.depth),
+        "ttl_policy": (ttl_policy, len(ttl_policy)),
+        "rate_limiter": (rate_limiter, len(rate_limiter)),
+        "unit_converter": (weather.unit_converter, None),
+        "metrics": (metrics, None),
+        "loop_monitor": (loop_monitor, None),
+    }
+
+
+@router.get("/memory", dependencies=[Depends(require_worker)])
+async def get_memory():
+    """Process memory and the entries and approximate size of each structure,
+    for the worker named by ``pid``.
+
+    Sizes follow references, so a forecast shared by several structures is
+    counted against the first one listed.
+    """
+    return {
+        "pid": os.getpid(),
+        **process_memory(),
+        "tracing": allocation_tracker.tracing,
+        "structures": structure_sizes(
+            _memory_structures(), sample=settings.MEMORY_SIZE_SAMPLE
+        ),
+    }
+
+
+@router.post("/memory/tracing", dependencies=[Depends(require_worker)])
+async def start_allocation_tracing(
+    frames: int = Query(1, ge=1, le=64, description="Stack frames kept per allocation")
+):
+    """Start tracing allocations from a fresh baseline; slows the worker down
+    until stopped. Only the worker named by ``pid`` traces, see
+    ``require_worker``"""
+    allocation_tracker.start(frames)
+    return {
+        "pid": os.getpid(),
+        "tracing": True,
+        "max_seconds": allocation_tracker.max_seconds,
+    }
+
+
+@router.delete("/memory/tracing", dependencies=[Depends(require_worker)])
+async def stop_allocation_tracing():
+    allocation_tracker.stop()
+    return {"pid": os.getpid(), "tracing": False}
+
+
+@router.get("/memory/allocations", dependencies=[Depends(require_worker)])
+async def get_allocations(
+    limit: int = Query(20, ge=1, le=500),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+):
+    """Top allocation sites and their growth since tracing started"""
+    if not allocation_tracker.tracing:
+        raise HTTPException(status_code=409, detail="Allocation tracing is not running")
+    return {"pid": os.getpid(), **allocation_tracker.report(limit, group_by)}
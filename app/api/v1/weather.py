@@ -1,40 +1,241 @@
-from fastapi import APIRouter, HTTPException, Query
+import time
+from fastapi import APIRouter, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from app.services.weather_service import WeatherService
-from app.services.cache_service import WeatherCache
-from app.services.storage_service import StorageService
-from typing import Optional
+from app.services.cache_service import create_weather_cache
+from app.services.storage_service import create_storage_service
+from app.services.aggregation_service import AggregationService, SECTIONS
+from app.services.write_behind import WriteBehindQueue
+from app.services.admission import admission
+from app.services.field_selection import FieldSelectionService, Selector
+from app.services.forecast_history import ForecastHistory
+from app.services.interpolation_service import InterpolationService, surrounds
+from app.services.spatial_index import SpatialIndex, parse_forecast_key
+from app.services.ttl_policy import ttl_policy
+from app.services.unit_conversion import CANONICAL_UNITS, UNIT_SYSTEMS, UnitConverter
+from app.config import settings
+from app.deadline import current_deadline, within
+from app.exceptions import DeadlineExceededError, UpstreamError
+from app.models.forecast import RawForecast, dumps
+from app.services.metrics import metrics
+from app.timing import set_tier, span
+from typing import AsyncIterator, Iterator, Optional, Tuple
 
 router = APIRouter()
 weather_service = WeatherService()
-weather_cache = WeatherCache()
-storage_service = StorageService()
+weather_cache = create_weather_cache()
+storage_service = create_storage_service()
+aggregation_service = AggregationService()
+write_behind = WriteBehindQueue(
+    storage_service,
+    max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL,
+)
+spatial_index = SpatialIndex(cell_degrees=settings.SPATIAL_INDEX_CELL_DEGREES)
+interpolation_service = InterpolationService()
+unit_converter = UnitConverter()
+field_selection = FieldSelectionService(
+    max_paths=settings.FIELDS_MAX_PATHS,
+    max_selectors=settings.FIELDS_MAX_SELECTORS,
+    max_subsets=settings.FIELDS_MAX_SUBSETS,
+)
+forecast_history = ForecastHistory(
+    max_versions=settings.FORECAST_HISTORY_VERSIONS,
+    max_locations=settings.FORECAST_HISTORY_MAX_LOCATIONS,
+)
 
 
-@router.get("/forecast/coordinates")
-async def get_weather_forecast(
-    lat: float = Query(..., description="Latitude", ge=-90, le=90),
-    lon: float = Query(..., description="Longitude", ge=-180, le=180),
-    units: str = Query(
-        "metric", description="Units of measurement (metric, imperial, standard)"
-    ),
-    exclude: Optional[str] = Query(
-        None, description="Parts to exclude (current,minutely,hourly,daily,alerts)"
-    ),
+def _forget(cache_key: str) -> None:
+    """Drop what was derived from a cache entry once the cache lets it go"""
+    spatial_index.remove(cache_key)
+    forecast_history.forget(cache_key)
+    field_selection.forget(cache_key)
+    aggregation_service.forget(cache_key)
+
+
+weather_cache.on_remove = _forget
+
+
+def _negative_ttl(error: UpstreamError) -> int:
+    """How long to remember an upstream failure before trying again"""
+    if error.kind == UpstreamError.RATE_LIMITED and error.retry_after:
+        ttl = error.retry_after
+    else:
+        ttl = {
+            UpstreamError.CLIENT_ERROR: settings.NEGATIVE_TTL_CLIENT_ERROR,
+            UpstreamError.RATE_LIMITED: settings.NEGATIVE_TTL_RATE_LIMITED,
+            UpstreamError.SERVER_ERROR: settings.NEGATIVE_TTL_SERVER_ERROR,
+            UpstreamError.TIMEOUT: settings.NEGATIVE_TTL_TIMEOUT,
+        }[error.kind]
+    return min(ttl, settings.NEGATIVE_TTL_MAX)
+
+
+def _upstream_failure(kind: str, retry_after: int) -> HTTPException:
+    if kind == UpstreamError.CLIENT_ERROR:
+        return HTTPException(status_code=404, detail="Weather forecast data not found")
+    return HTTPException(
+        status_code=503,
+        detail="Weather service temporarily unavailable",
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def _check_units(units: str) -> None:
+    if units not in UNIT_SYSTEMS:
+        raise HTTPException(status_code=400, detail=f"Unknown units: {units}")
+
+
+def _forecast_data(forecast):
+    """Parsed view of a cached value, which is either raw bytes or a dict"""
+    return forecast.data if isinstance(forecast, RawForecast) else forecast
+
+
+def _stored_ttl(cache_key: str, stored: RawForecast) -> Optional[int]:
+    """Cache TTL for a forecast read from storage, which must not outlive the
+    stored copy; re-caching it for a full TTL would serve it past its age"""
+    ttl = ttl_policy.ttl_for(cache_key)
+    if stored.expires_at is None:
+        return ttl
+    remaining = max(1, int(stored.expires_at - time.time()))
+    return min(settings.CACHE_TTL_SECONDS if ttl is None else ttl, remaining)
+
+
+def _forecast_response(forecast) -> Response:
+    """Send a forecast without re-encoding bodies that are already JSON"""
+    with span("serialize"):
+        body = forecast.body if isinstance(forecast, RawForecast) else dumps(forecast)
+    return Response(content=body, media_type="application/json")
+
+
+def _versioned_response(
+    cache_key: str,
+    forecast,
+    since: Optional[str],
+    selector: Optional[Selector] = None,
+) -> Response:
+    """Send the forecast, or only what changed since the client's version"""
+    variant = ""
+    if selector is None:
+        with span("serialize"):
+            body = (
+                forecast.body if isinstance(forecast, RawForecast) else dumps(forecast)
+            )
+    else:
+        with span("select"):
+            body = field_selection.select(
+                cache_key, forecast, _forecast_data(forecast), selector
+            )
+        # Each selection is versioned on its own
+        variant = selector.expression
+
+    if not settings.FORECAST_HISTORY_ENABLED:
+        return Response(content=body, media_type="application/json")
+
+    with span("history"):
+        version = forecast_history.record(cache_key, body, variant)
+        if since == version:
+            response = Response(status_code=304)
+        else:
+            patch = forecast_history.patch(cache_key, since, variant) if since else None
+            if patch is not None:
+                response = Response(
+                    content=patch, media_type="application/json-patch+json"
+                )
+            else:
+                # No version given, or too old to be in the history
+                response = Response(content=body, media_type="application/json")
+    response.headers["X-Forecast-Version"] = version
+    return response
+
+
+async def _load_forecast(
+    cache_key: str, lat: float, lon: float, units: str, exclude: Optional[str] = None
+):
+    """Resolve a forecast through the cache, persistent storage and upstream,
+    serving an expired cache entry if the request's deadline runs out first"""
+    try:
+        return await _resolve_forecast(cache_key, lat, lon, units, exclude)
+    except DeadlineExceededError as e:
+        deadline = current_deadline()
+        if deadline is not None:
+            deadline.exhaust(e.tier)
+        stale = _stale_forecast(cache_key, lat, lon, units)
+        if stale is None:
+            raise
+        set_tier("stale")
+        metrics.incr("deadline.stale_served")
+        return stale
+
+
+def _stale_forecast(cache_key: str, lat: float, lon: float, units: str):
+    stale = weather_cache.get_stale(cache_key)
+    if stale is not None or units == CANONICAL_UNITS:
+        return stale
+    canonical = weather_cache.get_stale(f"onecall_{lat}_{lon}_{CANONICAL_UNITS}")
+    if canonical is None:
+        return None
+    # Converted but not cached, so it is never taken for fresh data
+    return RawForecast.from_data(
+        unit_converter.convert(_forecast_data(canonical), units)
+    )
+
+
+async def _resolve_forecast(
+    cache_key: str, lat: float, lon: float, units: str, exclude: Optional[str]
 ):
-    """Get current weather and forecast data using OneCall API 3.0"""
     # Check cache first
-    cache_key = f"onecall_{lat}_{lon}_{units}"
-    cached_data = weather_cache.get(cache_key)
+    with span("cache"):
+        cached_data = weather_cache.get(cache_key)
     if cached_data:
+        set_tier("cache")
         return cached_data
 
-    # Check persistent storage
-    stored_data = await storage_service.get_forecast(lat, lon, units)
+    if units != CANONICAL_UNITS:
+        # Only the canonical copy is fetched and stored, other unit systems
+        # are converted from it and cached under their own key
+        canonical_key = f"onecall_{lat}_{lon}_{CANONICAL_UNITS}"
+        canonical = await _resolve_forecast(
+            canonical_key, lat, lon, CANONICAL_UNITS, exclude
+        )
+        with span("convert"):
+            converted = RawForecast.from_data(
+                unit_converter.convert(_forecast_data(canonical), units)
+            )
+        # Expire together with the canonical copy, so a refresh of it is
+        # never hidden behind an older conversion
+        remaining = weather_cache.remaining_ttl(canonical_key)
+        if remaining is not None:
+            weather_cache.set(cache_key, converted, remaining)
+        return converted
+
+    # Storage and upstream lookups are admitted separately from cache hits
+    async with admission.miss():
+        return await _load_forecast_miss(cache_key, lat, lon, units, exclude)
+
+
+async def _load_forecast_miss(
+    cache_key: str, lat: float, lon: float, units: str, exclude: Optional[str]
+):
+    # Check persistent storage, each tier gets only the budget left
+    with span("storage"):
+        stored_data = await within(
+            "storage",
+            storage_service.get_forecast_raw(lat, lon, units),
+            settings.DEADLINE_MIN_STORAGE,
+        )
     if stored_data:
         # Update cache and return stored data
-        weather_cache.set(cache_key, stored_data)
+        weather_cache.set(cache_key, stored_data, _stored_ttl(cache_key, stored_data))
+        spatial_index.add(cache_key)
+        set_tier("storage")
         return stored_data
 
+    # Fail fast while a recent upstream failure for this key is remembered
+    negative = weather_cache.get_negative(cache_key)
+    if negative is not None:
+        set_tier("negative")
+        raise _upstream_failure(negative.kind, negative.remaining(time.time()))
+
     # Prepare parameters for API call
     api_params = {
         "lat": lat,
@@ -48,13 +249,279 @@ async def get_weather_forecast(
         api_params["exclude"] = exclude
 
     # Fetch fresh data if not in cache or storage
-    forecast_data = await weather_service.fetch_onecall_data(**api_params)
+    set_tier("upstream")
+    try:
+        with span("upstream"):
+            # Cancelled rather than timed out at the deadline, so a short
+            # client deadline is never remembered as an upstream failure
+            forecast_data = await within(
+                "upstream",
+                weather_service.fetch_onecall_raw(**api_params),
+                settings.DEADLINE_MIN_UPSTREAM,
+            )
+    except UpstreamError as e:
+        ttl = _negative_ttl(e)
+        weather_cache.set_negative(cache_key, e.kind, ttl, e.retry_after)
+        raise _upstream_failure(e.kind, ttl)
 
     if not forecast_data:
         raise HTTPException(status_code=404, detail="Weather forecast data not found")
 
-    # Store in both cache and persistent storage
-    weather_cache.set(cache_key, forecast_data)
-    await storage_service.store_forecast(lat, lon, units, forecast_data)
+    # Cache for as long as this location's forecasts are expected to stay
+    # accurate; storage keeps its copy at least STORAGE_TTL_SECONDS
+    ttl = ttl_policy.observe(cache_key, forecast_data)
+    weather_cache.set(cache_key, forecast_data, ttl)
+    spatial_index.add(cache_key)
+    storage_ttl = ttl_policy.storage_ttl(ttl)
+    with span("store"):
+        if write_behind.running:
+            write_behind.enqueue(lat, lon, units, forecast_data, storage_ttl)
+        else:
+            await storage_service.store_forecast(
+                lat, lon, units, forecast_data, ttl_seconds=storage_ttl
+            )
 
     return forecast_data
+
+
+async def _interpolate_forecast(lat: float, lon: float, units: str):
+    """Blend forecasts cached around the point, or None when too few are close"""
+    neighbours = spatial_index.nearby(
+        lat,
+        lon,
+        CANONICAL_UNITS,
+        settings.INTERPOLATION_MAX_DISTANCE_KM,
+        settings.INTERPOLATION_MAX_POINTS,
+    )
+    if len(neighbours) < settings.INTERPOLATION_MIN_POINTS:
+        return None
+
+    with span("cache"):
+        forecasts = [weather_cache.get(key) for key, _, _, _ in neighbours]
+    missing = [i for i, forecast in enumerate(forecasts) if forecast is None]
+    if missing:
+        # Fall back to storage for points that have left the cache
+        try:
+            async with admission.miss():
+                with span("storage"):
+                    stored = await within(
+                        "storage",
+                        storage_service.get_forecasts_raw(
+                            [
+                                (neighbours[i][1], neighbours[i][2], CANONICAL_UNITS)
+                                for i in missing
+                            ]
+                        ),
+                        settings.DEADLINE_MIN_STORAGE,
+                    )
+        except DeadlineExceededError:
+            # Blend what is cached, the caller falls back if that is too little
+            stored = []
+        for i, forecast in zip(missing, stored):
+            key = neighbours[i][0]
+            if forecast is None:
+                spatial_index.remove(key)
+            else:
+                weather_cache.set(key, forecast, _stored_ttl(key, forecast))
+                forecasts[i] = forecast
+
+    sources = [
+        (neighbour, forecast)
+        for neighbour, forecast in zip(neighbours, forecasts)
+        if forecast is not None
+    ]
+    if len(sources) < settings.INTERPOLATION_MIN_POINTS or not surrounds(
+        lat,
+        lon,
+        [(point_lat, point_lon) for (_, point_lat, point_lon, _), _ in sources],
+    ):
+        return None
+
+    with span("interpolate"):
+        result = interpolation_service.interpolate(
+            lat,
+            lon,
+            [
+                (_forecast_data(forecast), distance)
+                for (*_, distance), forecast in sources
+            ],
+        )
+    with span("convert"):
+        result = unit_converter.convert(result, units)
+    result["interpolation"] = {
+        "method": "idw",
+        "sources": [
+            {"lat": point_lat, "lon": point_lon, "distance_km": round(distance, 3)}
+            for (_, point_lat, point_lon, distance), _ in sources
+        ],
+    }
+    return result
+
+
+@router.get("/forecast/coordinates")
+async def get_weather_forecast(
+    lat: float = Query(..., description="Latitude", ge=-90, le=90),
+    lon: float = Query(..., description="Longitude", ge=-180, le=180),
+    units: str = Query(
+        "metric", description="Units of measurement (metric, imperial, standard)"
+    ),
+    exclude: Optional[str] = Query(
+        None, description="Parts to exclude (current,minutely,hourly,daily,alerts)"
+    ),
+    interpolate: Optional[bool] = Query(
+        None, description="On a cache miss, interpolate from nearby cached points"
+    ),
+    since: Optional[str] = Query(
+        None,
+        description="X-Forecast-Version already held; returns a JSON Patch to "
+        "the current version, or 304 when unchanged",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated dotted paths to return, e.g. "
+        "current.temp,hourly[].pop",
+    ),
+):
+    """Get current weather and forecast data using OneCall API 3.0"""
+    _check_units(units)
+    selector = None
+    if fields is not None:
+        try:
+            selector = field_selection.compile(fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    cache_key = f"onecall_{lat}_{lon}_{units}"
+    if interpolate is None:
+        interpolate = settings.INTERPOLATION_ENABLED
+
+    if interpolate:
+        with span("cache"):
+            cached_data = weather_cache.get(cache_key)
+        if cached_data:
+            set_tier("cache")
+            return _versioned_response(cache_key, cached_data, since, selector)
+        interpolated = await _interpolate_forecast(lat, lon, units)
+        if interpolated is not None:
+            for part in (exclude or "").split(","):
+                interpolated.pop(part.strip(), None)
+            if selector is not None:
+                interpolated = selector.apply(interpolated)
+            response = _forecast_response(interpolated)
+            response.headers["X-Interpolated"] = "idw"
+            set_tier("interpolated")
+            return response
+
+    forecast_data = await _load_forecast(cache_key, lat, lon, units, exclude)
+    return _versioned_response(cache_key, forecast_data, since, selector)
+
+
+def _parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """Parse ``min_lon,min_lat,max_lon,max_lat`` into lat/lon bounds"""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail="bbox must be min_lon,min_lat,max_lon,max_lat"
+        )
+    if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lon <= max_lon <= 180):
+        raise HTTPException(status_code=400, detail="bbox is out of range or inverted")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def _region_summary(cache_key: str, forecast, units: str) -> dict:
+    """Compact current conditions for one location in a region response"""
+    lat, lon, _ = parse_forecast_key(cache_key)
+    current = _forecast_data(forecast).get("current") or {}
+    conditions = current.get("weather") or [{}]
+    summary = {
+        "lat": lat,
+        "lon": lon,
+        "dt": current.get("dt"),
+        "temp": current.get("temp"),
+        "humidity": current.get("humidity"),
+        "wind_speed": current.get("wind_speed"),
+        "condition": conditions[0].get("main"),
+    }
+    return unit_converter.convert_point(summary, units)
+
+
+async def _stream_region(
+    keys: Iterator[str], limit: int, units: str
+) -> AsyncIterator[bytes]:
+    """Write summaries for the fresh keys as they are read from the cache.
+
+    An async generator keeps cache reads on the event loop rather than in
+    the thread pool Starlette uses for plain iterators.
+    """
+    yield b'{"items":['
+    count = 0
+    next_cursor = None
+    for key in keys:
+        if count == limit:
+            # More keys remain, resume after the last one sent
+            next_cursor = last_key
+            break
+        forecast = weather_cache.get(key)
+        if not forecast:
+            continue
+        yield (b"," if count else b"") + dumps(_region_summary(key, forecast, units))
+        count += 1
+        last_key = key
+    yield b'],"count":' + dumps(count) + b',"next_cursor":' + dumps(next_cursor) + b"}"
+
+
+@router.get("/region")
+async def get_region(
+    bbox: str = Query(
+        ..., description="Bounding box as min_lon,min_lat,max_lon,max_lat"
+    ),
+    units: str = Query(
+        "metric", description="Units of measurement (metric, imperial, standard)"
+    ),
+    limit: int = Query(
+        settings.REGION_PAGE_SIZE, ge=1, le=settings.REGION_MAX_PAGE_SIZE
+    ),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+):
+    """Current conditions for every freshly cached location inside a box"""
+    _check_units(units)
+    min_lat, min_lon, max_lat, max_lon = _parse_bbox(bbox)
+    # Keys come out of the index in order, and only as far as the page reads
+    keys = spatial_index.within(
+        min_lat, min_lon, max_lat, max_lon, CANONICAL_UNITS, after=cursor
+    )
+    return StreamingResponse(
+        _stream_region(keys, limit, units), media_type="application/json"
+    )
+
+
+@router.get("/forecast/aggregate")
+async def get_forecast_aggregate(
+    lat: float = Query(..., description="Latitude", ge=-90, le=90),
+    lon: float = Query(..., description="Longitude", ge=-180, le=180),
+    units: str = Query(
+        "metric", description="Units of measurement (metric, imperial, standard)"
+    ),
+    section: str = Query("hourly", description="Section to aggregate (hourly, daily)"),
+    field: str = Query("temp", description="Field compared against the threshold"),
+    threshold: Optional[float] = Query(
+        None, description="Report windows where the field is above this value"
+    ),
+):
+    """Summarise the hourly or daily forecast without returning the full arrays"""
+    if section not in SECTIONS:
+        raise HTTPException(status_code=400, detail=f"Unknown section: {section}")
+    _check_units(units)
+
+    cache_key = f"onecall_{lat}_{lon}_{units}"
+    forecast_data = await _load_forecast(cache_key, lat, lon, units)
+
+    try:
+        with span("aggregate"):
+            summary = aggregation_service.aggregate(
+                cache_key, _forecast_data(forecast_data), section, field, threshold
+            )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"lat": lat, "lon": lon, "units": units, **summary}
@@ -1,3 +1,4 @@
+from typing import Dict, List
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -8,8 +9,150 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str
     AWS_DEFAULT_REGION: str = "us-east-1"
     DYNAMODB_ENDPOINT_URL: str = "http://localhost:4566"
+    DYNAMODB_CONNECT_TIMEOUT: float = 1.0  # Seconds
+    DYNAMODB_READ_TIMEOUT: float = 2.0  # Seconds
+    DYNAMODB_MAX_ATTEMPTS: int = 2  # Per call, including the first
     SNS_ENDPOINT_URL: str = "http://localhost:4566"
 
+    # Persistent forecast storage: "dynamodb", or "sqlite" for an embedded
+    # store in STORAGE_SQLITE_PATH (one file per host, shared by workers)
+    STORAGE_BACKEND: str = "dynamodb"
+    STORAGE_SQLITE_PATH: str = "weather_forecasts.db"
+
+    # In-process forecast cache
+    CACHE_TTL_SECONDS: int = 300
+    CACHE_BACKEND: str = "memory"  # "memory" (per process) or "shared" (per host)
+    SHARED_CACHE_PATH: str = "/dev/shm/weather-cache"
+    SHARED_CACHE_SLOTS: int = 2048
+    # Bytes, larger forecasts are not cached. A full OneCall response (current,
+    # 61 minutely, 48 hourly and 8 daily entries) is about 22 KB compact, and
+    # each alert adds 0.5-3 KB, so this leaves room for an active warning area.
+    SHARED_CACHE_SLOT_SIZE: int = 40960
+    CACHE_SNAPSHOT_PATH: str = ""  # Warm-start snapshot file, disabled when empty
+    CACHE_SNAPSHOT_INTERVAL: int = 60  # Seconds between snapshots, 0 for shutdown only
+    CACHE_STALE_SECONDS: int = 3600  # Expired entries kept for deadline fallback
+    CACHE_CLEANUP_INTERVAL: int = 60  # Seconds between sweeps of expired entries
+
+    # Persistent storage, how long a stored forecast may be served; adaptive
+    # TTLs stretch it for calm locations but never shorten it
+    STORAGE_TTL_SECONDS: int = 3600
+
+    # Per-location TTLs adapted to how fast each forecast changes; the cache
+    # TTL moves within these bounds
+    ADAPTIVE_TTL_ENABLED: bool = True
+    ADAPTIVE_TTL_MIN: int = 60
+    ADAPTIVE_TTL_MAX: int = 1800
+    ADAPTIVE_TTL_ALERTS: int = 120  # Upper bound while weather alerts are active
+    ADAPTIVE_TTL_MAX_LOCATIONS: int = 10000
+
+    # Seconds to remember upstream failures per class before retrying
+    NEGATIVE_TTL_CLIENT_ERROR: int = 60
+    NEGATIVE_TTL_RATE_LIMITED: int = 30  # Used when 429 has no Retry-After
+    NEGATIVE_TTL_SERVER_ERROR: int = 15
+    NEGATIVE_TTL_TIMEOUT: int = 10
+    NEGATIVE_TTL_MAX: int = 300
+
+    # Spatial index of cached forecast locations, for regions and interpolation
+    SPATIAL_INDEX_CELL_DEGREES: float = 0.25
+    REGION_PAGE_SIZE: int = 100
+    REGION_MAX_PAGE_SIZE: int = 1000
+
+    # Interpolating forecasts for uncached points from nearby cached ones
+    INTERPOLATION_ENABLED: bool = False  # Default for ?interpolate=
+    INTERPOLATION_MAX_DISTANCE_KM: float = 25.0
+    INTERPOLATION_MIN_POINTS: int = 3
+    INTERPOLATION_MAX_POINTS: int = 4
+
+    # Recent versions per cached forecast, for ?since= delta responses; off
+    # by default as it diffs each refreshed forecast on the request path
+    FORECAST_HISTORY_ENABLED: bool = False
+    FORECAST_HISTORY_VERSIONS: int = 8
+    FORECAST_HISTORY_MAX_LOCATIONS: int = 10000
+
+    # Sparse fieldsets (?fields=) on forecast responses
+    FIELDS_MAX_PATHS: int = 32
+    FIELDS_MAX_SELECTORS: int = 256  # Compiled expressions kept
+    FIELDS_MAX_SUBSETS: int = 1024  # Encoded subsets kept, per key and selector
+
+    # Time budget per request across storage and upstream; clients may ask
+    # for a shorter or longer one, up to the maximum, in milliseconds in
+    # REQUEST_DEADLINE_HEADER. Tiers with less than their minimum left are
+    # skipped and stale cache entries served instead when there are any
+    REQUEST_DEADLINE: float = 0.0  # Seconds, 0 for none unless a client asks
+    REQUEST_DEADLINE_MAX: float = 30.0
+    REQUEST_DEADLINE_HEADER: str = "X-Request-Deadline-Ms"
+    DEADLINE_MIN_STORAGE: float = 0.02
+    DEADLINE_MIN_UPSTREAM: float = 0.25
+
+    # Per-client rate limits, in cost units per window, for the whole server;
+    # python -m app.server gives each worker an even share of them. Clients
+    # are identified by RATE_LIMIT_KEY_HEADER when it holds one of
+    # RATE_LIMIT_API_KEYS, otherwise by their address (see
+    # SERVER_FORWARDED_ALLOW_IPS when behind a proxy)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_WINDOW: float = 60.0
+    RATE_LIMIT_DEFAULT: int = 1200
+    RATE_LIMIT_ROUTES: Dict[str, int] = {}  # Path prefix -> limit, own budget each
+    RATE_LIMIT_HIT_COST: int = 1
+    RATE_LIMIT_MISS_COST: int = 10  # Charged when storage or upstream answered
+    RATE_LIMIT_KEY_HEADER: str = "X-API-Key"
+    RATE_LIMIT_API_KEYS: List[str] = []
+    RATE_LIMIT_MAX_CLIENTS: int = 100_000
+
+    # Admission control, requests over these limits get 503 with Retry-After
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_HIT_LIMIT: int = 512  # Concurrent requests not waiting on a miss
+    ADMISSION_MISS_LIMIT: int = 32  # Initial concurrent storage/upstream lookups
+    ADMISSION_MISS_MIN_LIMIT: int = 4
+    ADMISSION_MISS_MAX_LIMIT: int = 128
+    ADMISSION_MISS_QUEUE: int = 64  # Misses allowed to wait for a slot
+    ADMISSION_QUEUE_TIMEOUT: float = 2.0  # Seconds a miss may wait
+    ADMISSION_LATENCY_TOLERANCE: float = 2.0  # Shrink above this x best latency
+
+    # Write-behind persistence of fetched forecasts
+    WRITE_BEHIND_ENABLED: bool = True
+    WRITE_BEHIND_MAX_PENDING: int = 1000
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 1.0  # Seconds
+
+    # Diagnostics endpoints under /api/v1/diagnostics
+    DIAGNOSTICS_ENABLED: bool = False
+    DIAGNOSTICS_TOKEN: str = ""  # When set, required in X-Diagnostics-Token
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_SAMPLE_RATE: float = 1.0  # Share of successful fast requests logged
+    LOG_SLOW_REQUEST_THRESHOLD: float = 0.5  # Seconds, always logged above this
+
+    # Event loop lag monitoring
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.1  # Seconds between lag measurements
+    LOOP_MONITOR_DEBUG: bool = False  # Capture stacks of blocking callbacks
+    LOOP_BLOCK_THRESHOLD: float = 0.1  # Seconds the loop may stall unnoticed
+
+    # On-demand profiling through the X-Profile request header
+    PROFILING_ENABLED: bool = False
+    PROFILING_TOKEN: str = ""  # When set, the header value must match
+    PROFILING_INTERVAL: float = 0.001  # Seconds between stack samples
+
+    # Memory diagnostics under /api/v1/diagnostics/memory, per worker; send the
+    # pid a response reports in X-Worker-Pid to keep requests on that worker
+    MEMORY_SIZE_SAMPLE: int = 100  # Items measured per container when sizing
+    MEMORY_TRACE_MAX_SECONDS: float = 300.0  # Allocation tracing stops after this
+
+    # Production server (python -m app.server)
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = 0  # 0 for one per available core
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE: int = 75  # Seconds, above typical load balancer idle timeouts
+    SERVER_GRACEFUL_TIMEOUT: int = 30  # Seconds to drain in-flight requests
+    # Proxies trusted to report the client address in X-Forwarded-For, as a
+    # comma-separated list of addresses or networks, or "*". Rate limits key
+    # clients by that address, so set it to the load balancer's addresses
+    SERVER_FORWARDED_ALLOW_IPS: str = "127.0.0.1"
+
     model_config = ConfigDict(env_file=".env", env_file_encoding="utf-8")
 
 
@@ -0,0 +1,100 @@
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Dict, Iterator, Optional, TypeVar
+from app.exceptions import DeadlineExceededError
+from app.services.metrics import metrics
+
+T = TypeVar("T")
+
+_current_deadline: ContextVar[Optional["Deadline"]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+class Deadline:
+    """The time budget of a single request, shared by every tier it visits"""
+
+    __slots__ = ("budget", "expires_at", "spent", "exhausted_by")
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+        # Seconds each tier has used, to tell which one spent the budget
+        self.spent: Dict[str, float] = {}
+        self.exhausted_by: Optional[str] = None
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def exhaust(self, tier: str) -> DeadlineExceededError:
+        """Record that ``tier`` ran out the budget, returning the error to raise"""
+        if self.exhausted_by is None:
+            self.exhausted_by = tier
+            metrics.incr(f"deadline.exhausted.{tier}")
+        return DeadlineExceededError(self.exhausted_by)
+
+    def blame(self) -> str:
+        """The tier that used the most of the budget so far; time outside
+        every tier is put down to the request itself"""
+        spent = dict(self.spent)
+        spent["request"] = self.budget - self.remaining() - sum(self.spent.values())
+        return max(spent, key=spent.__getitem__)
+
+
+def start_deadline(budget: float) -> Deadline:
+    """Install a deadline ``budget`` seconds away for the current request"""
+    deadline = Deadline(budget)
+    _current_deadline.set(deadline)
+    return deadline
+
+
+def current_deadline() -> Optional[Deadline]:
+    return _current_deadline.get()
+
+
+def remaining() -> Optional[float]:
+    """Seconds left for the current request, or None without a deadline"""
+    deadline = _current_deadline.get()
+    return None if deadline is None else deadline.remaining()
+
+
+@contextmanager
+def charge(tier: str) -> Iterator[None]:
+    """Count time spent in a block against ``tier``; a no-op without a deadline"""
+    deadline = _current_deadline.get()
+    if deadline is None:
+        yield
+        return
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        deadline.spent[tier] = deadline.spent.get(tier, 0.0) + (
+            time.monotonic() - start
+        )
+
+
+async def within(tier: str, awaitable: Awaitable[T], minimum: float = 0.0) -> T:
+    """Await a tier's work with only the budget the request has left.
+
+    The tier is skipped when less than ``minimum`` seconds remain, since it
+    could not finish in time, and cancelled when the deadline passes. Both
+    raise ``DeadlineExceededError`` naming the tier that spent the budget.
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return await awaitable
+
+    budget = deadline.remaining()
+    if budget <= 0 or budget < minimum:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        metrics.incr(f"deadline.skipped.{tier}")
+        raise deadline.exhaust(deadline.blame())
+    with charge(tier):
+        try:
+            return await asyncio.wait_for(awaitable, budget)
+        except asyncio.TimeoutError:
+            raise deadline.exhaust(tier) from None
@@ -1,3 +1,6 @@
+from typing import Optional
+
+
 class WeatherAPIException(Exception):
     """Custom exception for Weather API related errors"""
 
@@ -16,4 +19,58 @@ class WeatherNotFoundError(WeatherAPIError):
 
 class WeatherServiceError(WeatherAPIError):
     """Raised when there's an error in the weather service"""
-    pass
\ No newline at end of file
+    pass
+
+class UpstreamError(WeatherServiceError):
+    """Raised when the OpenWeather API fails, classified for negative caching"""
+
+    CLIENT_ERROR = "client_error"
+    RATE_LIMITED = "rate_limited"
+    SERVER_ERROR = "server_error"
+    TIMEOUT = "timeout"
+
+    def __init__(
+        self,
+        kind: str,
+        status_code: Optional[int] = None,
+        retry_after: Optional[int] = None,
+    ):
+        self.kind = kind
+        self.status_code = status_code
+        self.retry_after = retry_after
+        super().__init__(f"OpenWeather API {kind} (status {status_code})")
+
+    @classmethod
+    def from_status(
+        cls, status_code: int, retry_after: Optional[str] = None
+    ) -> "UpstreamError":
+        if status_code == 429:
+            seconds = int(retry_after) if retry_after and retry_after.isdigit() else None
+            return cls(cls.RATE_LIMITED, status_code, seconds)
+        if status_code >= 500:
+            return cls(cls.SERVER_ERROR, status_code)
+        return cls(cls.CLIENT_ERROR, status_code)
+
+
+class ServiceOverloadedError(WeatherServiceError):
+    """Raised when admission control sheds a request under load"""
+
+    def __init__(self, retry_after: int = 1):
+        self.retry_after = retry_after
+        super().__init__(f"Service overloaded, retry after {retry_after}s")
+
+
+class RateLimitedError(WeatherServiceError):
+    """Raised when a client has spent its request budget"""
+
+    def __init__(self, retry_after: int = 1):
+        self.retry_after = retry_after
+        super().__init__(f"Rate limit exceeded, retry after {retry_after}s")
+
+
+class DeadlineExceededError(WeatherServiceError):
+    """Raised when a request's time budget runs out before it is answered"""
+
+    def __init__(self, tier: str):
+        self.tier = tier
+        super().__init__(f"Request deadline exceeded in {tier}")
@@ -0,0 +1,156 @@
+import asyncio
+import bisect
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+from app.config import settings
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds of the lag histogram buckets, in seconds
+LAG_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop runs a timer that should fire every
+    ``interval`` seconds.
+
+    Lag is recorded in a fixed-bucket histogram and a short history used to
+    report the worst lag seen during a slow request. In debug mode a watchdog
+    thread also notices when the loop has not ticked for ``block_threshold``
+    and captures the stack of whatever is holding it.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        block_threshold: float = 0.1,
+        debug: bool = False,
+        history: int = 600,
+        max_blocked: int = 20,
+    ):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.debug = debug
+        self.buckets = [0] * (len(LAG_BUCKETS) + 1)
+        self.count = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._history: Deque[Tuple[float, float]] = deque(maxlen=history)
+        self.blocked: Deque[Dict[str, Any]] = deque(maxlen=max_blocked)
+        self._heartbeat = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._loop_thread_id: Optional[int] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._task = loop.create_task(self._run())
+        if self.debug:
+            if loop.get_debug():
+                # Have asyncio's own slow-callback log use the same threshold
+                loop.slow_callback_duration = self.block_threshold
+            self._stop.clear()
+            self._watchdog = threading.Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def record(self, lag: float, now: Optional[float] = None) -> None:
+        self.buckets[bisect.bisect_left(LAG_BUCKETS, lag)] += 1
+        self.count += 1
+        self.last_lag = lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        self._history.append((time.perf_counter() if now is None else now, lag))
+        metrics.observe("event_loop.lag", lag)
+
+    def max_lag_since(self, since: float) -> float:
+        """Worst lag measured at or after ``since`` (a perf_counter value)"""
+        worst = 0.0
+        for at, lag in reversed(self._history):
+            if at < since:
+                break
+            worst = max(worst, lag)
+        return worst
+
+    def snapshot(self) -> Dict[str, Any]:
+        bounds = [f"le_{bound * 1000:g}ms" for bound in LAG_BUCKETS] + ["inf"]
+        return {
+            "interval": self.interval,
+            "count": self.count,
+            "last_ms": round(self.last_lag * 1000, 3),
+            "max_ms": round(self.max_lag * 1000, 3),
+            "histogram": dict(zip(bounds, self.buckets)),
+            "blocked": list(self.blocked),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            self._heartbeat = now
+            self.record(max(0.0, now - expected), now)
+
+    def _watch(self) -> None:
+        episode: Optional[Dict[str, Any]] = None
+        poll = min(self.block_threshold / 2, self.interval)
+        while not self._stop.wait(poll):
+            stalled = time.perf_counter() - self._heartbeat - self.interval
+            if stalled < self.block_threshold:
+                episode = None
+                continue
+            if episode is not None:
+                # Still the same blocking call, just track how long it lasts
+                episode["blocked_ms"] = round(stalled * 1000, 1)
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            episode = {
+                "at": time.time(),
+                "blocked_ms": round(stalled * 1000, 1),
+                "stack": traceback.format_stack(frame),
+            }
+            self.blocked.append(episode)
+            metrics.incr("event_loop.blocked")
+            logger.warning(
+                "Event loop blocked for %.0fms in %s",
+                stalled * 1000,
+                episode["stack"][-1].strip().splitlines()[0],
+            )
+
+
+loop_monitor = LoopLagMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    block_threshold=settings.LOOP_BLOCK_THRESHOLD,
+    debug=settings.LOOP_MONITOR_DEBUG,
+)
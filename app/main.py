@@ -1,9 +1,22 @@
+import asyncio
+import logging
 from fastapi import FastAPI
 from mangum import Mangum
-from app.api.v1 import weather
+from app.api.v1 import diagnostics, weather
+from app.config import settings
+from app.services.cache_service import WeatherCache
+from app.services.cache_snapshot import write_snapshot
 from app.middleware.logging_middleware import logging_middleware
 from app.middleware.error_middleware import error_handling_middleware
+from app.middleware.deadline_middleware import deadline_middleware
+from app.middleware.admission_middleware import admission_middleware
+from app.middleware.rate_limit_middleware import rate_limit_middleware
 from app.middleware.performance_middleware import performance_middleware
+from app.logging_config import configure_logging, shutdown_logging
+from app.loop_monitor import loop_monitor
+from app.memory_profiler import allocation_tracker
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Weather API",
@@ -12,11 +25,121 @@ app = FastAPI(
 )
 
 # Add middleware in the desired order
+# Admission is innermost so shed requests are still mapped, logged and timed,
+# and rate limiting runs before it so rejected clients never hold a slot.
+# The deadline wraps error handling so it can label timed out responses
+app.middleware("http")(admission_middleware)
+app.middleware("http")(rate_limit_middleware)
 app.middleware("http")(error_handling_middleware)
+app.middleware("http")(deadline_middleware)
 app.middleware("http")(logging_middleware)
 app.middleware("http")(performance_middleware)
 
 app.include_router(weather.router, prefix="/api/v1/weather", tags=["weather"])
+app.include_router(
+    diagnostics.router, prefix="/api/v1/diagnostics", tags=["diagnostics"]
+)
+
+
+_background_tasks = []
+
+
+async def _snapshot_cache_periodically(cache: WeatherCache, path: str, interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        # Collect on the loop, write the file off it
+        records = cache.snapshot_records()
+        try:
+            await asyncio.to_thread(write_snapshot, path, records)
+        except OSError:
+            logger.exception("Failed to write cache snapshot to %s", path)
+
+
+async def _cleanup_cache_periodically(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        # Drops expired entries and, through the cache's removal hook,
+        # what the spatial index, forecast history, field subsets and
+        # aggregation arrays derived from them
+        weather.weather_cache.cleanup_expired()
+        if not isinstance(weather.weather_cache, WeatherCache):
+            # Other workers evict from the shared cache without telling this
+            # one, so also drop derived state for keys it no longer holds
+            def held(key: str) -> bool:
+                return weather.weather_cache.get_stale(key) is not None
+
+            weather.spatial_index.prune(held)
+            weather.forecast_history.prune(held)
+            weather.field_selection.prune(held)
+            weather.aggregation_service.prune(held)
+
+
+def _snapshots_enabled() -> bool:
+    return bool(settings.CACHE_SNAPSHOT_PATH) and isinstance(
+        weather.weather_cache, WeatherCache
+    )
+
+
+@app.on_event("startup")
+async def startup():
+    configure_logging()
+
+    if settings.LOOP_MONITOR_ENABLED:
+        loop_monitor.start()
+
+    if settings.WRITE_BEHIND_ENABLED:
+        weather.write_behind.start()
+
+    if settings.CACHE_CLEANUP_INTERVAL > 0:
+        _background_tasks.append(
+            asyncio.create_task(
+                _cleanup_cache_periodically(settings.CACHE_CLEANUP_INTERVAL)
+            )
+        )
+
+    if _snapshots_enabled():
+        try:
+            loaded = weather.weather_cache.load_snapshot(settings.CACHE_SNAPSHOT_PATH)
+            logger.info("Loaded %d cache entries from snapshot", loaded)
+            for key in weather.weather_cache.keys():
+                weather.spatial_index.add(key)
+        except (OSError, ValueError):
+            logger.exception("Ignoring unreadable cache snapshot")
+        if settings.CACHE_SNAPSHOT_INTERVAL > 0:
+            _background_tasks.append(
+                asyncio.create_task(
+                    _snapshot_cache_periodically(
+                        weather.weather_cache,
+                        settings.CACHE_SNAPSHOT_PATH,
+                        settings.CACHE_SNAPSHOT_INTERVAL,
+                    )
+                )
+            )
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    for task in _background_tasks:
+        task.cancel()
+    _background_tasks.clear()
+
+    # Persist forecasts still waiting in the write-behind buffer
+    await weather.write_behind.close()
+    close_storage = getattr(weather.storage_service, "close", None)
+    if close_storage is not None:
+        close_storage()
+
+    if _snapshots_enabled():
+        try:
+            saved = weather.weather_cache.save_snapshot(settings.CACHE_SNAPSHOT_PATH)
+            logger.info("Saved %d cache entries to snapshot", saved)
+        except OSError:
+            logger.exception("Failed to write cache snapshot")
+
+    await loop_monitor.stop()
+    allocation_tracker.stop()
+    shutdown_logging()
+
 
 # Handler for AWS Lambda
 handler = Mangum(app)
@@ -0,0 +1,191 @@
+import asyncio
+import os
+import sys
+import time
+import tracemalloc
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, List, Optional, Set
+from app.config import settings
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+# Containers whose items are walked by ``deep_size``
+_CONTAINERS = (dict, list, tuple, set, frozenset, deque)
+# Only the application's own objects are followed through their attributes;
+# library objects (clients, locks, tasks) are counted at their shallow size
+_APP_PREFIX = "app."
+_MAX_DEPTH = 32
+
+
+def deep_size(obj: Any, sample: int = 100, seen: Optional[Set[int]] = None) -> int:
+    """Approximate bytes held by ``obj`` and everything it references.
+
+    Containers with more than ``sample`` items are measured from an evenly
+    spaced sample of them, so large caches cost O(sample) to size. Objects
+    already in ``seen`` are not counted again, which lets callers size
+    several structures that share data without counting it twice.
+    """
+    return _deep_size(obj, sample, set() if seen is None else seen, 0)
+
+
+def _deep_size(obj: Any, sample: int, seen: Set[int], depth: int) -> int:
+    if id(obj) in seen or depth > _MAX_DEPTH:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+
+    if isinstance(obj, _CONTAINERS):
+        count = len(obj)
+        items = iter(obj.items() if isinstance(obj, dict) else obj)
+        if count > sample:
+            items = islice(items, 0, None, count // sample)
+        measured = 0
+        total = 0
+        for item in items:
+            # Key and value separately, the pair is a temporary whose id
+            # would be reused by the next one
+            if isinstance(obj, dict):
+                total += _deep_size(item[0], sample, seen, depth + 1)
+                item = item[1]
+            total += _deep_size(item, sample, seen, depth + 1)
+            measured += 1
+        if measured:
+            size += total * count // measured
+        return size
+
+    if not type(obj).__module__.startswith(_APP_PREFIX):
+        return size
+    if hasattr(obj, "__dict__"):
+        size += _deep_size(vars(obj), sample, seen, depth + 1)
+    for cls in type(obj).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            if hasattr(obj, name):
+                size += _deep_size(getattr(obj, name), sample, seen, depth + 1)
+    return size
+
+
+def process_memory() -> Dict[str, Optional[int]]:
+    """Current and peak resident set size of this process, in bytes"""
+    rss = None
+    try:
+        with open("/proc/self/statm") as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    peak = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        peak = peak if sys.platform == "darwin" else peak * 1024
+    return {"rss_bytes": rss, "peak_rss_bytes": peak}
+
+
+def _stat(stat: Any, traceback: bool) -> Dict[str, Any]:
+    frame = stat.traceback[0]
+    entry = {
+        "site": f"{frame.filename}:{frame.lineno}",
+        "size_bytes": stat.size,
+        "count": stat.count,
+    }
+    if hasattr(stat, "size_diff"):
+        entry["size_diff"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    if traceback:
+        entry["traceback"] = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+    return entry
+
+
+class AllocationTracker:
+    """On-demand ``tracemalloc`` tracing with a baseline to diff against.
+
+    Tracing is off until ``start`` and costs nothing until then; once on,
+    every allocation is recorded, so it is stopped again after
+    ``max_seconds`` in case nobody calls ``stop``.
+    """
+
+    GROUPINGS = ("lineno", "filename", "traceback")
+
+    def __init__(self, max_seconds: float = 300.0):
+        self.max_seconds = max_seconds
+        self.started_at: Optional[float] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._timeout: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def start(self, frames: int = 1) -> None:
+        """Start tracing, or restart it, and take the baseline snapshot"""
+        self.stop()
+        tracemalloc.start(frames)
+        self.started_at = time.time()
+        self._baseline = self._snapshot()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._timeout = loop.call_later(self.max_seconds, self.stop)
+
+    def stop(self) -> None:
+        if self._timeout is not None:
+            self._timeout.cancel()
+            self._timeout = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._baseline = None
+        self.started_at = None
+
+    def report(self, limit: int = 20, group_by: str = "lineno") -> Dict[str, Any]:
+        """Top allocation sites now, and what grew since the baseline"""
+        if group_by not in self.GROUPINGS:
+            raise ValueError(f"group_by must be one of {', '.join(self.GROUPINGS)}")
+        if not self.tracing:
+            raise RuntimeError("Allocation tracing is not running")
+        snapshot = self._snapshot()
+        traced, peak = tracemalloc.get_traced_memory()
+        traceback = group_by == "traceback"
+        growth = snapshot.compare_to(self._baseline, group_by)
+        return {
+            "tracing_seconds": round(time.time() - self.started_at, 1),
+            "traced_bytes": traced,
+            "peak_traced_bytes": peak,
+            "top": [
+                _stat(stat, traceback) for stat in snapshot.statistics(group_by)[:limit]
+            ],
+            "growth": [
+                _stat(stat, traceback) for stat in growth[:limit] if stat.size_diff > 0
+            ],
+        }
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        # Leave out the bookkeeping of tracemalloc and the import system
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                tracemalloc.Filter(False, "<unknown>"),
+            )
+        )
+
+
+def structure_sizes(
+    structures: Dict[str, tuple], sample: int = 100
+) -> List[Dict[str, Any]]:
+    """Entry counts and deep sizes of named ``(object, entries)`` pairs.
+
+    Data shared between structures is counted once, against the first one
+    listed that holds it.
+    """
+    seen: Set[int] = set()
+    return [
+        {"name": name, "entries": entries, "bytes": deep_size(obj, sample, seen)}
+        for name, (obj, entries) in structures.items()
+    ]
+
+
+allocation_tracker = AllocationTracker(max_seconds=settings.MEMORY_TRACE_MAX_SECONDS)
@@ -0,0 +1,14 @@
+from fastapi import Request
+from starlette.middleware.base import RequestResponseEndpoint
+from app.services.admission import admission
+
+# Always admitted, so health checks keep passing while load is shed
+EXEMPT_PATHS = ("/health", "/api/v1/diagnostics")
+
+
+async def admission_middleware(request: Request, call_next: RequestResponseEndpoint):
+    if request.url.path.startswith(EXEMPT_PATHS):
+        return await call_next(request)
+
+    async with admission.request():
+        return await call_next(request)
@@ -0,0 +1,33 @@
+from typing import Optional
+from fastapi import Request
+from starlette.middleware.base import RequestResponseEndpoint
+from app.config import settings
+from app.deadline import start_deadline
+
+EXHAUSTED_HEADER = "X-Deadline-Exhausted"
+
+
+def request_budget(request: Request) -> Optional[float]:
+    """Seconds the request may take: the client's deadline or the default"""
+    value = request.headers.get(settings.REQUEST_DEADLINE_HEADER)
+    if value is not None:
+        try:
+            budget = float(value) / 1000
+        except ValueError:
+            budget = 0.0
+        if budget > 0:
+            return min(budget, settings.REQUEST_DEADLINE_MAX)
+    return settings.REQUEST_DEADLINE or None
+
+
+async def deadline_middleware(request: Request, call_next: RequestResponseEndpoint):
+    budget = request_budget(request)
+    if budget is None:
+        return await call_next(request)
+
+    deadline = start_deadline(budget)
+    response = await call_next(request)
+    if deadline.exhausted_by is not None:
+        # Served stale or timed out; say which tier the budget went on
+        response.headers[EXHAUSTED_HEADER] = deadline.exhausted_by
+    return response
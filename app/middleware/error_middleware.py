@@ -1,6 +1,12 @@
 from fastapi import Request, status
 from fastapi.responses import JSONResponse
-from app.exceptions import WeatherAPIError, WeatherNotFoundError
+from app.exceptions import (
+    DeadlineExceededError,
+    RateLimitedError,
+    ServiceOverloadedError,
+    WeatherAPIError,
+    WeatherNotFoundError,
+)
 import logging
 from starlette.middleware.base import RequestResponseEndpoint
 
@@ -15,28 +21,51 @@ async def error_handling_middleware(
         return response
         
     except WeatherNotFoundError as e:
-        logger.warning(f"Weather data not found: {str(e)}")
+        logger.warning("Weather data not found: %s", e)
         response = JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content={"detail": str(e)}
         )
         
     except ValueError as e:
-        logger.error(f"Validation error: {str(e)}")
+        logger.error("Validation error: %s", e)
         response = JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Internal server error"}
         )
         
+    except RateLimitedError as e:
+        logger.warning("Request rate limited: %s", e)
+        response = JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={"detail": "Rate limit exceeded, please retry later"},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+        
+    except DeadlineExceededError as e:
+        logger.warning("Request deadline exceeded: %s", e)
+        response = JSONResponse(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            content={"detail": str(e)}
+        )
+        
+    except ServiceOverloadedError as e:
+        logger.warning("Request shed: %s", e)
+        response = JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Service overloaded, please retry"},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+        
     except WeatherAPIError as e:
-        logger.error(f"Weather API error: {str(e)}")
+        logger.error("Weather API error: %s", e)
         response = JSONResponse(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             content={"detail": "Weather service temporarily unavailable"}
         )
         
     except Exception as e:
-        logger.exception("Unhandled exception: %s", str(e))
+        logger.exception("Unhandled exception: %s", e)
         response = JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             content={"detail": "Internal server error"}
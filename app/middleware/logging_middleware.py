@@ -4,6 +4,8 @@ import time
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import RequestResponseEndpoint
 from uuid import uuid4
+from app.logging_config import log_sampler
+from app.timing import current_timer
 
 logger = logging.getLogger(__name__)
 
@@ -17,11 +19,20 @@ async def logging_middleware(
     # Add request_id to request state
     request.state.request_id = request_id
     
+    # Decide up front so a sampled-out request builds no log records at all
+    sampled = log_sampler.sample()
+    
     # Log request start
-    logger.info(
-        f"Request started | ID: {request_id} | Method: {request.method} | "
-        f"Path: {request.url.path}"
-    )
+    if sampled and logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Request started",
+            extra={
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "query": request.url.query,
+            },
+        )
     
     try:
         response = await call_next(request)
@@ -31,19 +42,37 @@ async def logging_middleware(
         response.headers["X-Request-ID"] = request_id
         response.headers["X-Process-Time"] = f"{process_time:.3f}s"
         
-        # Log successful response
-        logger.info(
-            f"Request completed | ID: {request_id} | Status: {response.status_code} | "
-            f"Duration: {process_time:.3f}s"
-        )
+        # Log response; errors and slow requests bypass sampling
+        if log_sampler.should_log(
+            sampled, response.status_code, process_time
+        ) and logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Request completed",
+                extra={
+                    "request_id": request_id,
+                    "method": request.method,
+                    "path": request.url.path,
+                    "query": request.url.query,
+                    "status": response.status_code,
+                    "duration": round(process_time, 3),
+                    "tier": getattr(current_timer(), "tier", None),
+                },
+            )
         
         return response
         
     except Exception as e:
         process_time = time.time() - start_time
         logger.error(
-            f"Request failed | ID: {request_id} | Error: {str(e)} | "
-            f"Duration: {process_time:.3f}s"
+            "Request failed",
+            extra={
+                "request_id": request_id,
+                "method": request.method,
+                "path": request.url.path,
+                "query": request.url.query,
+                "error": str(e),
+                "duration": round(process_time, 3),
+            },
         )
         
         # Let the error middleware handle the exception
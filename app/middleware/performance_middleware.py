@@ -1,32 +1,75 @@
 from fastapi import Request
+from fastapi.responses import PlainTextResponse
 import logging
 import time
 from starlette.middleware.base import RequestResponseEndpoint
+from app.config import settings
+from app.loop_monitor import loop_monitor
+from app.profiler import SamplingProfiler
+from app.timing import start_request_timer
 
 logger = logging.getLogger(__name__)
 SLOW_REQUEST_THRESHOLD = 0.5  # Lower threshold for testing
+PROFILE_HEADER = "X-Profile"
+
+
+def _profiling_requested(request: Request) -> bool:
+    if not settings.PROFILING_ENABLED:
+        return False
+    value = request.headers.get(PROFILE_HEADER)
+    if value is None:
+        return False
+    return not settings.PROFILING_TOKEN or value == settings.PROFILING_TOKEN
 
 async def performance_middleware(
     request: Request,
     call_next: RequestResponseEndpoint
 ):
     start_time = time.time()
+    started = time.perf_counter()
+    timer = start_request_timer()
+    
+    profiler = None
+    if _profiling_requested(request):
+        profiler = SamplingProfiler(interval=settings.PROFILING_INTERVAL)
+        profiler.start()
     
     try:
         response = await call_next(request)
         process_time = time.time() - start_time
         
+        if profiler is not None:
+            # Drain the handler's body so it is part of the profile
+            async for _ in response.body_iterator:
+                pass
+            profiler.stop()
+            # Replace the body with the collapsed stacks for flame graph tools
+            response = PlainTextResponse(
+                profiler.folded(),
+                headers={"X-Profile-Samples": str(profiler.sample_count)},
+            )
+        
         response.headers["X-Response-Time"] = f"{process_time:.3f}s"
+        response.headers["Server-Timing"] = timer.server_timing(process_time)
+        if timer.tier is not None:
+            response.headers["X-Cache-Tier"] = timer.tier
         
         if process_time > SLOW_REQUEST_THRESHOLD:
             logger.warning(
-                f"Very slow request detected | Method: {request.method} | "  # Changed "Slow" to "Very slow"
-                f"Path: {request.url.path} | Duration: {process_time:.3f}s"
+                "Very slow request detected | Method: %s | "  # Changed "Slow" to "Very slow"
+                "Path: %s | Duration: %.3fs | Phases: %s | Max loop lag: %.3fs",
+                request.method,
+                request.url.path,
+                process_time,
+                timer.summary(),
+                loop_monitor.max_lag_since(started),
             )
         
         return response
         
     except Exception:
+        if profiler is not None:
+            profiler.stop()
         process_time = time.time() - start_time
         request.state.response_time = f"{process_time:.3f}s"
-        raise
\ No newline at end of file
+        raise
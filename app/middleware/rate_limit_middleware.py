@@ -0,0 +1,38 @@
+from fastapi import Request
+from starlette.middleware.base import RequestResponseEndpoint
+from app.config import settings
+from app.middleware.admission_middleware import EXEMPT_PATHS
+from app.services.rate_limiter import MISS_TIERS, rate_limiter
+from app.timing import current_timer
+
+
+def client_id(request: Request) -> str:
+    """The API key when a known one is sent, otherwise the client address.
+
+    Unknown keys are not trusted, or a client could get a fresh budget per
+    request by sending a new key each time.
+    """
+    api_key = request.headers.get(settings.RATE_LIMIT_KEY_HEADER)
+    if api_key and api_key in settings.RATE_LIMIT_API_KEYS:
+        return f"key:{api_key}"
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
+async def rate_limit_middleware(request: Request, call_next: RequestResponseEndpoint):
+    path = request.url.path
+    if not settings.RATE_LIMIT_ENABLED or path.startswith(EXEMPT_PATHS):
+        return await call_next(request)
+
+    # Every request pays the hit cost up front; which tier answered is only
+    # known afterwards, so misses pay the difference when they complete
+    client = client_id(request)
+    route = rate_limiter.acquire(client, path, settings.RATE_LIMIT_HIT_COST)
+    try:
+        return await call_next(request)
+    finally:
+        if getattr(current_timer(), "tier", None) in MISS_TIERS:
+            rate_limiter.charge(
+                client,
+                route,
+                settings.RATE_LIMIT_MISS_COST - settings.RATE_LIMIT_HIT_COST,
+            )
@@ -0,0 +1,68 @@
+import json
+from decimal import Decimal
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(obj):
+    # Mirrors DecimalEncoder so DynamoDB numbers serialise the same way
+    if isinstance(obj, Decimal):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def loads(body: Union[bytes, str]) -> Any:
+    """Parse JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def dumps(data: Any) -> bytes:
+    """Serialise JSON to compact UTF-8 bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+class RawForecast:
+    """A OneCall document kept as the upstream JSON bytes.
+
+    The body is passed through cache, storage and the HTTP response untouched;
+    ``data`` parses it on first access only, for callers that need fields.
+    Copies read from persistent storage carry the epoch second they expire
+    at in ``expires_at``.
+    """
+
+    __slots__ = ("body", "_data", "expires_at")
+
+    def __init__(
+        self,
+        body: bytes,
+        data: Optional[Dict[str, Any]] = None,
+        expires_at: Optional[float] = None,
+    ):
+        self.body = body
+        self._data = data
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_data(cls, data: Dict[str, Any]) -> "RawForecast":
+        return cls(dumps(data), data)
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        if self._data is None:
+            self._data = loads(self.body)
+        return self._data
+
+    @property
+    def is_parsed(self) -> bool:
+        return self._data is not None
+
+    def __repr__(self) -> str:
+        return f"RawForecast({len(self.body)} bytes)"
@@ -1,6 +1,8 @@
+import sys
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional
+from array import array
+from datetime import datetime, UTC
+from typing import Iterable, Iterator, List, Optional
 
 
 class WeatherData(BaseModel):
@@ -12,6 +14,183 @@ class WeatherData(BaseModel):
     wind_speed: float
     pressure: float
 
+    @classmethod
+    def from_trusted(
+        cls,
+        location_id: str,
+        temperature: float,
+        humidity: float,
+        condition: str,
+        timestamp: datetime,
+        wind_speed: float,
+        pressure: float,
+    ) -> "WeatherData":
+        """Build an instance without validation for already-typed values.
+
+        Only use this for data whose types are guaranteed by the caller, such as
+        numbers decoded from upstream JSON or rows read back from a batch.
+        ``model_construct`` still walks the field definitions in Python, so the
+        instance state is assigned directly instead, about twice as fast.
+        That state must match what validation builds; the model tests pin it
+        slot by slot against a validated instance.
+        """
+        model = cls.__new__(cls)
+        _set_attr(
+            model,
+            "__dict__",
+            {
+                "location_id": location_id,
+                "temperature": temperature,
+                "humidity": humidity,
+                "condition": condition,
+                "timestamp": timestamp,
+                "wind_speed": wind_speed,
+                "pressure": pressure,
+            },
+        )
+        _set_attr(model, "__pydantic_fields_set__", set(_WEATHER_DATA_FIELDS))
+        _set_attr(model, "__pydantic_extra__", None)
+        _set_attr(model, "__pydantic_private__", None)
+        return model
+
+
+_set_attr = object.__setattr__
+_WEATHER_DATA_FIELDS = frozenset(WeatherData.model_fields)
+
+
+class WeatherRecord:
+    """Lightweight read-only row of a WeatherDataBatch."""
+
+    __slots__ = (
+        "location_id",
+        "temperature",
+        "humidity",
+        "condition",
+        "timestamp",
+        "wind_speed",
+        "pressure",
+    )
+
+    def __init__(
+        self,
+        location_id: str,
+        temperature: float,
+        humidity: float,
+        condition: str,
+        timestamp: datetime,
+        wind_speed: float,
+        pressure: float,
+    ):
+        self.location_id = location_id
+        self.temperature = temperature
+        self.humidity = humidity
+        self.condition = condition
+        self.timestamp = timestamp
+        self.wind_speed = wind_speed
+        self.pressure = pressure
+
+    def to_model(self) -> WeatherData:
+        return WeatherData.from_trusted(
+            self.location_id,
+            self.temperature,
+            self.humidity,
+            self.condition,
+            self.timestamp,
+            self.wind_speed,
+            self.pressure,
+        )
+
+
+class WeatherDataBatch:
+    """Struct-of-arrays container for many observations.
+
+    Numeric fields are stored in typed arrays and timestamps as POSIX seconds,
+    so a batch costs a few dozen bytes per observation instead of a full model.
+    """
+
+    __slots__ = (
+        "location_ids",
+        "temperature",
+        "humidity",
+        "conditions",
+        "timestamps",
+        "wind_speed",
+        "pressure",
+    )
+
+    def __init__(self):
+        self.location_ids: List[str] = []
+        self.temperature = array("d")
+        self.humidity = array("d")
+        self.conditions: List[str] = []
+        self.timestamps = array("d")
+        self.wind_speed = array("d")
+        self.pressure = array("d")
+
+    def append(
+        self,
+        location_id: str,
+        temperature: float,
+        humidity: float,
+        condition: str,
+        timestamp: datetime,
+        wind_speed: float,
+        pressure: float,
+    ) -> None:
+        self.location_ids.append(location_id)
+        self.temperature.append(temperature)
+        self.humidity.append(humidity)
+        # Conditions repeat heavily ("Clear", "Clouds", ...), share the strings
+        self.conditions.append(sys.intern(condition))
+        self.timestamps.append(timestamp.timestamp())
+        self.wind_speed.append(wind_speed)
+        self.pressure.append(pressure)
+
+    def extend(self, other: "WeatherDataBatch") -> None:
+        self.location_ids.extend(other.location_ids)
+        self.temperature.extend(other.temperature)
+        self.humidity.extend(other.humidity)
+        self.conditions.extend(other.conditions)
+        self.timestamps.extend(other.timestamps)
+        self.wind_speed.extend(other.wind_speed)
+        self.pressure.extend(other.pressure)
+
+    def __len__(self) -> int:
+        return len(self.location_ids)
+
+    def __getitem__(self, index: int) -> WeatherRecord:
+        return WeatherRecord(
+            self.location_ids[index],
+            self.temperature[index],
+            self.humidity[index],
+            self.conditions[index],
+            datetime.fromtimestamp(self.timestamps[index], UTC),
+            self.wind_speed[index],
+            self.pressure[index],
+        )
+
+    def __iter__(self) -> Iterator[WeatherRecord]:
+        for index in range(len(self)):
+            yield self[index]
+
+    @classmethod
+    def from_models(cls, models: Iterable[WeatherData]) -> "WeatherDataBatch":
+        batch = cls()
+        for model in models:
+            batch.append(
+                model.location_id,
+                model.temperature,
+                model.humidity,
+                model.condition,
+                model.timestamp,
+                model.wind_speed,
+                model.pressure,
+            )
+        return batch
+
+    def to_models(self) -> List[WeatherData]:
+        return [record.to_model() for record in self]
+
 
 class WeatherAlert(BaseModel):
     location_id: str
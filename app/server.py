@@ -0,0 +1,189 @@
+"""Production server for container deployments.
+
+Run with ``python -m app.server``. The app is imported once in the parent
+process, which binds the listening socket and forks one uvicorn worker per
+available core; the workers share the socket and the preloaded modules.
+
+SIGTERM or SIGINT is forwarded to the workers, which stop accepting
+connections, let in-flight requests (and their upstream fetches) finish, and
+run the shutdown hooks that flush pending writes. Workers still running after
+``SERVER_GRACEFUL_TIMEOUT`` are killed. A worker that dies on its own is
+replaced.
+"""
+
+import importlib.util
+import inspect
+import logging
+import math
+import os
+import signal
+import socket
+import sys
+from typing import Dict
+import uvicorn
+from app.config import settings
+from app.logging_config import JsonFormatter
+
+logger = logging.getLogger(__name__)
+
+# Time given to workers on top of the graceful timeout before they are killed
+_KILL_MARGIN = 5
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def event_loop_implementation() -> str:
+    return "uvloop" if _installed("uvloop") else "asyncio"
+
+
+def http_implementation() -> str:
+    return "httptools" if _installed("httptools") else "h11"
+
+
+def available_cpus() -> int:
+    """Cores this process may use, honouring CPU affinity and cgroup quotas"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:  # Not available on macOS
+        count = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as cpu_max:
+            quota, period = cpu_max.read().split()
+        if quota != "max":
+            count = min(count, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return count
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def build_config(app) -> uvicorn.Config:
+    options = dict(
+        loop=event_loop_implementation(),
+        http=http_implementation(),
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE,
+        lifespan="on",
+        # logging_middleware already writes one structured line per request
+        access_log=False,
+        proxy_headers=True,
+        forwarded_allow_ips=settings.SERVER_FORWARDED_ALLOW_IPS,
+        log_config=None,
+    )
+    # Older uvicorn releases wait for in-flight requests without a limit
+    if "timeout_graceful_shutdown" in inspect.signature(uvicorn.Config).parameters:
+        options["timeout_graceful_shutdown"] = settings.SERVER_GRACEFUL_TIMEOUT
+    return uvicorn.Config(app, **options)
+
+
+def _configure_supervisor_logging() -> None:
+    # Only this module logs synchronously; workers set up queued logging at
+    # startup and would print every record twice through a root handler
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_JSON:
+        handler.setFormatter(JsonFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.propagate = False
+
+
+def _serve(config: uvicorn.Config, sock: socket.socket) -> None:
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _spawn(config: uvicorn.Config, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            _serve(config, sock)
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main() -> None:
+    _configure_supervisor_logging()
+
+    # Preload: import and validate once, workers inherit it copy-on-write
+    from app.main import app
+
+    from app.services.rate_limiter import rate_limiter
+
+    config = build_config(app)
+    workers = settings.SERVER_WORKERS or available_cpus()
+    # Rate limits are counted per worker, give each its share
+    rate_limiter.split(workers)
+    sock = bind_socket(
+        settings.SERVER_HOST, settings.SERVER_PORT, settings.SERVER_BACKLOG
+    )
+    logger.info(
+        "Serving on %s:%d with %d workers (loop=%s, http=%s)",
+        settings.SERVER_HOST,
+        settings.SERVER_PORT,
+        workers,
+        config.loop,
+        config.http,
+    )
+
+    if workers == 1:
+        _serve(config, sock)
+        return
+
+    children: Dict[int, bool] = {}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if stopping:
+            return
+        stopping = True
+        logger.info("Draining %d workers", len(children))
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+        signal.alarm(settings.SERVER_GRACEFUL_TIMEOUT + _KILL_MARGIN)
+
+    def kill(signum, frame):
+        for pid in children:
+            logger.warning("Worker %d did not drain in time, killing it", pid)
+            os.kill(pid, signal.SIGKILL)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGALRM, kill)
+
+    for _ in range(workers):
+        children[_spawn(config, sock)] = True
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.pop(pid, None)
+        if not stopping:
+            logger.warning("Worker %d exited with status %d, restarting", pid, status)
+            children[_spawn(config, sock)] = True
+
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional
+from app.config import settings
+from app.deadline import charge, remaining
+from app.exceptions import DeadlineExceededError, ServiceOverloadedError
+from app.services.metrics import metrics
+from app.timing import current_timer
+
+
+class _Latency:
+    """Smoothed and best recent latency of one kind of work"""
+
+    __slots__ = ("smoothed", "baseline")
+
+    def __init__(self, latency: float):
+        self.smoothed = latency
+        self.baseline = latency
+
+
+class ConcurrencyLimiter:
+    """Caps in-flight work and queues a bounded number of waiters.
+
+    Work beyond ``limit`` waits in a FIFO queue of at most ``max_queue``
+    entries for up to ``queue_timeout`` seconds; anything else is rejected
+    with ``ServiceOverloadedError`` straight away. When ``adaptive`` is set,
+    the limit is revisited once per ``limit`` completions: it shrinks by 10%
+    while smoothed latency exceeds ``tolerance`` times the best latency seen,
+    and grows by one otherwise, staying within ``min_limit``/``max_limit``.
+
+    Latency is tracked per ``tier`` given to ``release``, so fast and slow
+    kinds of work sharing the limiter, such as storage reads and upstream
+    fetches, are each compared with their own baseline rather than the
+    slow ones with the fastest.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int = 0,
+        queue_timeout: float = 1.0,
+        adaptive: bool = False,
+        min_limit: int = 1,
+        max_limit: Optional[int] = None,
+        tolerance: float = 2.0,
+    ):
+        self.name = name
+        self.min_limit = min_limit
+        self.max_limit = max_limit or limit
+        self.limit = max(min_limit, min(limit, self.max_limit))
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self.tolerance = tolerance
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._latency: Optional[float] = None  # Exponentially smoothed, all tiers
+        self._tiers: Dict[str, _Latency] = {}
+        self._completions = 0
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    @property
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, for Retry-After"""
+        if not self._latency:
+            return 1
+        return max(1, math.ceil(self._latency * (self.waiting / self.limit + 1)))
+
+    async def acquire(self, timeout: Optional[float] = None) -> None:
+        """Take a slot, waiting at most ``queue_timeout`` or ``timeout`` if less"""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            self._report()
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._reject()
+
+        wait = (
+            self.queue_timeout if timeout is None else min(timeout, self.queue_timeout)
+        )
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._report()
+        try:
+            # A releasing holder hands its slot over by resolving the future
+            await asyncio.wait_for(asyncio.shield(waiter), wait)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            if wait < self.queue_timeout:
+                # The caller's deadline ran out first, not the queue's patience
+                raise DeadlineExceededError("admission") from None
+            self._reject()
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+    def release(self, latency: Optional[float] = None, tier: str = "other") -> None:
+        if latency is not None and self.adaptive:
+            self._observe(latency, tier)
+        while self._waiters and self.in_flight <= self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self._report()
+                return
+        self.in_flight -= 1
+        self._report()
+
+    def set_limit(self, limit: int) -> None:
+        self.limit = max(self.min_limit, min(limit, self.max_limit))
+        # Admit queued work straight away if the limit went up
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+        self._report()
+
+    @asynccontextmanager
+    async def slot(self):
+        await self.acquire()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.release(time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "latency": self._latency,
+            "tiers": {
+                tier: {
+                    "latency": stats.smoothed,
+                    "baseline": stats.baseline,
+                }
+                for tier, stats in self._tiers.items()
+            },
+        }
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over as we gave up, pass it on
+            self.release()
+        else:
+            waiter.cancel()
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+        self._report()
+
+    def _reject(self) -> None:
+        metrics.incr(f"admission.{self.name}.rejected")
+        raise ServiceOverloadedError(self.retry_after)
+
+    def _observe(self, latency: float, tier: str) -> None:
+        if self._latency is None:
+            self._latency = latency
+        else:
+            self._latency += 0.2 * (latency - self._latency)
+        stats = self._tiers.get(tier)
+        if stats is None:
+            self._tiers[tier] = _Latency(latency)
+        else:
+            stats.smoothed += 0.2 * (latency - stats.smoothed)
+            stats.baseline = min(stats.baseline, latency)
+
+        self._completions += 1
+        if self._completions < self.limit:
+            return
+        self._completions = 0
+        tiers = self._tiers.values()
+        if any(stats.smoothed > stats.baseline * self.tolerance for stats in tiers):
+            self.set_limit(int(self.limit * 0.9))
+        else:
+            self.set_limit(self.limit + 1)
+        # Let baselines drift towards current latency, so a lasting
+        # slowdown upstream is eventually accepted as the new normal
+        for stats in tiers:
+            stats.baseline += 0.05 * (stats.smoothed - stats.baseline)
+
+    def _report(self) -> None:
+        metrics.gauge(f"admission.{self.name}.limit", self.limit)
+        metrics.gauge(f"admission.{self.name}.in_flight", self.in_flight)
+        metrics.gauge(f"admission.{self.name}.waiting", len(self._waiters))
+
+
+class _Ticket:
+    """A request's hold on a hit-path slot, given up if it turns into a miss"""
+
+    __slots__ = ("limiter", "released")
+
+    def __init__(self, limiter: ConcurrencyLimiter):
+        self.limiter = limiter
+        self.released = False
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.limiter.release()
+
+
+_ticket: ContextVar[Optional[_Ticket]] = ContextVar("admission_ticket", default=None)
+
+
+class AdmissionController:
+    """Separate limits for cheap cache-hit requests and miss-path work.
+
+    Every request takes a hit-path slot on arrival. A request that has to go
+    to storage or upstream trades it for a miss-path slot, so slow misses can
+    never use up the capacity that keeps cache hits fast.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        hit_limit: int = 512,
+        miss_limit: int = 32,
+        miss_min_limit: int = 4,
+        miss_max_limit: int = 128,
+        miss_queue: int = 64,
+        queue_timeout: float = 2.0,
+        tolerance: float = 2.0,
+    ):
+        self.enabled = enabled
+        self.hits = ConcurrencyLimiter("hit", hit_limit)
+        self.misses = ConcurrencyLimiter(
+            "miss",
+            miss_limit,
+            max_queue=miss_queue,
+            queue_timeout=queue_timeout,
+            adaptive=True,
+            min_limit=miss_min_limit,
+            max_limit=miss_max_limit,
+            tolerance=tolerance,
+        )
+
+    @asynccontextmanager
+    async def request(self):
+        """Hold a hit-path slot for the duration of a request"""
+        if not self.enabled:
+            yield
+            return
+        await self.hits.acquire()
+        ticket = _Ticket(self.hits)
+        token = _ticket.set(ticket)
+        try:
+            yield
+        finally:
+            _ticket.reset(token)
+            ticket.release()
+
+    @asynccontextmanager
+    async def miss(self):
+        """Hold a miss-path slot, giving back the request's hit-path slot.
+
+        Waiting for the slot counts against the request's deadline, and
+        gives up when the deadline would pass first.
+        """
+        if not self.enabled:
+            yield
+            return
+        ticket = _ticket.get()
+        if ticket is not None:
+            ticket.release()
+        with charge("admission"):
+            await self.misses.acquire(remaining())
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Storage reads and upstream fetches differ in latency by orders
+            # of magnitude, so each is judged against its own baseline
+            self.misses.release(
+                time.perf_counter() - start,
+                getattr(current_timer(), "tier", None) or "other",
+            )
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {"hit": self.hits.snapshot(), "miss": self.misses.snapshot()}
+
+
+admission = AdmissionController(
+    enabled=settings.ADMISSION_ENABLED,
+    hit_limit=settings.ADMISSION_HIT_LIMIT,
+    miss_limit=settings.ADMISSION_MISS_LIMIT,
+    miss_min_limit=settings.ADMISSION_MISS_MIN_LIMIT,
+    miss_max_limit=settings.ADMISSION_MISS_MAX_LIMIT,
+    miss_queue=settings.ADMISSION_MISS_QUEUE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    tolerance=settings.ADMISSION_LATENCY_TOLERANCE,
+)
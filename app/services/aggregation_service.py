@@ -0,0 +1,201 @@
+from array import array
+from collections import OrderedDict
+from math import fsum, isnan, nan
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SECTIONS = ("hourly", "daily")
+
+# Numeric columns extracted from each section. Values are either a top-level
+# key of the OneCall entry or a (key, subkey) path into a nested dict.
+SECTION_COLUMNS = {
+    "hourly": {
+        "temp": "temp",
+        "feels_like": "feels_like",
+        "pressure": "pressure",
+        "humidity": "humidity",
+        "wind_speed": "wind_speed",
+        "pop": "pop",
+    },
+    "daily": {
+        "temp": ("temp", "day"),
+        "temp_min": ("temp", "min"),
+        "temp_max": ("temp", "max"),
+        "pressure": "pressure",
+        "humidity": "humidity",
+        "wind_speed": "wind_speed",
+        "pop": "pop",
+    },
+}
+
+
+def _value(entry: Dict[str, Any], path) -> float:
+    """The value at ``path``, or NaN when the entry lacks it"""
+    if isinstance(path, tuple):
+        nested = entry.get(path[0])
+        value = nested.get(path[1]) if isinstance(nested, dict) else None
+    else:
+        value = entry.get(path)
+    return float(value) if value is not None else nan
+
+
+def _present(values: Iterable[float]) -> List[float]:
+    return [value for value in values if not isnan(value)]
+
+
+def _precipitation(entry: Dict[str, Any]) -> float:
+    """Rain plus snow; hourly entries nest it under "1h", daily ones do not.
+
+    OneCall leaves both out when nothing falls, so a missing value is 0.
+    """
+    total = 0.0
+    for kind in ("rain", "snow"):
+        value = entry.get(kind)
+        if isinstance(value, dict):
+            value = value.get("1h")
+        if value is not None:
+            total += float(value)
+    return total
+
+
+class ForecastArrays:
+    """Column-oriented view of a OneCall ``hourly`` or ``daily`` section.
+
+    Values an entry lacks are NaN, so gaps are skipped rather than counted
+    as zero; precipitation is the exception.
+    """
+
+    __slots__ = ("dt", "columns")
+
+    def __init__(self, section: str, entries: List[Dict[str, Any]]):
+        self.dt = array("q", (int(entry.get("dt", 0)) for entry in entries))
+        self.columns: Dict[str, array] = {
+            name: array("d", (_value(entry, path) for entry in entries))
+            for name, path in SECTION_COLUMNS[section].items()
+        }
+        self.columns["precipitation"] = array(
+            "d", (_precipitation(entry) for entry in entries)
+        )
+
+    def __len__(self) -> int:
+        return len(self.dt)
+
+
+class AggregationService:
+    """Computes summaries over forecast sections, reusing typed arrays per entry."""
+
+    def __init__(self, max_entries: int = 1024):
+        self._arrays: "OrderedDict[str, Tuple[Any, Dict[str, ForecastArrays]]]" = (
+            OrderedDict()
+        )
+        self.max_entries = max_entries
+
+    def get_arrays(
+        self, cache_key: str, forecast: Dict[str, Any], section: str
+    ) -> ForecastArrays:
+        """Return typed arrays for ``section``, converting at most once per entry.
+
+        Arrays are tied to the identity of the cached payload, so a refreshed
+        cache entry is converted again while repeated queries reuse the result.
+        The payload is held until ``forget`` drops the key, which the cache's
+        removal hook does.
+        """
+        entry = self._arrays.get(cache_key)
+        if entry is None or entry[0] is not forecast:
+            entry = (forecast, {})
+            self._arrays[cache_key] = entry
+            if len(self._arrays) > self.max_entries:
+                self._arrays.popitem(last=False)
+        else:
+            self._arrays.move_to_end(cache_key)
+        sections = entry[1]
+        if section not in sections:
+            sections[section] = ForecastArrays(section, forecast.get(section) or [])
+        return sections[section]
+
+    def aggregate(
+        self,
+        cache_key: str,
+        forecast: Dict[str, Any],
+        section: str = "hourly",
+        field: str = "temp",
+        threshold: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        arrays = self.get_arrays(cache_key, forecast, section)
+        if field not in arrays.columns:
+            raise ValueError(f"Unknown field for {section}: {field}")
+
+        summary: Dict[str, Any] = {
+            "section": section,
+            "count": len(arrays),
+            "start": arrays.dt[0] if len(arrays) else None,
+            "end": arrays.dt[-1] if len(arrays) else None,
+            "temperature": None,
+            "precipitation": {"total": round(fsum(arrays.columns["precipitation"]), 2)},
+        }
+        temp = _present(arrays.columns["temp"])
+        if temp:
+            low = _present(arrays.columns.get("temp_min", ())) or temp
+            high = _present(arrays.columns.get("temp_max", ())) or temp
+            summary["temperature"] = {
+                "min": min(low),
+                "max": max(high),
+                "mean": round(fsum(temp) / len(temp), 2),
+            }
+        if threshold is not None:
+            summary["windows"] = {
+                "field": field,
+                "threshold": threshold,
+                "above": self._windows_above(arrays, field, threshold),
+            }
+        return summary
+
+    @staticmethod
+    def _windows_above(
+        arrays: ForecastArrays, field: str, threshold: float
+    ) -> List[Dict[str, int]]:
+        """Contiguous runs where ``field`` is strictly above ``threshold``.
+
+        A missing value is not above it, so a gap ends a run.
+        """
+        windows = []
+        start = None
+        values = arrays.columns[field]
+        for index, value in enumerate(values):
+            if value > threshold:
+                if start is None:
+                    start = index
+            elif start is not None:
+                windows.append(
+                    {
+                        "start": arrays.dt[start],
+                        "end": arrays.dt[index - 1],
+                        "count": index - start,
+                    }
+                )
+                start = None
+        if start is not None:
+            windows.append(
+                {
+                    "start": arrays.dt[start],
+                    "end": arrays.dt[-1],
+                    "count": len(values) - start,
+                }
+            )
+        return windows
+
+    def forget(self, cache_key: str) -> None:
+        """Drop the arrays converted from ``cache_key``"""
+        self._arrays.pop(cache_key, None)
+
+    def prune(self, keep: Callable[[str], bool]) -> int:
+        """Forget the cache keys ``keep`` rejects, returning how many went"""
+        dead = [key for key in self._arrays if not keep(key)]
+        for key in dead:
+            del self._arrays[key]
+        return len(dead)
+
+    def clear(self) -> None:
+        self._arrays.clear()
+
+    def __len__(self) -> int:
+        return len(self._arrays)
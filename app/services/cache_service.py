@@ -1,42 +1,236 @@
+import os
 from datetime import datetime, timedelta, UTC
-from typing import Dict, Optional, Any
+from typing import Callable, Dict, List, Optional, Any, Tuple
+from app.config import settings
+from app.services.cache_snapshot import SnapshotReader, write_snapshot
+from app.services.metrics import metrics
+
+
+class NegativeEntry:
+    """A remembered upstream failure for a cache key"""
+
+    __slots__ = ("kind", "expires_at", "retry_after")
+
+    def __init__(self, kind: str, expires_at: float, retry_after: Optional[int]):
+        self.kind = kind
+        self.expires_at = expires_at
+        self.retry_after = retry_after
+
+    def remaining(self, now: float) -> int:
+        return max(1, int(self.expires_at - now + 0.999))
 
 
 class WeatherCache:
-    def __init__(self, ttl_seconds: int = 300):
+    def __init__(self, ttl_seconds: int = 300, stale_seconds: int = 0):
         self._cache: Dict[str, tuple[Any, datetime]] = {}
         self.ttl = timedelta(seconds=ttl_seconds)
+        # Expired entries are kept this much longer for ``get_stale``
+        self.stale = timedelta(seconds=stale_seconds)
+        # Per-key TTLs set by ``set``, for keys that differ from the default
+        self._ttls: Dict[str, timedelta] = {}
+        self._snapshot: Optional[SnapshotReader] = None
+        # Failures are kept apart so they can never be served as data
+        self._negative: Dict[str, NegativeEntry] = {}
+        # Called with every key that leaves the cache, so indexes over its
+        # keys stay in step with it
+        self.on_remove: Optional[Callable[[str], None]] = None
 
     def get(self, cache_key: str) -> Optional[Any]:
         if cache_key not in self._cache:
+            if self._snapshot is not None:
+                return self._get_from_snapshot(cache_key)
             return None
 
         data, timestamp = self._cache[cache_key]
-        if datetime.now(UTC) - timestamp > self.ttl:
-            del self._cache[cache_key]
+        age = datetime.now(UTC) - timestamp
+        ttl = self._ttls.get(cache_key, self.ttl)
+        if age > ttl:
+            if age > ttl + self.stale:
+                self._remove(cache_key)
+            return None
+
+        return data
+
+    def remaining_ttl(self, cache_key: str) -> Optional[float]:
+        """Seconds until a fresh entry expires, None when there is none"""
+        entry = self._cache.get(cache_key)
+        if entry is None:
             return None
+        expires = entry[1] + self._ttls.get(cache_key, self.ttl)
+        remaining = (expires - datetime.now(UTC)).total_seconds()
+        return remaining if remaining > 0 else None
 
+    def get_stale(self, cache_key: str) -> Optional[Any]:
+        """Return an entry up to ``stale_seconds`` past its TTL, as a fallback
+        for requests that cannot wait for fresh data"""
+        entry = self._cache.get(cache_key)
+        if entry is None:
+            return None
+        data, timestamp = entry
+        if (
+            datetime.now(UTC) - timestamp
+            > self._ttls.get(cache_key, self.ttl) + self.stale
+        ):
+            return None
         return data
 
-    def set(self, cache_key: str, data: Any) -> None:
+    def set(
+        self, cache_key: str, data: Any, ttl_seconds: Optional[float] = None
+    ) -> None:
+        """Cache ``data`` for ``ttl_seconds``, or the cache's TTL when None"""
         self._cache[cache_key] = (data, datetime.now(UTC))
+        if ttl_seconds is None:
+            self._ttls.pop(cache_key, None)
+        else:
+            self._ttls[cache_key] = timedelta(seconds=ttl_seconds)
+        if self._snapshot is not None:
+            self._snapshot.discard(cache_key)
+        # Fresh data supersedes any remembered failure
+        if self._negative.pop(cache_key, None) is not None:
+            metrics.incr("cache.negative_cleared")
+
+    def get_negative(self, cache_key: str) -> Optional[NegativeEntry]:
+        """Return the remembered upstream failure for a key, if still active"""
+        entry = self._negative.get(cache_key)
+        if entry is None:
+            return None
+        if datetime.now(UTC).timestamp() >= entry.expires_at:
+            del self._negative[cache_key]
+            return None
+        metrics.incr(f"cache.negative_hit.{entry.kind}")
+        return entry
+
+    def set_negative(
+        self,
+        cache_key: str,
+        kind: str,
+        ttl_seconds: float,
+        retry_after: Optional[int] = None,
+    ) -> None:
+        """Remember an upstream failure for ``ttl_seconds``"""
+        expires_at = datetime.now(UTC).timestamp() + ttl_seconds
+        self._negative[cache_key] = NegativeEntry(kind, expires_at, retry_after)
+        metrics.incr(f"cache.negative_set.{kind}")
 
     def invalidate(self, cache_key: str) -> None:
         """Remove specific key from cache"""
-        if cache_key in self._cache:
-            del self._cache[cache_key]
+        self._remove(cache_key)
+        if self._snapshot is not None and cache_key in self._snapshot.index:
+            self._snapshot.discard(cache_key)
+            self._notify_removed(cache_key)
+        self._negative.pop(cache_key, None)
 
     def clear(self) -> None:
         """Remove all entries from cache"""
+        if self.on_remove is not None:
+            for key in self.keys():
+                self.on_remove(key)
         self._cache.clear()
+        self._ttls.clear()
+        self._negative.clear()
+        self._close_snapshot()
 
     def cleanup_expired(self) -> None:
-        """Remove all expired entries from cache"""
+        """Remove all entries past their TTL and stale period from cache"""
         current_time = datetime.now(UTC)
         expired_keys = [
             key
             for key, (_, timestamp) in self._cache.items()
-            if current_time - timestamp > self.ttl
+            if current_time - timestamp > self._ttls.get(key, self.ttl) + self.stale
         ]
         for key in expired_keys:
-            del self._cache[key]
+            self._remove(key)
+
+        now = current_time.timestamp()
+        if self._snapshot is not None:
+            # Snapshot entries are stored with their expiry, never re-checked
+            # until asked for
+            for key in [k for k, e in self._snapshot.index.items() if e[3] <= now]:
+                self._snapshot.discard(key)
+                self._notify_removed(key)
+        for key in [k for k, e in self._negative.items() if e.expires_at <= now]:
+            del self._negative[key]
+
+    def keys(self) -> List[str]:
+        """Keys held in memory or waiting in a loaded snapshot"""
+        keys = list(self._cache)
+        if self._snapshot is not None:
+            keys.extend(key for key in self._snapshot.index if key not in self._cache)
+        return keys
+
+    def snapshot_records(self) -> List[Tuple[str, Any, float]]:
+        """Unexpired entries as ``(key, value, expires_at)`` for a snapshot"""
+        current_time = datetime.now(UTC)
+        records = []
+        for key, (data, timestamp) in self._cache.items():
+            expires = timestamp + self._ttls.get(key, self.ttl)
+            if current_time <= expires:
+                records.append((key, data, expires.timestamp()))
+        if self._snapshot is not None:
+            # Entries loaded at startup but not requested since are kept too
+            now = current_time.timestamp()
+            for key, (_, _, _, expires_at) in self._snapshot.index.items():
+                if expires_at > now and key not in self._cache:
+                    records.append((key, *self._snapshot.peek(key)))
+        return records
+
+    def save_snapshot(self, path: str) -> int:
+        """Write unexpired entries with their expiry time to ``path``"""
+        return write_snapshot(path, self.snapshot_records())
+
+    def load_snapshot(self, path: str) -> int:
+        """Map a snapshot written by ``save_snapshot``; entries load on first get"""
+        if not os.path.exists(path):
+            return 0
+        self._close_snapshot()
+        self._snapshot = SnapshotReader(path)
+        return len(self._snapshot)
+
+    def _get_from_snapshot(self, cache_key: str) -> Optional[Any]:
+        entry = self._snapshot.pop(cache_key)
+        if not self._snapshot:
+            self._close_snapshot()
+        if entry is None:
+            return None
+
+        data, expires_at = entry
+        expires = datetime.fromtimestamp(expires_at, UTC)
+        if datetime.now(UTC) > expires:
+            self._notify_removed(cache_key)
+            return None
+        # Backdate the entry so it keeps the TTL it had when it was saved
+        self._cache[cache_key] = (data, expires - self.ttl)
+        return data
+
+    def _remove(self, cache_key: str) -> None:
+        self._ttls.pop(cache_key, None)
+        if self._cache.pop(cache_key, None) is not None:
+            self._notify_removed(cache_key)
+
+    def _notify_removed(self, cache_key: str) -> None:
+        if self.on_remove is not None:
+            self.on_remove(cache_key)
+
+    def _close_snapshot(self) -> None:
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+
+def create_weather_cache():
+    """Build the cache backend selected by ``settings.CACHE_BACKEND``"""
+    if settings.CACHE_BACKEND == "shared":
+        # Imported lazily, it relies on POSIX-only modules
+        from app.services.shared_cache import SharedMemoryCache
+
+        return SharedMemoryCache(
+            settings.SHARED_CACHE_PATH,
+            ttl_seconds=settings.CACHE_TTL_SECONDS,
+            slots=settings.SHARED_CACHE_SLOTS,
+            slot_size=settings.SHARED_CACHE_SLOT_SIZE,
+            stale_seconds=settings.CACHE_STALE_SECONDS,
+        )
+    return WeatherCache(
+        ttl_seconds=settings.CACHE_TTL_SECONDS,
+        stale_seconds=settings.CACHE_STALE_SECONDS,
+    )
@@ -0,0 +1,129 @@
+import mmap
+import os
+import struct
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Optional, Tuple
+from app.models.forecast import RawForecast, dumps, loads
+
+_MAGIC = b"WXS1"
+_HEADER = struct.Struct("<4sdI")  # magic, written at, record count
+# key length, value kind, expires at (wall clock), value length
+_RECORD = struct.Struct("<HBdI")
+
+_KIND_RAW = 1  # RawForecast body
+_KIND_JSON = 2  # Any other JSON-serialisable value
+
+
+def write_snapshot(path: str, records: Iterable[Tuple[str, Any, float]]) -> int:
+    """Write ``(key, value, expires_at)`` records and return how many were saved.
+
+    The file is written next to ``path`` and renamed over it, so readers never
+    see a partial snapshot. Each writer gets its own temporary file, since
+    every worker of a server may save to the same path.
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path) or ".", prefix=f"{os.path.basename(path)}."
+    )
+    try:
+        count = _write_records(fd, records)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+def _write_records(fd: int, records: Iterable[Tuple[str, Any, float]]) -> int:
+    count = 0
+    with open(fd, "wb") as snapshot:
+        snapshot.write(_HEADER.pack(_MAGIC, time.time(), 0))
+        for key, value, expires_at in records:
+            if isinstance(value, RawForecast):
+                kind, body = _KIND_RAW, value.body
+            else:
+                kind, body = _KIND_JSON, dumps(value)
+            encoded_key = key.encode("utf-8")
+            snapshot.write(_RECORD.pack(len(encoded_key), kind, expires_at, len(body)))
+            snapshot.write(encoded_key)
+            snapshot.write(body)
+            count += 1
+        snapshot.seek(0)
+        snapshot.write(_HEADER.pack(_MAGIC, time.time(), count))
+    return count
+
+
+class SnapshotReader:
+    """Memory-maps a snapshot and decodes values only when they are asked for.
+
+    Opening scans the record headers to build a key index, skipping entries
+    that have already expired; value bytes stay in the page cache until read.
+    """
+
+    def __init__(self, path: str, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        self.index: Dict[str, Tuple[int, int, int, float]] = {}
+        self._file = open(path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self._file.close()
+            raise ValueError(f"Empty cache snapshot: {path}")
+
+        try:
+            self._scan(path, now)
+        except ValueError:
+            self.close()
+            raise
+
+    def _scan(self, path: str, now: float) -> None:
+        size = len(self._mmap)
+        if size < _HEADER.size:
+            raise ValueError(f"Truncated cache snapshot: {path}")
+        magic, _, count = _HEADER.unpack_from(self._mmap, 0)
+        if magic != _MAGIC:
+            raise ValueError(f"Not a cache snapshot: {path}")
+
+        offset = _HEADER.size
+        for _ in range(count):
+            if offset + _RECORD.size > size:
+                raise ValueError(f"Truncated cache snapshot: {path}")
+            key_len, kind, expires_at, value_len = _RECORD.unpack_from(
+                self._mmap, offset
+            )
+            key_start = offset + _RECORD.size
+            value_start = key_start + key_len
+            offset = value_start + value_len
+            if offset > size:
+                raise ValueError(f"Truncated cache snapshot: {path}")
+            if expires_at > now:
+                # A bad key raises UnicodeDecodeError, itself a ValueError
+                key = self._mmap[key_start:value_start].decode("utf-8")
+                self.index[key] = (value_start, value_len, kind, expires_at)
+
+    def peek(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Decode the value for ``key`` with its expiry time"""
+        entry = self.index.get(key)
+        if entry is None:
+            return None
+        start, length, kind, expires_at = entry
+        body = self._mmap[start : start + length]
+        value = RawForecast(body) if kind == _KIND_RAW else loads(body)
+        return value, expires_at
+
+    def pop(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Decode and forget the value for ``key``, with its expiry time"""
+        entry = self.peek(key)
+        self.index.pop(key, None)
+        return entry
+
+    def discard(self, key: str) -> None:
+        self.index.pop(key, None)
+
+    def close(self) -> None:
+        self.index.clear()
+        self._mmap.close()
+        self._file.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
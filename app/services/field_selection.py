@@ -0,0 +1,141 @@
+import re
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+from app.models.forecast import dumps
+
+_SEGMENT = re.compile(r"^[A-Za-z0-9_]+(\[\])?$")
+
+# A selection tree: each key maps to the selection below it, or None to keep
+# the whole value
+Tree = Dict[str, Optional["Tree"]]
+
+
+def _merge(tree: Tree, segments) -> None:
+    key, rest = segments[0], segments[1:]
+    if key in tree and tree[key] is None:
+        return  # Already selected whole
+    if not rest:
+        tree[key] = None
+        return
+    _merge(tree.setdefault(key, {}), rest)
+
+
+def _select(value: Any, tree: Tree) -> Any:
+    if isinstance(value, list):
+        # Arrays are selected element-wise, so "hourly.pop" == "hourly[].pop"
+        return [_select(item, tree) for item in value]
+    if not isinstance(value, dict):
+        return value
+    selected = {}
+    for key, subtree in tree.items():
+        if key in value:
+            # Untouched values are shared with the cached document, not copied
+            selected[key] = (
+                value[key] if subtree is None else _select(value[key], subtree)
+            )
+    return selected
+
+
+class Selector:
+    """A compiled ``fields=`` expression such as ``current.temp,hourly[].pop``"""
+
+    __slots__ = ("expression", "tree")
+
+    def __init__(self, expression: str, tree: Tree):
+        self.expression = expression
+        self.tree = tree
+
+    def apply(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        return _select(document, self.tree)
+
+
+class FieldSelectionService:
+    """Compiles field selectors once per expression and caches the encoded
+    subsets they produce per forecast.
+
+    Subsets are tied to the identity of the cached payload, like
+    AggregationService arrays, so a refreshed forecast is selected again.
+    They hold that payload, so ``forget`` should drop a key's subsets when
+    the cache lets the key go.
+    """
+
+    def __init__(
+        self, max_paths: int = 32, max_selectors: int = 256, max_subsets: int = 4096
+    ):
+        self.max_paths = max_paths
+        self.max_selectors = max_selectors
+        self.max_subsets = max_subsets
+        self._selectors: "OrderedDict[str, Selector]" = OrderedDict()
+        self._subsets: "OrderedDict[Tuple[str, str], Tuple[Any, bytes]]" = OrderedDict()
+        # Expressions with a cached subset, per cache key
+        self._expressions: Dict[str, Set[str]] = {}
+
+    def compile(self, expression: str) -> Selector:
+        """Parse ``expression``, raising ValueError when it is malformed"""
+        selector = self._selectors.get(expression)
+        if selector is not None:
+            self._selectors.move_to_end(expression)
+            return selector
+
+        paths = sorted({path.strip() for path in expression.split(",")} - {""})
+        if not paths:
+            raise ValueError("fields must name at least one field")
+        if len(paths) > self.max_paths:
+            raise ValueError(f"fields may name at most {self.max_paths} paths")
+        tree: Tree = {}
+        for path in paths:
+            segments = path.split(".")
+            for segment in segments:
+                if not _SEGMENT.match(segment):
+                    raise ValueError(f"Invalid field path: {path}")
+            _merge(tree, [segment.removesuffix("[]") for segment in segments])
+
+        # Equivalent expressions share one normalised selector
+        selector = Selector(",".join(paths), tree)
+        self._selectors[expression] = selector
+        if len(self._selectors) > self.max_selectors:
+            self._selectors.popitem(last=False)
+        return selector
+
+    def select(
+        self,
+        cache_key: str,
+        forecast: Any,
+        document: Dict[str, Any],
+        selector: Selector,
+    ) -> bytes:
+        """Encoded subset of ``document``, the parsed view of ``forecast``"""
+        key = (cache_key, selector.expression)
+        entry = self._subsets.get(key)
+        if entry is not None and entry[0] is forecast:
+            self._subsets.move_to_end(key)
+            return entry[1]
+
+        body = dumps(selector.apply(document))
+        self._subsets[key] = (forecast, body)
+        self._expressions.setdefault(cache_key, set()).add(selector.expression)
+        if len(self._subsets) > self.max_subsets:
+            (old_key, expression), _ = self._subsets.popitem(last=False)
+            self._unindex(old_key, expression)
+        return body
+
+    def forget(self, cache_key: str) -> None:
+        """Drop the subsets selected from ``cache_key``"""
+        for expression in self._expressions.pop(cache_key, ()):
+            del self._subsets[(cache_key, expression)]
+
+    def prune(self, keep: Callable[[str], bool]) -> int:
+        """Forget the cache keys ``keep`` rejects, returning how many went"""
+        dead = [key for key in self._expressions if not keep(key)]
+        for key in dead:
+            self.forget(key)
+        return len(dead)
+
+    def _unindex(self, cache_key: str, expression: str) -> None:
+        expressions = self._expressions[cache_key]
+        expressions.discard(expression)
+        if not expressions:
+            del self._expressions[cache_key]
+
+    def __len__(self) -> int:
+        return len(self._subsets)
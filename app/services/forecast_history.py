@@ -0,0 +1,201 @@
+import hashlib
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+from app.models.forecast import dumps, loads
+from app.services.metrics import metrics
+
+# A JSON Patch (RFC 6902) operation, limited to add, remove and replace
+Operation = Dict[str, Any]
+
+
+def _escape(token: Any) -> str:
+    return str(token).replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _is_timeline(items: List[Any]) -> bool:
+    return bool(items) and all(
+        isinstance(item, dict) and "dt" in item for item in items
+    )
+
+
+def diff(old: Any, new: Any, path: str = "") -> List[Operation]:
+    """JSON Patch operations turning ``old`` into ``new``"""
+    if type(old) is not type(new):
+        return [{"op": "replace", "path": path, "value": new}]
+    if isinstance(old, dict):
+        ops = [
+            {"op": "remove", "path": f"{path}/{_escape(key)}"}
+            for key in old
+            if key not in new
+        ]
+        for key, value in new.items():
+            if key not in old:
+                ops.append(
+                    {"op": "add", "path": f"{path}/{_escape(key)}", "value": value}
+                )
+            elif old[key] != value:
+                ops.extend(diff(old[key], value, f"{path}/{_escape(key)}"))
+        return ops
+    if isinstance(old, list):
+        return _diff_list(old, new, path)
+    if old != new:
+        return [{"op": "replace", "path": path, "value": new}]
+    return []
+
+
+def _diff_list(old: List[Any], new: List[Any], path: str) -> List[Operation]:
+    ops: List[Operation] = []
+    # Hourly and daily entries roll forward between refreshes: drop the ones
+    # that fell off the front so the rest line up on the same timestamps
+    if _is_timeline(old) and _is_timeline(new):
+        expired = 0
+        while expired < len(old) and old[expired]["dt"] < new[0]["dt"]:
+            expired += 1
+        ops.extend({"op": "remove", "path": f"{path}/0"} for _ in range(expired))
+        old = old[expired:]
+
+    common = min(len(old), len(new))
+    for i in range(common):
+        if old[i] != new[i]:
+            ops.extend(diff(old[i], new[i], f"{path}/{i}"))
+    ops.extend(
+        {"op": "remove", "path": f"{path}/{i}"}
+        for i in range(len(old) - 1, common - 1, -1)
+    )
+    ops.extend(
+        {"op": "add", "path": f"{path}/-", "value": item} for item in new[common:]
+    )
+    return ops
+
+
+def apply_patch(document: Any, ops: List[Operation]) -> Any:
+    """A patched copy of ``document``, which is left untouched"""
+    document = loads(dumps(document))
+    for op in ops:
+        if op["path"] == "":
+            document = op["value"]
+            continue
+        tokens = [_unescape(token) for token in op["path"].split("/")[1:]]
+        target = document
+        for token in tokens[:-1]:
+            target = target[int(token)] if isinstance(target, list) else target[token]
+        last = tokens[-1]
+        if isinstance(target, list):
+            if op["op"] == "remove":
+                del target[int(last)]
+            elif op["op"] == "add":
+                if last == "-":
+                    target.append(op["value"])
+                else:
+                    target.insert(int(last), op["value"])
+            else:
+                target[int(last)] = op["value"]
+        elif op["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = op["value"]
+    return document
+
+
+def version_of(body: bytes) -> str:
+    """Content-derived version, so every worker names a forecast the same way"""
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+class _History:
+    __slots__ = ("version", "body", "older", "patches")
+
+    def __init__(self, version: str, body: bytes, max_versions: int):
+        self.version = version
+        self.body = body
+        # (version, ops turning the next newer version back into it), newest first
+        self.older: Deque[Tuple[str, List[Operation]]] = deque(maxlen=max_versions - 1)
+        # Encoded patches from an older version to the current one
+        self.patches: Dict[str, bytes] = {}
+
+
+class ForecastHistory:
+    """Recent versions of each cached forecast, kept as reverse deltas.
+
+    Only the newest body is held in full, normally the cached one itself;
+    each older version is the list of operations that rebuilds it from its
+    successor. That is enough to answer "what changed since version X" with
+    one patch computed straight from X to the current version, which is then
+    reused until the forecast changes.
+
+    Histories are grouped by cache key, one per ``variant`` such as a field
+    selection, and should be dropped with ``forget`` when the cache lets
+    the key go.
+    """
+
+    def __init__(self, max_versions: int = 8, max_locations: int = 10000):
+        self.max_versions = max_versions
+        self.max_locations = max_locations
+        self._entries: "OrderedDict[str, Dict[str, _History]]" = OrderedDict()
+
+    def record(self, cache_key: str, body: bytes, variant: str = "") -> str:
+        """Note the body served for ``cache_key`` and return its version"""
+        variants = self._entries.get(cache_key)
+        if variants is None:
+            variants = self._entries[cache_key] = {}
+            if len(self._entries) > self.max_locations:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(cache_key)
+        entry = variants.get(variant)
+        if entry is not None and entry.body is body:
+            return entry.version
+
+        version = version_of(body)
+        if entry is None:
+            variants[variant] = _History(version, body, self.max_versions)
+            return version
+        if version == entry.version:
+            # Same content under a new object, e.g. reloaded from storage
+            entry.body = body
+            return version
+
+        entry.older.appendleft((entry.version, diff(loads(body), loads(entry.body))))
+        entry.version = version
+        entry.body = body
+        entry.patches.clear()
+        metrics.incr("forecast_history.versions")
+        return version
+
+    def patch(self, cache_key: str, since: str, variant: str = "") -> Optional[bytes]:
+        """Encoded JSON Patch from version ``since`` to the current one, or
+        None when ``since`` is not in the history"""
+        entry = self._entries.get(cache_key, {}).get(variant)
+        if entry is None:
+            return None
+        encoded = entry.patches.get(since)
+        if encoded is not None:
+            return encoded
+
+        current = loads(entry.body)
+        document = current
+        for version, ops in entry.older:
+            document = apply_patch(document, ops)
+            if version == since:
+                encoded = dumps(diff(document, current))
+                entry.patches[since] = encoded
+                return encoded
+        return None
+
+    def forget(self, cache_key: str) -> None:
+        """Drop every history of ``cache_key``"""
+        self._entries.pop(cache_key, None)
+
+    def prune(self, keep: Callable[[str], bool]) -> int:
+        """Forget the keys ``keep`` rejects, returning how many went"""
+        dead = [key for key in self._entries if not keep(key)]
+        for key in dead:
+            del self._entries[key]
+        return len(dead)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,114 @@
+import math
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Forecast sections whose numeric fields are interpolated, everything else
+# (timezone, alerts, condition descriptions) is taken from the nearest point
+INTERPOLATED_SECTIONS = ("current", "minutely", "hourly", "daily")
+
+# A source this close to the target is used as-is rather than weighted
+_EXACT_KM = 0.01
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def surrounds(lat: float, lon: float, points: Sequence[Tuple[float, float]]) -> bool:
+    """Whether the points lie in at least three quadrants around the target,
+    so the result is an interpolation rather than an extrapolation"""
+    quadrants = {
+        (point_lat >= lat, point_lon >= lon) for point_lat, point_lon in points
+    }
+    return len(quadrants) >= 3
+
+
+class InterpolationService:
+    """Inverse-distance weighting of OneCall forecasts from nearby points.
+
+    Hourly, daily and minutely entries are matched on ``dt``, and only
+    timestamps present at every source are kept. Numbers are blended by
+    weight, wind directions with a circular mean, and any other value comes
+    from the nearest source.
+    """
+
+    def __init__(self, power: float = 2.0):
+        self.power = power
+
+    def weights(self, distances: Sequence[float]) -> List[float]:
+        if min(distances) <= _EXACT_KM:
+            return [1.0 if d == min(distances) else 0.0 for d in distances]
+        raw = [1.0 / d**self.power for d in distances]
+        total = sum(raw)
+        return [w / total for w in raw]
+
+    def interpolate(
+        self,
+        lat: float,
+        lon: float,
+        sources: Sequence[Tuple[Dict[str, Any], float]],
+    ) -> Dict[str, Any]:
+        """Blend ``(forecast, distance_km)`` sources, nearest first"""
+        forecasts = [forecast for forecast, _ in sources]
+        weights = self.weights([distance for _, distance in sources])
+
+        result = dict(forecasts[0])
+        for section in INTERPOLATED_SECTIONS:
+            values = [forecast.get(section) for forecast in forecasts]
+            if any(value is None for value in values):
+                result.pop(section, None)
+                continue
+            blended = self._blend(values, weights)
+            if blended is not None:
+                result[section] = blended
+            else:
+                result.pop(section, None)
+
+        result["lat"] = lat
+        result["lon"] = lon
+        return result
+
+    def _blend(self, values: List[Any], weights: List[float], field: str = "") -> Any:
+        nearest = values[0]
+        if all(_is_number(value) for value in values):
+            if field.endswith("_deg"):
+                return self._blend_degrees(values, weights)
+            blended = sum(value * weight for value, weight in zip(values, weights))
+            if all(isinstance(value, int) for value in values):
+                return int(round(blended))
+            return round(blended, 2)
+        if all(isinstance(value, dict) for value in values):
+            return {
+                key: (
+                    self._blend([value[key] for value in values], weights, key)
+                    if all(key in value for value in values)
+                    else item
+                )
+                for key, item in nearest.items()
+            }
+        if all(isinstance(value, list) for value in values) and _is_series(nearest):
+            return self._blend_series(values, weights)
+        return nearest
+
+    def _blend_series(
+        self, series: List[List[Dict[str, Any]]], weights: List[float]
+    ) -> Optional[List[Dict[str, Any]]]:
+        by_dt = [{entry.get("dt"): entry for entry in entries} for entries in series]
+        blended = []
+        for entry in series[0]:
+            dt = entry.get("dt")
+            matches = [lookup.get(dt) for lookup in by_dt]
+            if all(match is not None for match in matches):
+                blended.append(self._blend(matches, weights))
+        return blended or None
+
+    @staticmethod
+    def _blend_degrees(values: List[float], weights: List[float]) -> int:
+        x = sum(math.cos(math.radians(v)) * w for v, w in zip(values, weights))
+        y = sum(math.sin(math.radians(v)) * w for v, w in zip(values, weights))
+        return int(round(math.degrees(math.atan2(y, x)))) % 360
+
+
+def _is_series(value: List[Any]) -> bool:
+    return bool(value) and all(
+        isinstance(entry, dict) and "dt" in entry for entry in value
+    )
@@ -0,0 +1,153 @@
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from app.config import settings
+from app.exceptions import RateLimitedError
+from app.services.metrics import metrics
+
+# Tiers that cost storage reads or upstream quota, charged at the miss cost
+MISS_TIERS = ("storage", "upstream")
+
+# Route name used for paths without a route-specific limit
+DEFAULT_ROUTE = "*"
+
+
+class _Window:
+    """Request cost in the current and previous fixed windows of one client"""
+
+    __slots__ = ("index", "current", "previous")
+
+    def __init__(self, index: int):
+        self.index = index  # Which fixed window ``current`` counts
+        self.current = 0.0
+        self.previous = 0.0
+
+
+class SlidingWindowLimiter:
+    """Per-client request budgets over a sliding ``window``.
+
+    Each client and route keeps two counters, for the current and previous
+    fixed windows. The sliding total is the current count plus the part of
+    the previous count still inside the window, which is exact enough for
+    rate limiting and costs O(1) time and three numbers per client.
+
+    Clients are kept in least-recently-seen order. Idle clients, whose
+    counters can no longer affect a decision, are evicted from the front as
+    new requests arrive, as is anything beyond ``max_clients``.
+    """
+
+    def __init__(
+        self,
+        default_limit: float,
+        window: float = 60.0,
+        routes: Optional[Dict[str, float]] = None,
+        max_clients: int = 100_000,
+    ):
+        self.default_limit = default_limit
+        self.window = window
+        self.max_clients = max_clients
+        # Longest prefix first, so the most specific route wins
+        self.routes = sorted((routes or {}).items(), key=lambda item: -len(item[0]))
+        self._windows: "OrderedDict[Tuple[str, str], _Window]" = OrderedDict()
+
+    def route_for(self, path: str) -> Tuple[str, float]:
+        for prefix, limit in self.routes:
+            if path.startswith(prefix):
+                return prefix, limit
+        return DEFAULT_ROUTE, self.default_limit
+
+    def _window(self, key: Tuple[str, str], now: float) -> _Window:
+        index = int(now // self.window)
+        window = self._windows.get(key)
+        if window is None:
+            window = _Window(index)
+            self._windows[key] = window
+        else:
+            self._windows.move_to_end(key)
+            if index != window.index:
+                # Roll forward; a gap of more than one window forgets everything
+                window.previous = window.current if index == window.index + 1 else 0.0
+                window.current = 0.0
+                window.index = index
+        self._evict(now)
+        return window
+
+    def _evict(self, now: float) -> None:
+        while self._windows:
+            key, oldest = next(iter(self._windows.items()))
+            idle = (oldest.index + 2) * self.window <= now
+            if not idle and len(self._windows) <= self.max_clients:
+                break
+            del self._windows[key]
+            metrics.incr("rate_limit.evicted")
+        metrics.gauge("rate_limit.clients", len(self._windows))
+
+    def _used(self, window: _Window, now: float) -> float:
+        remaining = 1.0 - (now - window.index * self.window) / self.window
+        return window.current + window.previous * remaining
+
+    def _retry_after(self, window: _Window, excess: float, now: float) -> int:
+        """Seconds until ``excess`` of the used budget has slid out"""
+        elapsed = now - window.index * self.window
+        carried = window.previous * (1.0 - elapsed / self.window)
+        if window.previous and carried >= excess:
+            wait = excess * self.window / window.previous
+        else:
+            # Wait for the next window, where this window's count decays
+            wait = self.window - elapsed
+            left = excess - carried
+            if window.current:
+                wait += min(self.window, left * self.window / window.current)
+        return max(1, math.ceil(wait))
+
+    def acquire(
+        self, client: str, path: str, cost: float, now: Optional[float] = None
+    ) -> str:
+        """Charge ``cost`` to the client's budget for the route serving ``path``.
+
+        Returns the route name, for ``charge``. Raises ``RateLimitedError``
+        with a Retry-After estimate when the budget is spent.
+        """
+        now = time.monotonic() if now is None else now
+        route, limit = self.route_for(path)
+        window = self._window((client, route), now)
+        excess = self._used(window, now) + cost - limit
+        if excess > 0:
+            metrics.incr("rate_limit.rejected")
+            metrics.incr(f"rate_limit.rejected.{route}")
+            raise RateLimitedError(self._retry_after(window, excess, now))
+        window.current += cost
+        return route
+
+    def charge(
+        self, client: str, route: str, cost: float, now: Optional[float] = None
+    ) -> None:
+        """Add ``cost`` once the request's real price is known"""
+        now = time.monotonic() if now is None else now
+        self._window((client, route), now).current += cost
+
+    def split(self, workers: int) -> None:
+        """Share every limit between ``workers`` processes.
+
+        Each pre-forked worker counts only the requests it serves, so without
+        this a client could use ``workers`` times its budget. Connections are
+        spread across workers by the kernel, which makes an even share a close
+        approximation of one limit for the whole server.
+        """
+        self.default_limit /= workers
+        self.routes = [(prefix, limit / workers) for prefix, limit in self.routes]
+
+    def reset(self) -> None:
+        self._windows.clear()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+
+rate_limiter = SlidingWindowLimiter(
+    default_limit=settings.RATE_LIMIT_DEFAULT,
+    window=settings.RATE_LIMIT_WINDOW,
+    routes=settings.RATE_LIMIT_ROUTES,
+    max_clients=settings.RATE_LIMIT_MAX_CLIENTS,
+)
@@ -0,0 +1,313 @@
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+from app.models.forecast import RawForecast, dumps, loads
+from app.services.cache_service import NegativeEntry
+from app.services.metrics import metrics
+
+_MAGIC = b"WXC1"
+_FILE_HEADER = struct.Struct("<4sII")  # magic, slot count, slot size
+_FILE_HEADER_SIZE = 64
+# key hash, expires at (wall clock), value length, key length, value kind
+_SLOT_HEADER = struct.Struct("<QdIHB")
+_SLOT_HEADER_SIZE = 32
+
+_KIND_RAW = 1  # RawForecast body, returned without parsing
+_KIND_JSON = 2  # Any other JSON-serialisable value
+_NEGATIVE_PREFIX = "negative:"
+
+logger = logging.getLogger(__name__)
+
+
+class SharedMemoryCache:
+    """Forecast cache in a memory-mapped file shared by all workers on a host.
+
+    The file is split into fixed-size slots grouped into buckets. A key hashes
+    to one bucket and may live in any of its slots; writers take an exclusive
+    ``lockf`` byte-range lock on the bucket and readers a shared one, so
+    workers only contend on the same bucket. Values larger than a slot are not
+    cached; they are counted in ``cache.oversized``. Entries keep ``WeatherCache`` semantics: ``get`` returns ``None``
+    once the TTL has passed, and ``get_stale`` still finds an expired entry
+    for ``stale_seconds`` unless its slot has been reused.
+
+    Locks are taken synchronously on the event loop. That relies on a lock
+    covering no more than a scan of the bucket's slot headers and one copy of
+    the value: encoding, decoding and parsing happen outside it, so a lock is
+    held for microseconds and a contended one is released as quickly.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        ttl_seconds: int = 300,
+        slots: int = 2048,
+        slot_size: int = 40960,
+        bucket_size: int = 8,
+        stale_seconds: int = 0,
+    ):
+        if slots % bucket_size:
+            raise ValueError("slots must be a multiple of bucket_size")
+        self.path = path
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.stale_seconds = stale_seconds
+        self.slots = slots
+        self.slot_size = slot_size
+        self.bucket_size = bucket_size
+        self.oversized = 0
+        # Called with keys this process sees leave the cache; entries other
+        # workers evict are not reported
+        self.on_remove: Optional[Callable[[str], None]] = None
+
+        size = _FILE_HEADER_SIZE + slots * slot_size
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._lock(0, _FILE_HEADER_SIZE, exclusive=True):
+            existing_size = os.fstat(self._fd).st_size
+            if existing_size < size:
+                os.ftruncate(self._fd, size)
+            self._mmap = mmap.mmap(self._fd, size)
+            header = _FILE_HEADER.unpack_from(self._mmap, 0)
+            if header != (_MAGIC, slots, slot_size):
+                if existing_size:
+                    # Left behind with a different layout, start from empty
+                    self._mmap[_FILE_HEADER_SIZE:size] = bytes(size - _FILE_HEADER_SIZE)
+                _FILE_HEADER.pack_into(self._mmap, 0, _MAGIC, slots, slot_size)
+
+    def close(self) -> None:
+        self._mmap.close()
+        os.close(self._fd)
+
+    @contextmanager
+    def _lock(self, start: int, length: int, exclusive: bool) -> Iterator[None]:
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        fcntl.lockf(self._fd, mode, length, start)
+        try:
+            yield
+        finally:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN, length, start)
+
+    def _bucket(self, key: bytes) -> Tuple[int, int]:
+        digest = hashlib.blake2b(key, digest_size=8).digest()
+        # 0 marks an empty slot, so never hand it out as a key hash
+        key_hash = int.from_bytes(digest, "little") or 1
+        buckets = self.slots // self.bucket_size
+        return key_hash, (key_hash % buckets) * self.bucket_size
+
+    def _offset(self, slot: int) -> int:
+        return _FILE_HEADER_SIZE + slot * self.slot_size
+
+    def _bucket_lock(self, first_slot: int, exclusive: bool):
+        return self._lock(
+            self._offset(first_slot), self.bucket_size * self.slot_size, exclusive
+        )
+
+    def _find(self, key: bytes, key_hash: int, first_slot: int) -> Optional[int]:
+        for slot in range(first_slot, first_slot + self.bucket_size):
+            offset = self._offset(slot)
+            slot_hash, _, _, key_len, _ = _SLOT_HEADER.unpack_from(self._mmap, offset)
+            if slot_hash != key_hash:
+                continue
+            start = offset + _SLOT_HEADER_SIZE
+            if self._mmap[start : start + key_len] == key:
+                return slot
+        return None
+
+    def get(self, cache_key: str) -> Optional[Any]:
+        return self._read(cache_key, 0)
+
+    def remaining_ttl(self, cache_key: str) -> Optional[float]:
+        """Seconds until a fresh entry expires, None when there is none"""
+        key = cache_key.encode("utf-8")
+        key_hash, first_slot = self._bucket(key)
+        with self._bucket_lock(first_slot, exclusive=False):
+            slot = self._find(key, key_hash, first_slot)
+            if slot is None:
+                return None
+            _, expires_at, _, _, _ = _SLOT_HEADER.unpack_from(
+                self._mmap, self._offset(slot)
+            )
+        remaining = expires_at - time.time()
+        return remaining if remaining > 0 else None
+
+    def get_stale(self, cache_key: str) -> Optional[Any]:
+        """Return an entry up to ``stale_seconds`` past its TTL"""
+        return self._read(cache_key, self.stale_seconds)
+
+    def _read(self, cache_key: str, grace: float) -> Optional[Any]:
+        key = cache_key.encode("utf-8")
+        key_hash, first_slot = self._bucket(key)
+        with self._bucket_lock(first_slot, exclusive=False):
+            slot = self._find(key, key_hash, first_slot)
+            if slot is None:
+                return None
+            offset = self._offset(slot)
+            _, expires_at, value_len, key_len, kind = _SLOT_HEADER.unpack_from(
+                self._mmap, offset
+            )
+            if time.time() > expires_at + grace:
+                return None
+            start = offset + _SLOT_HEADER_SIZE + key_len
+            value = self._mmap[start : start + value_len]
+
+        if kind == _KIND_RAW:
+            return RawForecast(value)
+        return loads(value)
+
+    def set(
+        self, cache_key: str, data: Any, ttl_seconds: Optional[float] = None
+    ) -> None:
+        """Cache ``data`` for ``ttl_seconds``, or the cache's TTL when None"""
+        if isinstance(data, RawForecast):
+            kind, value = _KIND_RAW, data.body
+        else:
+            kind, value = _KIND_JSON, dumps(data)
+        if ttl_seconds is None:
+            ttl_seconds = self.ttl.total_seconds()
+        self._put(cache_key, kind, value, ttl_seconds)
+        # Fresh data supersedes any remembered failure
+        self.invalidate(_NEGATIVE_PREFIX + cache_key)
+
+    def get_negative(self, cache_key: str) -> Optional[NegativeEntry]:
+        """Return the remembered upstream failure for a key, if still active"""
+        entry = self.get(_NEGATIVE_PREFIX + cache_key)
+        if entry is None:
+            return None
+        metrics.incr(f"cache.negative_hit.{entry['kind']}")
+        return NegativeEntry(entry["kind"], entry["expires_at"], entry["retry_after"])
+
+    def set_negative(
+        self,
+        cache_key: str,
+        kind: str,
+        ttl_seconds: float,
+        retry_after: Optional[int] = None,
+    ) -> None:
+        """Remember an upstream failure for ``ttl_seconds``"""
+        entry = {
+            "kind": kind,
+            "expires_at": time.time() + ttl_seconds,
+            "retry_after": retry_after,
+        }
+        self._put(_NEGATIVE_PREFIX + cache_key, _KIND_JSON, dumps(entry), ttl_seconds)
+        metrics.incr(f"cache.negative_set.{kind}")
+
+    def _put(self, cache_key: str, kind: int, value: bytes, ttl: float) -> None:
+        key = cache_key.encode("utf-8")
+        if _SLOT_HEADER_SIZE + len(key) + len(value) > self.slot_size:
+            self.oversized += 1
+            metrics.incr("cache.oversized")
+            # Once per process, the counter tracks the rest
+            logger.log(
+                logging.WARNING if self.oversized == 1 else logging.DEBUG,
+                "Not caching %s: %d bytes do not fit a %d byte slot",
+                cache_key,
+                len(value),
+                self.slot_size,
+            )
+            self.invalidate(cache_key)
+            return
+
+        key_hash, first_slot = self._bucket(key)
+        now = time.time()
+        # Build the slot up front so the lock only covers copying it in
+        header = _SLOT_HEADER.pack(key_hash, now + ttl, len(value), len(key), kind)
+        body = key + value
+        with self._bucket_lock(first_slot, exclusive=True):
+            slot = self._find(key, key_hash, first_slot)
+            evicted = None
+            if slot is None:
+                slot = self._free_slot(first_slot, now)
+                evicted = self._slot_key(slot)
+            offset = self._offset(slot)
+            start = offset + _SLOT_HEADER_SIZE
+            self._mmap[start : start + len(body)] = body
+            self._mmap[offset : offset + len(header)] = header
+        if evicted is not None:
+            self._notify_removed([evicted])
+
+    def _free_slot(self, first_slot: int, now: float) -> int:
+        """Pick an empty or expired slot, else evict the one expiring soonest"""
+        victim, victim_expiry = first_slot, float("inf")
+        for slot in range(first_slot, first_slot + self.bucket_size):
+            slot_hash, expires_at, _, _, _ = _SLOT_HEADER.unpack_from(
+                self._mmap, self._offset(slot)
+            )
+            if slot_hash == 0 or expires_at < now:
+                return slot
+            if expires_at < victim_expiry:
+                victim, victim_expiry = slot, expires_at
+        return victim
+
+    def _clear_slot(self, slot: int) -> None:
+        offset = self._offset(slot)
+        self._mmap[offset : offset + _SLOT_HEADER_SIZE] = bytes(_SLOT_HEADER_SIZE)
+
+    def _slot_key(self, slot: int) -> Optional[str]:
+        """Forecast key held in a slot, None when empty or a failure entry"""
+        offset = self._offset(slot)
+        slot_hash, _, _, key_len, _ = _SLOT_HEADER.unpack_from(self._mmap, offset)
+        if not slot_hash:
+            return None
+        start = offset + _SLOT_HEADER_SIZE
+        key = self._mmap[start : start + key_len].decode("utf-8")
+        return None if key.startswith(_NEGATIVE_PREFIX) else key
+
+    def _notify_removed(self, keys: List[Optional[str]]) -> None:
+        if self.on_remove is not None:
+            for key in keys:
+                if key is not None:
+                    self.on_remove(key)
+
+    def invalidate(self, cache_key: str) -> None:
+        """Remove specific key from cache"""
+        key = cache_key.encode("utf-8")
+        key_hash, first_slot = self._bucket(key)
+        removed = None
+        with self._bucket_lock(first_slot, exclusive=True):
+            slot = self._find(key, key_hash, first_slot)
+            if slot is not None:
+                removed = self._slot_key(slot)
+                self._clear_slot(slot)
+        self._notify_removed([removed])
+
+    def clear(self) -> None:
+        """Remove all entries from cache"""
+        removed = []
+        for first_slot in range(0, self.slots, self.bucket_size):
+            with self._bucket_lock(first_slot, exclusive=True):
+                for slot in range(first_slot, first_slot + self.bucket_size):
+                    removed.append(self._slot_key(slot))
+                    self._clear_slot(slot)
+        self._notify_removed(removed)
+
+    def cleanup_expired(self) -> None:
+        """Remove all entries past their TTL and stale period from cache"""
+        now = time.time()
+        removed = []
+        for first_slot in range(0, self.slots, self.bucket_size):
+            with self._bucket_lock(first_slot, exclusive=True):
+                for slot in range(first_slot, first_slot + self.bucket_size):
+                    slot_hash, expires_at, _, _, _ = _SLOT_HEADER.unpack_from(
+                        self._mmap, self._offset(slot)
+                    )
+                    if slot_hash and expires_at + self.stale_seconds < now:
+                        removed.append(self._slot_key(slot))
+                        self._clear_slot(slot)
+        self._notify_removed(removed)
+
+    def __len__(self) -> int:
+        now = time.time()
+        count = 0
+        for slot in range(self.slots):
+            slot_hash, expires_at, _, _, _ = _SLOT_HEADER.unpack_from(
+                self._mmap, self._offset(slot)
+            )
+            if slot_hash and expires_at >= now:
+                count += 1
+        return count
@@ -0,0 +1,159 @@
+import bisect
+import heapq
+import math
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.195  # Along a meridian
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_forecast_key(cache_key: str) -> Optional[Tuple[float, float, str]]:
+    """Split an ``onecall_{lat}_{lon}_{units}`` cache key"""
+    parts = cache_key.split("_")
+    if len(parts) != 4 or parts[0] != "onecall":
+        return None
+    try:
+        return float(parts[1]), float(parts[2]), parts[3]
+    except ValueError:
+        return None
+
+
+class SpatialIndex:
+    """Forecast locations bucketed into fixed-size lat/lon cells per unit system.
+
+    Lookups only visit the cells that overlap the search area, so their cost
+    depends on local density rather than on how many keys are indexed. Keys
+    are kept sorted within each cell, so box queries come out in key order
+    without sorting the whole result.
+    """
+
+    def __init__(self, cell_degrees: float = 0.25):
+        self.cell_degrees = cell_degrees
+        self._cells: Dict[Tuple[str, int, int], List[str]] = defaultdict(list)
+        self._points: Dict[str, Tuple[float, float, str]] = {}
+
+    def _cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (
+            math.floor(lat / self.cell_degrees),
+            math.floor(lon / self.cell_degrees),
+        )
+
+    def add(self, cache_key: str) -> bool:
+        """Index a forecast cache key, returning False if it is not one"""
+        if cache_key in self._points:
+            return True
+        point = parse_forecast_key(cache_key)
+        if point is None:
+            return False
+        lat, lon, units = point
+        self._points[cache_key] = point
+        bisect.insort(self._cells[(units, *self._cell(lat, lon))], cache_key)
+        return True
+
+    def remove(self, cache_key: str) -> None:
+        point = self._points.pop(cache_key, None)
+        if point is None:
+            return
+        lat, lon, units = point
+        cell = (units, *self._cell(lat, lon))
+        keys = self._cells.get(cell)
+        if keys is not None:
+            i = bisect.bisect_left(keys, cache_key)
+            if i < len(keys) and keys[i] == cache_key:
+                del keys[i]
+            if not keys:
+                del self._cells[cell]
+
+    def prune(self, keep: Callable[[str], bool]) -> int:
+        """Remove the keys ``keep`` rejects, returning how many went"""
+        dead = [key for key in self._points if not keep(key)]
+        for key in dead:
+            self.remove(key)
+        return len(dead)
+
+    def clear(self) -> None:
+        self._cells.clear()
+        self._points.clear()
+
+    def nearby(
+        self, lat: float, lon: float, units: str, radius_km: float, limit: int = 8
+    ) -> List[Tuple[str, float, float, float]]:
+        """Up to ``limit`` ``(key, lat, lon, distance_km)`` within ``radius_km``,
+        nearest first"""
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        lon_span = min(180.0, lat_span / cos_lat)
+        min_row, min_col = self._cell(lat - lat_span, lon - lon_span)
+        max_row, max_col = self._cell(lat + lat_span, lon + lon_span)
+
+        found = []
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                for key in self._cells.get((units, row, col), ()):
+                    point_lat, point_lon, _ = self._points[key]
+                    distance = haversine_km(lat, lon, point_lat, point_lon)
+                    if distance <= radius_km:
+                        found.append((key, point_lat, point_lon, distance))
+        found.sort(key=lambda item: item[3])
+        return found[:limit]
+
+    def within(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+        units: str,
+        after: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Keys for ``units`` inside the box, edges included, in key order and
+        starting past ``after`` when given"""
+        min_row, min_col = self._cell(min_lat, min_lon)
+        max_row, max_col = self._cell(max_lat, max_lon)
+        if (max_row - min_row + 1) * (max_col - min_col + 1) <= len(self._cells):
+            cells = (
+                self._cells.get((units, row, col), ())
+                for row in range(min_row, max_row + 1)
+                for col in range(min_col, max_col + 1)
+            )
+        else:
+            # A box wider than the indexed area, visit occupied cells only
+            cells = (
+                keys
+                for (cell_units, row, col), keys in self._cells.items()
+                if cell_units == units
+                and min_row <= row <= max_row
+                and min_col <= col <= max_col
+            )
+
+        # Copy the tail of each cell up front, so the result stays valid
+        # while the index changes under a caller that consumes it slowly
+        runs = [
+            keys[bisect.bisect_right(keys, after) :] if after is not None else keys[:]
+            for keys in cells
+        ]
+        for key in heapq.merge(*runs):
+            point = self._points.get(key)
+            if point is None:
+                continue  # Removed since the runs were copied
+            lat, lon, _ = point
+            if min_lat <= lat <= max_lat and min_lon <= lon <= max_lon:
+                yield key
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def __contains__(self, cache_key: str) -> bool:
+        return cache_key in self._points
@@ -0,0 +1,193 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Union
+from app.models.forecast import RawForecast
+from app.services.storage_service import ForecastStorage, Location
+
+# Seconds between sweeps of expired rows, DynamoDB's TTL deletion equivalent
+PURGE_INTERVAL = 60
+# Stay well under SQLITE_MAX_VARIABLE_NUMBER in batched reads
+BATCH_READ_LIMIT = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS weather_forecasts (
+    location_key TEXT PRIMARY KEY,
+    forecast_data BLOB NOT NULL,
+    timestamp TEXT NOT NULL,
+    ttl INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS weather_forecasts_ttl ON weather_forecasts (ttl);
+"""
+
+_UPSERT = (
+    "INSERT OR REPLACE INTO weather_forecasts "
+    "(location_key, forecast_data, timestamp, ttl) VALUES (?, ?, ?, ?)"
+)
+
+
+class SQLiteStorageService(ForecastStorage):
+    """Forecasts in an embedded SQLite database, for single-node deployments
+    and tests that should not need DynamoDB.
+
+    The database runs in WAL mode, so readers never wait for the writer and
+    every worker process on the host can share one file. Reads and writes
+    run in a thread, so a busy disk or a checkpoint never stalls the event
+    loop. Expired rows are skipped on read and swept periodically, matching
+    DynamoDB TTL behaviour.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._pid: Optional[int] = None
+        self._last_purge = 0.0
+        # Every connection this process opened, whichever thread uses it
+        self._connections: Set[sqlite3.Connection] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        # One connection per thread, and never one inherited across a fork
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    # The parent's connections are its own to close
+                    self._local = threading.local()
+                    self._connections = set()
+                    self._pid = pid
+        local = self._local
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            # Used only by this thread, but closed by whichever calls close()
+            connection = sqlite3.connect(
+                self.path, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA busy_timeout=5000")
+            connection.executescript(_SCHEMA)
+            local.connection = connection
+            with self._lock:
+                self._connections.add(connection)
+        return connection
+
+    @staticmethod
+    def _row(item: Dict[str, Any]):
+        return (
+            item["location_key"],
+            item["forecast_data"].encode("utf-8"),
+            item["timestamp"],
+            item["ttl"],
+        )
+
+    def _write(self, items: List[Dict[str, Any]]) -> None:
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(_UPSERT, [self._row(item) for item in items])
+            now = time.monotonic()
+            if now - self._last_purge >= PURGE_INTERVAL:
+                self._last_purge = now
+                connection.execute(
+                    "DELETE FROM weather_forecasts WHERE ttl <= ?",
+                    (int(datetime.now(UTC).timestamp()),),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    async def store_forecast(
+        self,
+        lat: float,
+        lon: float,
+        units: str,
+        forecast_data: Union[Dict[str, Any], RawForecast],
+        ttl_seconds: Optional[int] = None,
+    ) -> bool:
+        try:
+            item = self.build_item(lat, lon, units, forecast_data, ttl_seconds)
+            await asyncio.to_thread(self._write, [item])
+            return True
+        except Exception as e:
+            print(f"Error storing forecast: {e}")
+            return False
+
+    async def batch_store_items(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Write all items in one transaction; on failure all are returned"""
+        try:
+            await asyncio.to_thread(self._write, items)
+            return []
+        except sqlite3.Error as e:
+            print(f"Error storing forecasts: {e}")
+            return list(items)
+
+    def _read(self, key: str, now: int):
+        return self.connection.execute(
+            "SELECT forecast_data, ttl FROM weather_forecasts "
+            "WHERE location_key = ? AND ttl > ?",
+            (key, now),
+        ).fetchone()
+
+    def _read_many(self, keys: List[str], now: int) -> Dict[str, RawForecast]:
+        found: Dict[str, RawForecast] = {}
+        for start in range(0, len(keys), BATCH_READ_LIMIT):
+            chunk = keys[start : start + BATCH_READ_LIMIT]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self.connection.execute(
+                "SELECT location_key, forecast_data, ttl FROM weather_forecasts "
+                f"WHERE location_key IN ({placeholders}) AND ttl > ?",
+                (*chunk, now),
+            )
+            found.update(
+                (key, RawForecast(body, expires_at=ttl)) for key, body, ttl in rows
+            )
+        return found
+
+    async def get_forecast_raw(
+        self, lat: float, lon: float, units: str
+    ) -> Optional[RawForecast]:
+        """Return the stored forecast without parsing its JSON body"""
+        try:
+            row = await asyncio.to_thread(
+                self._read,
+                f"{lat}_{lon}_{units}",
+                int(datetime.now(UTC).timestamp()),
+            )
+        except sqlite3.Error as e:
+            print(f"Error retrieving forecast: {e}")
+            return None
+        if row is None:
+            return None
+        return RawForecast(row[0], expires_at=row[1])
+
+    async def get_forecasts_raw(
+        self, locations: Sequence[Location]
+    ) -> List[Optional[RawForecast]]:
+        keys = [f"{lat}_{lon}_{units}" for lat, lon, units in locations]
+        try:
+            found = await asyncio.to_thread(
+                self._read_many, keys, int(datetime.now(UTC).timestamp())
+            )
+        except sqlite3.Error as e:
+            print(f"Error retrieving forecasts: {e}")
+            found = {}
+        return [found.get(key) for key in keys]
+
+    def close(self) -> None:
+        """Close the connections of every thread, including to_thread workers"""
+        with self._lock:
+            # Those inherited across a fork are left to the parent
+            owned = self._pid == os.getpid()
+            connections = self._connections if owned else set()
+            self._connections = set()
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
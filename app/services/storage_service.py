@@ -1,9 +1,18 @@
 from decimal import Decimal
+import abc
+import asyncio
 import boto3
 import json
+from botocore.config import Config
 from datetime import UTC, datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Sequence, Tuple, Union
 from app.config import settings
+from app.models.forecast import RawForecast
+
+FORECAST_TABLE = "weather_forecasts"
+BATCH_GET_LIMIT = 100  # DynamoDB BatchGetItem maximum
+
+Location = Tuple[float, float, str]
 
 
 class DecimalEncoder(json.JSONEncoder):
@@ -13,7 +22,85 @@ class DecimalEncoder(json.JSONEncoder):
         return super().default(obj)
 
 
-class StorageService:
+class ForecastStorage(abc.ABC):
+    """Persistent forecast store shared by every backend.
+
+    Items are dicts of ``location_key``, ``forecast_data`` (the JSON body),
+    ``timestamp`` and ``ttl`` (epoch seconds). Reads ignore items whose ttl
+    has passed, whether or not the backend has deleted them yet.
+    """
+
+    def build_item(
+        self,
+        lat: float,
+        lon: float,
+        units: str,
+        forecast_data: Union[Dict[str, Any], RawForecast],
+        ttl_seconds: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        now = datetime.now(UTC)
+        if ttl_seconds is None:
+            ttl_seconds = settings.STORAGE_TTL_SECONDS
+        if isinstance(forecast_data, RawForecast):
+            # Already serialised upstream, store the body as-is
+            body = forecast_data.body.decode("utf-8")
+        else:
+            body = json.dumps(forecast_data, cls=DecimalEncoder)
+        return {
+            "location_key": f"{lat}_{lon}_{units}",
+            "forecast_data": body,
+            "timestamp": now.isoformat(),
+            "ttl": int(now.timestamp() + ttl_seconds),
+        }
+
+    @abc.abstractmethod
+    async def store_forecast(
+        self,
+        lat: float,
+        lon: float,
+        units: str,
+        forecast_data: Union[Dict[str, Any], RawForecast],
+        ttl_seconds: Optional[int] = None,
+    ) -> bool:
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def batch_store_items(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Write built items, returning any the caller should retry"""
+        raise NotImplementedError
+
+    async def get_forecast(
+        self, lat: float, lon: float, units: str
+    ) -> Optional[Dict[str, Any]]:
+        forecast = await self.get_forecast_raw(lat, lon, units)
+        if forecast is None:
+            return None
+        try:
+            return forecast.data
+        except Exception as e:
+            print(f"Error decoding forecast: {e}")
+            return None
+
+    @abc.abstractmethod
+    async def get_forecast_raw(
+        self, lat: float, lon: float, units: str
+    ) -> Optional[RawForecast]:
+        """Return the stored forecast without parsing its JSON body"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    async def get_forecasts_raw(
+        self, locations: Sequence[Location]
+    ) -> List[Optional[RawForecast]]:
+        """Read several forecasts at once, in the order of ``locations``"""
+        raise NotImplementedError
+
+
+class StorageService(ForecastStorage):
+    """Forecasts in the DynamoDB ``weather_forecasts`` table"""
+
     def __init__(self):
         self._dynamodb = boto3.resource(
             "dynamodb",
@@ -21,45 +108,127 @@ class StorageService:
             region_name=settings.AWS_DEFAULT_REGION,
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            # Calls run in default executor threads that a deadline cannot
+            # cancel. An abandoned call holds its thread for up to every
+            # attempt's timeouts plus backoff, so keep attempts few; the
+            # legacy retry mode would allow ten
+            config=Config(
+                connect_timeout=settings.DYNAMODB_CONNECT_TIMEOUT,
+                read_timeout=settings.DYNAMODB_READ_TIMEOUT,
+                retries={
+                    "total_max_attempts": settings.DYNAMODB_MAX_ATTEMPTS,
+                    "mode": "standard",
+                },
+            ),
         )
         self._table = None
 
     @property
     def table(self):
         if self._table is None:
-            self._table = self._dynamodb.Table("weather_forecasts")
+            self._table = self._dynamodb.Table(FORECAST_TABLE)
         return self._table
 
     async def store_forecast(
-        self, lat: float, lon: float, units: str, forecast_data: Dict[str, Any]
+        self,
+        lat: float,
+        lon: float,
+        units: str,
+        forecast_data: Union[Dict[str, Any], RawForecast],
+        ttl_seconds: Optional[int] = None,
     ) -> bool:
         try:
-            now = datetime.now(UTC)
-            item = {
-                "location_key": f"{lat}_{lon}_{units}",
-                "forecast_data": json.dumps(forecast_data, cls=DecimalEncoder),
-                "timestamp": now.isoformat(),
-                "ttl": int(now.timestamp() + 3600),  # 1 hour TTL
-            }
-            self.table.put_item(Item=item)
+            item = self.build_item(lat, lon, units, forecast_data, ttl_seconds)
+            await asyncio.to_thread(self.table.put_item, Item=item)
             return True
         except Exception as e:
             print(f"Error storing forecast: {e}")
             return False
 
-    async def get_forecast(
+    async def batch_store_items(
+        self, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Write up to 25 items with one BatchWriteItem call.
+
+        Runs the blocking boto3 call in a worker thread and returns the items
+        DynamoDB left unprocessed, which the caller is expected to retry.
+        """
+        request = {FORECAST_TABLE: [{"PutRequest": {"Item": item}} for item in items]}
+        response = await asyncio.to_thread(
+            self._dynamodb.batch_write_item, RequestItems=request
+        )
+        unprocessed = response.get("UnprocessedItems", {}).get(FORECAST_TABLE, [])
+        return [entry["PutRequest"]["Item"] for entry in unprocessed]
+
+    async def get_forecast_raw(
         self, lat: float, lon: float, units: str
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[RawForecast]:
+        """Return the stored forecast without parsing its JSON body.
+
+        The blocking boto3 call runs in a worker thread, so a slow table
+        never stalls the event loop and a request deadline can give up on it.
+        """
         try:
-            response = self.table.get_item(Key={"location_key": f"{lat}_{lon}_{units}"})
+            response = await asyncio.to_thread(
+                self.table.get_item, Key={"location_key": f"{lat}_{lon}_{units}"}
+            )
 
             if "Item" in response:
                 item = response["Item"]
                 current_time = int(datetime.now(UTC).timestamp())
                 # Check if data is still valid (not expired)
                 if current_time < item.get("ttl", 0):
-                    return json.loads(item["forecast_data"])
+                    return RawForecast(
+                        item["forecast_data"].encode("utf-8"),
+                        expires_at=int(item["ttl"]),
+                    )
             return None
         except Exception as e:
             print(f"Error retrieving forecast: {e}")
             return None
+
+    async def get_forecasts_raw(
+        self, locations: Sequence[Location]
+    ) -> List[Optional[RawForecast]]:
+        """Read with BatchGetItem, 100 keys per call.
+
+        Keys DynamoDB leaves unprocessed are asked for once more; any still
+        missing after that are reported as misses.
+        """
+        keys = [f"{lat}_{lon}_{units}" for lat, lon, units in locations]
+        found: Dict[str, RawForecast] = {}
+        now = int(datetime.now(UTC).timestamp())
+        try:
+            for start in range(0, len(keys), BATCH_GET_LIMIT):
+                pending = [
+                    {"location_key": key}
+                    for key in dict.fromkeys(keys[start : start + BATCH_GET_LIMIT])
+                ]
+                for _ in range(2):
+                    response = await asyncio.to_thread(
+                        self._dynamodb.batch_get_item,
+                        RequestItems={FORECAST_TABLE: {"Keys": pending}},
+                    )
+                    for item in response.get("Responses", {}).get(FORECAST_TABLE, []):
+                        if now < item.get("ttl", 0):
+                            found[item["location_key"]] = RawForecast(
+                                item["forecast_data"].encode("utf-8"),
+                                expires_at=int(item["ttl"]),
+                            )
+                    unprocessed = response.get("UnprocessedKeys", {})
+                    pending = unprocessed.get(FORECAST_TABLE, {}).get("Keys", [])
+                    if not pending:
+                        break
+        except Exception as e:
+            print(f"Error retrieving forecasts: {e}")
+        return [found.get(key) for key in keys]
+
+
+def create_storage_service() -> ForecastStorage:
+    """Build the storage backend selected by ``settings.STORAGE_BACKEND``"""
+    if settings.STORAGE_BACKEND == "sqlite":
+        # Imported lazily, like the shared cache backend
+        from app.services.sqlite_storage import SQLiteStorageService
+
+        return SQLiteStorageService(settings.STORAGE_SQLITE_PATH)
+    return StorageService()
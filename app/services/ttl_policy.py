@@ -0,0 +1,186 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple, Union
+from app.config import settings
+from app.models.forecast import RawForecast, loads
+from app.services.metrics import metrics
+
+# Change in each field, in canonical units, that counts as one unit of
+# volatility between consecutive snapshots of a location
+CHANGE_SCALES = (
+    ("temp", 2.0),  # Kelvin
+    ("pressure", 3.0),  # hPa
+    ("wind_speed", 3.0),  # m/s
+    ("humidity", 15.0),  # %
+)
+POP_SCALE = 0.3  # Mean precipitation probability over the next POP_HOURS
+POP_HOURS = 6
+
+# current temp, pressure, wind speed, humidity, mean pop and condition id
+Signature = Tuple[Optional[float], ...]
+
+
+def signature(document: Dict[str, Any]) -> Signature:
+    """The few numbers of a forecast that are compared between snapshots"""
+    current = document.get("current") or {}
+    pops = [hour.get("pop", 0.0) for hour in (document.get("hourly") or [])[:POP_HOURS]]
+    conditions = current.get("weather") or [{}]
+    return (
+        *(current.get(name) for name, _ in CHANGE_SCALES),
+        sum(pops) / len(pops) if pops else None,
+        conditions[0].get("id"),
+    )
+
+
+def volatility(previous: Signature, current: Signature) -> float:
+    """How far a location's weather moved between two snapshots"""
+    scales = [scale for _, scale in CHANGE_SCALES] + [POP_SCALE]
+    score = 0.0
+    for scale, old, new in zip(scales, previous, current):
+        if old is not None and new is not None:
+            score += abs(new - old) / scale
+    if previous[-1] != current[-1]:
+        score += 1.0  # The reported condition changed
+    return score
+
+
+class _Location:
+    """What the policy remembers about one location"""
+
+    __slots__ = ("ttl", "effective", "signature", "observed_at")
+
+    def __init__(self, ttl: float, signature: Signature, observed_at: float):
+        self.ttl = ttl  # Learned from volatility
+        self.effective = ttl  # Also capped while alerts are active
+        self.signature = signature
+        self.observed_at = observed_at
+
+
+class AdaptiveTTLPolicy:
+    """Per-location cache TTLs that follow how fast each forecast changes.
+
+    Each fetched forecast is compared with the previous one for its location,
+    scaled to the change expected over one TTL. Locations that barely moved
+    (under ``calm``) have their TTL stretched by ``growth``, those that moved
+    more than ``volatile`` have it halved, always within ``min_ttl`` and
+    ``max_ttl``. Forecasts carrying alerts are held for at most ``alert_ttl``.
+
+    Persistent storage keeps copies for ``storage_ttl``, stretched by the
+    same factor as a stretched cache TTL but never shortened, so adapting
+    cache TTLs never costs the storage tier its lifetime.
+    """
+
+    def __init__(
+        self,
+        base_ttl: int = 300,
+        storage_ttl: int = 3600,
+        min_ttl: int = 60,
+        max_ttl: int = 1800,
+        alert_ttl: int = 120,
+        calm: float = 0.5,
+        volatile: float = 1.5,
+        growth: float = 1.5,
+        max_locations: int = 10000,
+        enabled: bool = True,
+    ):
+        self.base_ttl = base_ttl
+        self.storage_base_ttl = storage_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.alert_ttl = alert_ttl
+        self.calm = calm
+        self.volatile = volatile
+        self.growth = growth
+        self.max_locations = max_locations
+        self.enabled = enabled
+        self._locations: "OrderedDict[str, _Location]" = OrderedDict()
+
+    def ttl_for(self, cache_key: str) -> Optional[int]:
+        """Current cache TTL of a location, None for the cache's default"""
+        location = self._locations.get(cache_key)
+        return None if location is None else int(location.effective)
+
+    def storage_ttl(self, ttl: Optional[int]) -> Optional[int]:
+        """Storage TTL for a cache TTL, None for the storage default"""
+        if ttl is None:
+            return None
+        return max(self.storage_base_ttl, self.storage_base_ttl * ttl // self.base_ttl)
+
+    def observe(
+        self,
+        cache_key: str,
+        forecast: Union[Dict[str, Any], RawForecast],
+        now: Optional[float] = None,
+    ) -> Optional[int]:
+        """Record a freshly fetched forecast and return its cache TTL, or None
+        for the default when the policy is disabled"""
+        if not self.enabled:
+            return None
+        now = time.time() if now is None else now
+        if isinstance(forecast, RawForecast):
+            # Parse a throwaway copy, the cached body stays unparsed
+            document = forecast.data if forecast.is_parsed else loads(forecast.body)
+        else:
+            document = forecast
+        current = signature(document)
+
+        location = self._locations.get(cache_key)
+        if location is None:
+            location = _Location(self.base_ttl, current, now)
+            self._locations[cache_key] = location
+            if len(self._locations) > self.max_locations:
+                self._locations.popitem(last=False)
+        else:
+            self._locations.move_to_end(cache_key)
+            elapsed = max(now - location.observed_at, location.ttl / 4)
+            score = volatility(location.signature, current) * location.ttl / elapsed
+            if score < self.calm:
+                location.ttl = min(self.max_ttl, location.ttl * self.growth)
+                metrics.incr("ttl.stretched")
+            elif score > self.volatile:
+                location.ttl = max(self.min_ttl, location.ttl / 2)
+                metrics.incr("ttl.shortened")
+            location.signature = current
+            location.observed_at = now
+
+        location.effective = location.ttl
+        if document.get("alerts"):
+            location.effective = min(location.ttl, self.alert_ttl)
+            metrics.incr("ttl.alert")
+        return int(location.effective)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """TTL spread and the upstream fetch rate relative to the base TTL.
+
+        A location kept warm is fetched once per TTL, so its fetch rate
+        against a fixed TTL is ``base_ttl / ttl``.
+        """
+        ttls = sorted(location.effective for location in self._locations.values())
+        if not ttls:
+            return {"locations": 0}
+        return {
+            "locations": len(ttls),
+            "min_ttl": int(ttls[0]),
+            "median_ttl": int(ttls[len(ttls) // 2]),
+            "max_ttl": int(ttls[-1]),
+            "relative_upstream_rate": round(
+                sum(self.base_ttl / ttl for ttl in ttls) / len(ttls), 3
+            ),
+        }
+
+    def reset(self) -> None:
+        self._locations.clear()
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+
+ttl_policy = AdaptiveTTLPolicy(
+    base_ttl=settings.CACHE_TTL_SECONDS,
+    storage_ttl=settings.STORAGE_TTL_SECONDS,
+    min_ttl=settings.ADAPTIVE_TTL_MIN,
+    max_ttl=settings.ADAPTIVE_TTL_MAX,
+    alert_ttl=settings.ADAPTIVE_TTL_ALERTS,
+    max_locations=settings.ADAPTIVE_TTL_MAX_LOCATIONS,
+    enabled=settings.ADAPTIVE_TTL_ENABLED,
+)
@@ -0,0 +1,86 @@
+from typing import Any, Dict, Tuple
+
+# Forecasts are fetched and stored once per location in these units; the
+# other systems are derived from that copy locally
+CANONICAL_UNITS = "standard"
+UNIT_SYSTEMS = ("standard", "metric", "imperial")
+
+# Forecast sections holding converted fields, one dict or a list of dicts
+CONVERTED_SECTIONS = ("current", "hourly", "daily")
+
+TEMPERATURE_FIELDS = ("temp", "feels_like", "dew_point")
+SPEED_FIELDS = ("wind_speed", "wind_gust")
+
+# (scale, offset) from standard units (kelvin, m/s) to each system. OneCall
+# reports pressure in hPa, visibility in metres and precipitation in mm
+# whatever ``units`` is, so only temperatures and wind speeds change.
+CONVERSIONS: Dict[str, Dict[str, Tuple[float, float]]] = {
+    "standard": {},
+    "metric": {"temperature": (1.0, -273.15)},
+    "imperial": {"temperature": (1.8, -459.67), "speed": (1 / 0.44704, 0.0)},
+}
+
+# Upstream reports converted values to two decimals, and so do we
+_DECIMALS = 2
+
+
+def _apply(value: Any, scale: float, offset: float) -> Any:
+    if isinstance(value, dict):
+        # Daily temp and feels_like are split by part of day
+        return {part: _apply(v, scale, offset) for part, v in value.items()}
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return value
+    return round(value * scale + offset, _DECIMALS)
+
+
+class UnitConverter:
+    """Converts OneCall forecasts from standard units to metric or imperial.
+
+    Each unit system is compiled once into a ``field -> (scale, offset)``
+    table, so converting a point only visits the handful of fields that
+    change and copies the rest.
+    """
+
+    def __init__(self):
+        self._tables: Dict[str, Dict[str, Tuple[float, float]]] = {}
+
+    def table(self, units: str) -> Dict[str, Tuple[float, float]]:
+        table = self._tables.get(units)
+        if table is None:
+            if units not in CONVERSIONS:
+                raise ValueError(f"Unknown units: {units}")
+            quantities = CONVERSIONS[units]
+            table = {}
+            for quantity, fields in (
+                ("temperature", TEMPERATURE_FIELDS),
+                ("speed", SPEED_FIELDS),
+            ):
+                if quantity in quantities:
+                    table.update(dict.fromkeys(fields, quantities[quantity]))
+            self._tables[units] = table
+        return table
+
+    def convert_point(self, point: Dict[str, Any], units: str) -> Dict[str, Any]:
+        """Copy of one current, hourly or daily entry in ``units``"""
+        table = self.table(units)
+        if not table:
+            return point
+        converted = dict(point)
+        for field, (scale, offset) in table.items():
+            value = point.get(field)
+            if value is not None:
+                converted[field] = _apply(value, scale, offset)
+        return converted
+
+    def convert(self, data: Dict[str, Any], units: str) -> Dict[str, Any]:
+        """Copy of a standard-units OneCall document in ``units``"""
+        if not self.table(units):
+            return data
+        converted = dict(data)
+        for section in CONVERTED_SECTIONS:
+            value = data.get(section)
+            if isinstance(value, dict):
+                converted[section] = self.convert_point(value, units)
+            elif isinstance(value, list):
+                converted[section] = [self.convert_point(item, units) for item in value]
+        return converted
@@ -1,22 +1,30 @@
 import aiohttp
+import asyncio
 import logging
-from datetime import datetime
-from typing import Dict, Optional
+from datetime import datetime, UTC
+from typing import Dict, Iterable, List, Optional, Tuple
 from app.config import settings
-from app.models.weather import WeatherData
+from app.exceptions import UpstreamError
+from app.models.forecast import RawForecast
+from app.models.weather import WeatherData, WeatherDataBatch
 
 logger = logging.getLogger(__name__)
 
+GROUP_MAX_IDS = 20  # OpenWeather group queries accept at most 20 city IDs
+
+
 class WeatherService:
     def __init__(self):
         self.api_key = settings.OPENWEATHER_API_KEY
         self.base_url = "https://api.openweathermap.org/data/3.0/onecall"
+        # Current observations by city ID live on the 2.5 API, not OneCall
+        self.observation_url = "https://api.openweathermap.org/data/2.5"
 
     async def fetch_weather_data(self, location_id: str) -> Optional[WeatherData]:
         """Fetch weather data for a given location ID."""
         try:
             async with aiohttp.ClientSession() as session:
-                url = f"{self.base_url}/weather"
+                url = f"{self.observation_url}/weather"
                 params = {
                     "id": location_id,
                     "appid": self.api_key,
@@ -35,28 +43,115 @@ class WeatherService:
             logger.error(f"Failed to fetch weather data: {e}")
             return None
 
-    def _parse_weather_data(self, data: Dict, location_id: str) -> WeatherData:
-        """Parse OpenWeatherMap JSON response into WeatherData model."""
-        return WeatherData(
+    async def fetch_weather_batch(
+        self, location_ids: Iterable[str], units: str = "metric", concurrency: int = 4
+    ) -> Tuple[WeatherDataBatch, List[str]]:
+        """Fetch current observations for many city IDs with group queries.
+
+        IDs are split into chunks of ``GROUP_MAX_IDS``, fetched concurrently
+        over one pooled session and parsed straight into a batch. A chunk that
+        fails does not fail the others; returns the batch and the IDs that
+        could not be fetched.
+        """
+        ids = list(dict.fromkeys(str(location_id) for location_id in location_ids))
+        chunks = [ids[i : i + GROUP_MAX_IDS] for i in range(0, len(ids), GROUP_MAX_IDS)]
+        batch = WeatherDataBatch()
+        failed: List[str] = []
+        if not chunks:
+            return batch, failed
+
+        limit = asyncio.Semaphore(concurrency)
+        async with aiohttp.ClientSession() as session:
+            results = await asyncio.gather(
+                *(self._fetch_group(session, limit, chunk, units) for chunk in chunks)
+            )
+
+        for chunk, chunk_batch in zip(chunks, results):
+            if chunk_batch is None:
+                failed.extend(chunk)
+                continue
+            batch.extend(chunk_batch)
+            if len(chunk_batch) < len(chunk):
+                returned = set(chunk_batch.location_ids)
+                failed.extend(i for i in chunk if i not in returned)
+        return batch, failed
+
+    async def _fetch_group(
+        self,
+        session: aiohttp.ClientSession,
+        limit: asyncio.Semaphore,
+        chunk: List[str],
+        units: str,
+    ) -> Optional[WeatherDataBatch]:
+        params = {"id": ",".join(chunk), "appid": self.api_key, "units": units}
+        try:
+            async with limit:
+                async with session.get(
+                    f"{self.observation_url}/group", params=params
+                ) as response:
+                    if response.status != 200:
+                        logger.error(
+                            "Group query for %d cities failed: %s",
+                            len(chunk),
+                            response.status,
+                        )
+                        return None
+                    data = await response.json()
+            return self._parse_weather_batch(data["list"])
+        except Exception as e:
+            logger.error("Failed to fetch group of %d cities: %s", len(chunk), e)
+            return None
+
+    def _parse_weather_data(
+        self, data: Dict, location_id: str, trusted: bool = False
+    ) -> WeatherData:
+        """Parse OpenWeatherMap JSON response into WeatherData model.
+
+        With ``trusted`` the numbers decoded from the upstream JSON are used as-is
+        and model validation is skipped.
+        """
+        main = data["main"]
+        fields = dict(
             location_id=location_id,
-            temperature=data["main"]["temp"],
-            humidity=data["main"]["humidity"],
+            temperature=float(main["temp"]),
+            humidity=float(main["humidity"]),
             condition=data["weather"][0]["main"],
-            timestamp=datetime.utcnow(),
-            wind_speed=data["wind"]["speed"],
-            pressure=data["main"]["pressure"],
+            timestamp=datetime.now(UTC),
+            wind_speed=float(data["wind"]["speed"]),
+            pressure=float(main["pressure"]),
         )
-    async def fetch_onecall_data(
+        if trusted:
+            return WeatherData.from_trusted(**fields)
+        return WeatherData(**fields)
+
+    def _parse_weather_batch(
+        self, items: Iterable[Dict], batch: Optional[WeatherDataBatch] = None
+    ) -> WeatherDataBatch:
+        """Append OpenWeatherMap observations to a batch without building models."""
+        if batch is None:
+            batch = WeatherDataBatch()
+        timestamp = datetime.now(UTC)
+        for data in items:
+            main = data["main"]
+            batch.append(
+                str(data["id"]),
+                float(main["temp"]),
+                float(main["humidity"]),
+                data["weather"][0]["main"],
+                timestamp,
+                float(data["wind"]["speed"]),
+                float(main["pressure"]),
+            )
+        return batch
+
+    def _onecall_params(
         self,
         lat: float,
         lon: float,
-        units: str = "metric",
-        exclude: Optional[str] = None,
-        api_key: Optional[str] = None,
-    ):
-        """Fetch weather data from OpenWeather OneCall API 3.0"""
-        base_url = "https://api.openweathermap.org/data/3.0/onecall"
-
+        units: str,
+        exclude: Optional[str],
+        api_key: Optional[str],
+    ) -> Dict:
         params = {
             "lat": lat,
             "lon": lon,
@@ -68,9 +163,22 @@ class WeatherService:
         if exclude is not None:
             params["exclude"] = exclude
 
+        return params
+
+    async def fetch_onecall_data(
+        self,
+        lat: float,
+        lon: float,
+        units: str = "metric",
+        exclude: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ):
+        """Fetch weather data from OpenWeather OneCall API 3.0"""
+        params = self._onecall_params(lat, lon, units, exclude, api_key)
+
         try:
             async with aiohttp.ClientSession() as session:
-                async with session.get(base_url, params=params) as response:
+                async with session.get(self.base_url, params=params) as response:
                     if response.status == 200:
                         return await response.json()
                     logger.error(f"OpenWeather API error: {response.status}")
@@ -78,3 +186,36 @@ class WeatherService:
         except Exception as e:
             logger.error(f"Failed to fetch onecall data: {e}")
             return None
+
+    async def fetch_onecall_raw(
+        self,
+        lat: float,
+        lon: float,
+        units: str = "metric",
+        exclude: Optional[str] = None,
+        api_key: Optional[str] = None,
+    ) -> Optional[RawForecast]:
+        """Fetch OneCall data as the unparsed response body
+
+        Failures raise ``UpstreamError`` classified by status or timeout, so
+        callers can decide how long to remember them.
+        """
+        params = self._onecall_params(lat, lon, units, exclude, api_key)
+
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(self.base_url, params=params) as response:
+                    if response.status == 200:
+                        return RawForecast(await response.read())
+                    logger.error("OpenWeather API error: %s", response.status)
+                    raise UpstreamError.from_status(
+                        response.status, response.headers.get("Retry-After")
+                    )
+        except UpstreamError:
+            raise
+        except asyncio.TimeoutError as e:
+            logger.error("Timed out fetching onecall data: %s", e)
+            raise UpstreamError(UpstreamError.TIMEOUT) from e
+        except Exception as e:
+            logger.error("Failed to fetch onecall data: %s", e)
+            raise UpstreamError(UpstreamError.SERVER_ERROR) from e
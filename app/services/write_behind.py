@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+from app.models.forecast import RawForecast
+from app.services.metrics import metrics
+from app.services.storage_service import ForecastStorage
+
+logger = logging.getLogger(__name__)
+
+BATCH_WRITE_LIMIT = 25  # DynamoDB BatchWriteItem maximum
+
+
+class WriteBehindQueue:
+    """Buffers forecast writes and persists them in the background.
+
+    Writes are keyed by ``location_key``, so repeated writes for a location
+    before a flush collapse into the latest one. Pending writes are bounded by
+    ``max_pending``; when full, the oldest write is dropped, which only costs
+    a later storage miss. Flushes go out in ``BatchWriteItem`` groups and
+    unprocessed items are retried with exponential backoff.
+    """
+
+    def __init__(
+        self,
+        storage: ForecastStorage,
+        max_pending: int = 1000,
+        flush_interval: float = 1.0,
+        max_retries: int = 5,
+        retry_delay: float = 0.05,
+    ):
+        self.storage = storage
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self._pending: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def depth(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> None:
+        if not self.running:
+            self._closing = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the background flusher and persist everything still pending"""
+        if self._task is not None:
+            # Let an in-flight batch finish instead of cancelling it mid-write
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def enqueue(
+        self,
+        lat: float,
+        lon: float,
+        units: str,
+        forecast_data: Union[Dict[str, Any], RawForecast],
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        item = self.storage.build_item(lat, lon, units, forecast_data, ttl_seconds)
+        key = item["location_key"]
+        if key in self._pending:
+            metrics.incr("write_behind.coalesced")
+        elif len(self._pending) >= self.max_pending:
+            self._pending.popitem(last=False)
+            metrics.incr("write_behind.dropped")
+        self._pending[key] = item
+        metrics.incr("write_behind.enqueued")
+        metrics.gauge("write_behind.queue_depth", len(self._pending))
+        if len(self._pending) >= BATCH_WRITE_LIMIT:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Write-behind flush failed")
+
+    async def flush(self) -> List[Dict[str, Any]]:
+        """Write everything pending, returning the items that could not be"""
+        unwritten = []
+        while self._pending:
+            batch = [
+                self._pending.popitem(last=False)[1]
+                for _ in range(min(BATCH_WRITE_LIMIT, len(self._pending)))
+            ]
+            metrics.gauge("write_behind.queue_depth", len(self._pending))
+            start = time.perf_counter()
+            unwritten.extend(await self._write_batch(batch))
+            metrics.observe("write_behind.flush_latency", time.perf_counter() - start)
+        return unwritten
+
+    async def _write_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                unprocessed = await self.storage.batch_store_items(items)
+            except Exception as e:
+                logger.error("Batch write of %d forecasts failed: %s", len(items), e)
+                unprocessed = items
+            metrics.incr("write_behind.written", len(items) - len(unprocessed))
+            if not unprocessed:
+                return []
+            if attempt == self.max_retries:
+                break
+            metrics.incr("write_behind.retried", len(unprocessed))
+            items = unprocessed
+            await asyncio.sleep(self.retry_delay * 2**attempt)
+        metrics.incr("write_behind.failed", len(unprocessed))
+        logger.error("Gave up writing %d forecasts", len(unprocessed))
+        return unprocessed
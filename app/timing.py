@@ -0,0 +1,69 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+_current_timer: ContextVar[Optional["RequestTimer"]] = ContextVar(
+    "request_timer", default=None
+)
+
+
+class RequestTimer:
+    """Accumulates time spent in named phases of a single request"""
+
+    __slots__ = ("spans", "tier")
+
+    def __init__(self):
+        self.spans: Dict[str, float] = {}
+        # Which tier answered: cache, storage, upstream, negative, interpolated,
+        # stale
+        self.tier: Optional[str] = None
+
+    def add(self, name: str, duration: float) -> None:
+        self.spans[name] = self.spans.get(name, 0.0) + duration
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """Format as a Server-Timing header value, durations in milliseconds"""
+        metrics = [
+            f"{name};dur={duration * 1000:.1f}" for name, duration in self.spans.items()
+        ]
+        if total is not None:
+            metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def summary(self) -> str:
+        return " ".join(
+            f"{name}={duration:.3f}s" for name, duration in self.spans.items()
+        )
+
+
+def start_request_timer() -> RequestTimer:
+    """Install a timer for the current request context and return it"""
+    timer = RequestTimer()
+    _current_timer.set(timer)
+    return timer
+
+
+def current_timer() -> Optional[RequestTimer]:
+    return _current_timer.get()
+
+
+def set_tier(tier: str) -> None:
+    """Record which tier served the current request, if one is being timed"""
+    timer = _current_timer.get()
+    if timer is not None:
+        timer.tier = tier
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a phase of the current request; a no-op outside of one"""
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(name, time.perf_counter() - start)
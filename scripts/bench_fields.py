@@ -0,0 +1,66 @@
+"""Compare full forecast responses with sparse ``fields=`` selections.
+
+Measures payload size and the per-request cost of producing the body for a
+48-hour/8-day OneCall document: the raw passthrough, a full re-encode, and
+each selection both cold (compiled and encoded) and warm (served from the
+subset cache).
+
+Usage: python -m scripts.bench_fields [iterations]
+"""
+
+import sys
+import time
+from app.models.forecast import RawForecast, dumps
+from app.services.field_selection import FieldSelectionService
+from scripts.replay_traffic import fake_forecast
+
+SELECTIONS = (
+    "current.temp",
+    "current.temp,hourly[].pop",
+    "current,hourly[].dt,hourly[].temp,hourly[].pop",
+    "daily[].dt,daily[].temp.min,daily[].temp.max",
+)
+
+
+def _time(build, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        body = build()
+    return (time.perf_counter() - start) / iterations, len(body)
+
+
+def main(iterations=2000):
+    forecast = RawForecast.from_data(fake_forecast(40.7, -74.0, int(time.time())))
+    document = forecast.data
+
+    print(f"{'response':<50} {'bytes':>7} {'cold µs':>9} {'warm µs':>9}")
+    passthrough, size = _time(lambda: forecast.body, iterations)
+    print(f"{'full (cached bytes)':<50} {size:>7} {'':>9} {passthrough * 1e6:>9.2f}")
+    encoded, size = _time(lambda: dumps(document), iterations)
+    print(f"{'full (re-encoded)':<50} {size:>7} {encoded * 1e6:>9.2f} {'':>9}")
+
+    for expression in SELECTIONS:
+
+        def cold():
+            # A fresh service compiles the selector and encodes the subset
+            service = FieldSelectionService()
+            selector = service.compile(expression)
+            return service.select("key", forecast, document, selector)
+
+        service = FieldSelectionService()
+
+        def warm():
+            return service.select(
+                "key", forecast, document, service.compile(expression)
+            )
+
+        cold_time, size = _time(cold, iterations)
+        warm_time, _ = _time(warm, iterations)
+        print(
+            f"{expression:<50} {size:>7} {cold_time * 1e6:>9.2f} "
+            f"{warm_time * 1e6:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
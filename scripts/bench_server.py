@@ -0,0 +1,104 @@
+"""Compare app.server against a plain ``uvicorn app.main:app`` run.
+
+Each setup is started as a subprocess on a local port and driven by an
+aiohttp client holding ``connections`` keep-alive connections against a
+cheap endpoint, so the numbers mostly reflect server, parser and middleware
+overhead. The client runs on the same host, so use a machine with spare
+cores for absolute numbers.
+
+Usage: python -m scripts.bench_server [seconds] [connections] [path]
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+import aiohttp
+
+PORT = 8799
+
+SETUPS = {
+    "uvicorn default (asyncio, h11)": [
+        sys.executable,
+        "-m",
+        "uvicorn",
+        "app.main:app",
+        "--port",
+        str(PORT),
+        "--loop",
+        "asyncio",
+        "--http",
+        "h11",
+        "--no-access-log",
+        "--log-level",
+        "warning",
+    ],
+    "app.server": [sys.executable, "-m", "app.server"],
+}
+
+
+async def _wait_ready(url: str) -> None:
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server did not start on {url}")
+
+
+async def _load(url: str, seconds: float, connections: int):
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    connector = aiohttp.TCPConnector(limit=connections)
+    async with aiohttp.ClientSession(connector=connector) as session:
+
+        async def client():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                async with session.get(url) as response:
+                    await response.read()
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(client() for _ in range(connections)))
+    latencies.sort()
+    return latencies
+
+
+def run(name, command, seconds, connections, path):
+    env = dict(
+        os.environ,
+        SERVER_PORT=str(PORT),
+        LOG_LEVEL="WARNING",
+        LOOP_MONITOR_ENABLED="false",
+    )
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{PORT}{path}"
+    try:
+        asyncio.run(_wait_ready(url))
+        latencies = asyncio.run(_load(url, seconds, connections))
+    finally:
+        server.terminate()
+        server.wait()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(
+        f"{name:<32} {len(latencies) / seconds:>8.0f} req/s   "
+        f"p50 {p50:6.2f}ms   p99 {p99:6.2f}ms"
+    )
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    connections = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    path = sys.argv[3] if len(sys.argv) > 3 else "/health"
+    for name, command in SETUPS.items():
+        run(name, command, seconds, connections, path)
+
+
+if __name__ == "__main__":
+    main()
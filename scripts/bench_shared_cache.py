@@ -0,0 +1,96 @@
+"""Compare per-process WeatherCache with SharedMemoryCache across workers.
+
+Each forked worker serves its share of a skewed key stream, filling the cache
+on a miss as the endpoint would. Memory is the proportional set size (PSS)
+each worker gained while serving, so pages shared through the mmap are only
+counted once across workers. Linux only.
+
+Usage: python -m scripts.bench_shared_cache [workers] [requests]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+from app.models.forecast import RawForecast
+from app.services.cache_service import WeatherCache
+from app.services.shared_cache import SharedMemoryCache
+
+KEYS = 2000
+PAYLOAD_SIZE = 20_000
+
+
+def _pss_kib():
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            if line.startswith("Pss:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _payload(key):
+    filler = "x" * (PAYLOAD_SIZE - len(key) - 16)
+    return RawForecast(f'{{"key":"{key}","pad":"{filler}"}}'.encode())
+
+
+def _worker(backend, path, seed, requests, results):
+    if backend == "shared":
+        cache = SharedMemoryCache(path, slots=4096, slot_size=32768)
+    else:
+        cache = WeatherCache()
+    rng = random.Random(seed)
+    # Heavily skewed towards a few popular locations
+    weights = [1 / (rank + 1) for rank in range(KEYS)]
+    keys = rng.choices(range(KEYS), weights=weights, k=requests)
+
+    before = _pss_kib()
+    hits = 0
+    for index in keys:
+        key = f"onecall_{index}_metric"
+        if cache.get(key) is not None:
+            hits += 1
+        else:
+            cache.set(key, _payload(key))
+    results.put((hits, _pss_kib() - before))
+
+
+def run(backend, workers, requests):
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    with tempfile.TemporaryDirectory(dir="/dev/shm") as directory:
+        path = os.path.join(directory, "weather-cache")
+        if backend == "shared":
+            # Create the table up front so workers do not race on the layout
+            SharedMemoryCache(path, slots=4096, slot_size=32768).close()
+        processes = [
+            context.Process(
+                target=_worker,
+                args=(backend, path, seed, requests // workers, results),
+            )
+            for seed in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        outcomes = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    hits = sum(hits for hits, _ in outcomes)
+    memory = sum(memory for _, memory in outcomes)
+    served = (requests // workers) * workers
+    print(
+        f"{backend:<8} hit rate {hits / served:6.1%}   "
+        f"cache memory {memory / 1024:8.1f} MiB"
+    )
+
+
+def main(workers=4, requests=40_000):
+    print(f"{workers} workers, {requests} requests over {KEYS} keys")
+    run("memory", workers, requests)
+    run("shared", workers, requests)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*args)
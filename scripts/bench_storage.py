@@ -0,0 +1,75 @@
+"""Compare forecast read latency of the storage backends.
+
+Stores a batch of forecasts in each backend, then times single reads and a
+batched read of every location. DynamoDB is read from ``DYNAMODB_ENDPOINT_URL``
+(LocalStack in development) and skipped when it cannot be reached.
+
+Usage: python -m scripts.bench_storage [locations] [iterations]
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from app.models.forecast import RawForecast
+from app.services.sqlite_storage import SQLiteStorageService
+from app.services.storage_service import ForecastStorage, StorageService
+from scripts.replay_traffic import fake_forecast
+
+
+async def _bench(name: str, storage: ForecastStorage, locations, iterations: int):
+    now = int(time.time())
+    items = [
+        storage.build_item(
+            lat, lon, units, RawForecast.from_data(fake_forecast(lat, lon, now))
+        )
+        for lat, lon, units in locations
+    ]
+    unprocessed = await storage.batch_store_items(items)
+    if unprocessed:
+        print(f"{name}: {len(unprocessed)} items were not stored")
+
+    single = []
+    for i in range(iterations):
+        lat, lon, units = locations[i % len(locations)]
+        start = time.perf_counter()
+        await storage.get_forecast_raw(lat, lon, units)
+        single.append(time.perf_counter() - start)
+
+    batched = []
+    for _ in range(max(1, iterations // len(locations))):
+        start = time.perf_counter()
+        await storage.get_forecasts_raw(locations)
+        batched.append(time.perf_counter() - start)
+
+    single.sort()
+    print(
+        f"{name:<10} {statistics.median(single) * 1e6:>10.1f} "
+        f"{single[int(len(single) * 0.99) - 1] * 1e6:>10.1f} "
+        f"{statistics.median(batched) * 1e3:>12.2f}"
+    )
+
+
+async def main(count: int = 100, iterations: int = 2000):
+    locations = [(40.0 + i / 100, -74.0, "standard") for i in range(count)]
+    print(f"{'backend':<10} {'p50 µs':>10} {'p99 µs':>10} {f'batch({count}) ms':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite = SQLiteStorageService(os.path.join(directory, "bench.db"))
+        await _bench("sqlite", sqlite, locations, iterations)
+        sqlite.close()
+
+    dynamodb = StorageService()
+    try:
+        dynamodb.table.load()
+    except Exception as e:
+        print(f"{'dynamodb':<10} skipped: {e}")
+        return
+    await _bench("dynamodb", dynamodb, locations, iterations)
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    asyncio.run(main(*args))
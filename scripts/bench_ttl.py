@@ -0,0 +1,122 @@
+"""Compare upstream call volume and staleness of fixed and adaptive TTLs.
+
+Simulates a day of traffic for locations with calm, changeable and stormy
+weather, each requested once a minute by one of several workers. Every worker
+has its own cache and TTL policy and they share persistent storage, as under
+the pre-fork server. A cache miss reads storage and only fetches upstream when
+the stored copy has expired too; stored copies are cached for the life they
+have left. Reports upstream calls and the mean error of the served temperature
+against the true one, per kind of weather.
+
+Usage: python -m scripts.bench_ttl [locations] [hours] [workers]
+"""
+
+import math
+import random
+import sys
+from app.services.ttl_policy import AdaptiveTTLPolicy
+
+REQUEST_INTERVAL = 60
+BASE_TTL = 300
+STORAGE_TTL = 3600
+
+# Kind of weather -> (share of locations, temperature swing K, swing period s)
+WEATHER = {
+    "calm": (0.7, 0.5, 6 * 3600),
+    "changeable": (0.2, 3.0, 3600),
+    "stormy": (0.1, 6.0, 1200),
+}
+
+
+def _weather(kind: str, phase: float, now: float) -> dict:
+    _, swing, period = WEATHER[kind]
+    wave = math.sin(2 * math.pi * now / period + phase)
+    # A slow day/night cycle under the kind's own swings
+    temp = 288.0 + 4.0 * math.sin(2 * math.pi * now / 86400 + phase) + swing * wave
+    forecast = {
+        "current": {
+            "temp": temp,
+            "pressure": 1013 + swing * wave,
+            "wind_speed": 3.0 + swing * abs(wave),
+            "humidity": 60,
+            "weather": [{"id": 211 if kind == "stormy" and wave > 0.5 else 800}],
+        },
+        "hourly": [{"pop": 0.8 if kind == "stormy" else 0.0}] * 6,
+    }
+    if kind == "stormy" and wave > 0:
+        forecast["alerts"] = [{"event": "Thunderstorm"}]
+    return forecast
+
+
+def _simulate(locations, seconds: int, workers: int, adaptive: bool):
+    calls = {kind: 0 for kind in WEATHER}
+    error = {kind: 0.0 for kind in WEATHER}
+    served = {kind: 0 for kind in WEATHER}
+    rng = random.Random(7)
+    policies = [
+        AdaptiveTTLPolicy(base_ttl=BASE_TTL, storage_ttl=STORAGE_TTL)
+        for _ in range(workers)
+    ]
+    for key, kind, phase in locations:
+        caches = [(None, -1.0)] * workers
+        stored, stored_expires = None, -1.0
+        for now in range(0, seconds, REQUEST_INTERVAL):
+            truth = _weather(kind, phase, now)
+            worker = rng.randrange(workers)
+            policy = policies[worker]
+            cached, expires = caches[worker]
+            if now >= expires:
+                if now < stored_expires:
+                    # Storage hit, cached no longer than the stored copy lives
+                    ttl = policy.ttl_for(key) if adaptive else None
+                    cached = stored
+                    expires = min(now + (ttl or BASE_TTL), stored_expires)
+                else:
+                    cached = truth
+                    ttl = policy.observe(key, truth, now=now) if adaptive else None
+                    expires = now + (ttl or BASE_TTL)
+                    storage_ttl = policy.storage_ttl(ttl) or STORAGE_TTL
+                    stored, stored_expires = truth, now + storage_ttl
+                    calls[kind] += 1
+                caches[worker] = (cached, expires)
+            error[kind] += abs(cached["current"]["temp"] - truth["current"]["temp"])
+            served[kind] += 1
+    return calls, {kind: error[kind] / max(1, served[kind]) for kind in WEATHER}
+
+
+def main(count: int = 200, hours: int = 24, workers: int = 4):
+    rng = random.Random(42)
+    kinds = rng.choices(
+        list(WEATHER), [share for share, _, _ in WEATHER.values()], k=count
+    )
+    locations = [
+        (f"onecall_{i}_0_standard", kind, rng.uniform(0, 2 * math.pi))
+        for i, kind in enumerate(kinds)
+    ]
+    seconds = hours * 3600
+
+    fixed_calls, fixed_error = _simulate(locations, seconds, workers, False)
+    adaptive_calls, adaptive_error = _simulate(locations, seconds, workers, True)
+
+    print(
+        f"{'weather':<12} {'locations':>9} {'fixed calls':>12} {'adaptive':>9} "
+        f"{'change':>7} {'fixed err K':>12} {'adaptive':>9}"
+    )
+    for kind in WEATHER:
+        change = adaptive_calls[kind] / max(1, fixed_calls[kind]) - 1
+        print(
+            f"{kind:<12} {kinds.count(kind):>9} {fixed_calls[kind]:>12} "
+            f"{adaptive_calls[kind]:>9} {change:>+7.0%} "
+            f"{fixed_error[kind]:>12.3f} {adaptive_error[kind]:>9.3f}"
+        )
+    total_fixed = sum(fixed_calls.values())
+    total_adaptive = sum(adaptive_calls.values())
+    print(
+        f"{'total':<12} {count:>9} {total_fixed:>12} {total_adaptive:>9} "
+        f"{total_adaptive / total_fixed - 1:>+7.0%}"
+    )
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:4]]
+    main(*args)
@@ -0,0 +1,83 @@
+"""Compare the cost of building 10k observations as models and as a batch.
+
+Usage: python -m scripts.bench_weather_data [count]
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from datetime import UTC, datetime
+from app.models.weather import WeatherData, WeatherDataBatch
+
+CONDITIONS = ("Clear", "Clouds", "Rain", "Snow")
+
+
+def _observations(count):
+    return [
+        (str(index), 20.0 + index % 15, 65.0, CONDITIONS[index % 4], 3.2, 1013.0)
+        for index in range(count)
+    ]
+
+
+def _validated(rows, timestamp):
+    return [
+        WeatherData(
+            location_id=location_id,
+            temperature=temperature,
+            humidity=humidity,
+            condition=condition,
+            timestamp=timestamp,
+            wind_speed=wind_speed,
+            pressure=pressure,
+        )
+        for location_id, temperature, humidity, condition, wind_speed, pressure in rows
+    ]
+
+
+def _trusted(rows, timestamp):
+    return [
+        WeatherData.from_trusted(
+            location_id, temperature, humidity, condition, timestamp, wind, pressure
+        )
+        for location_id, temperature, humidity, condition, wind, pressure in rows
+    ]
+
+
+def _batch(rows, timestamp):
+    batch = WeatherDataBatch()
+    for location_id, temperature, humidity, condition, wind, pressure in rows:
+        batch.append(
+            location_id, temperature, humidity, condition, timestamp, wind, pressure
+        )
+    return batch
+
+
+def measure(name, build, rows, timestamp):
+    gc.collect()
+    start = time.perf_counter()
+    build(rows, timestamp)
+    elapsed = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    result = build(rows, timestamp)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+
+    print(f"{name:<12} {elapsed * 1000:8.1f} ms {current / 1024:10.1f} KiB")
+
+
+def main(count=10_000):
+    rows = _observations(count)
+    timestamp = datetime.now(UTC)
+    print(f"{count} observations")
+    print(f"{'path':<12} {'build':>11} {'retained':>14}")
+    measure("validated", _validated, rows, timestamp)
+    measure("trusted", _trusted, rows, timestamp)
+    measure("batch", _batch, rows, timestamp)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
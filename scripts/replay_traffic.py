@@ -0,0 +1,357 @@
+"""Replay request logs against an in-process app with fake dependencies.
+
+Reads the JSON lines written by ``logging_middleware`` ("Request completed"
+and "Request failed" records, which carry the path and query string), and
+replays them in recorded order through the ASGI app. OpenWeather is served
+by a local aiohttp server and DynamoDB by an in-memory table, each with a
+configurable latency, so runs are repeatable and cost nothing upstream.
+
+The report shows which tier answered each request (from ``X-Cache-Tier``),
+client-side latency percentiles and how many calls reached each fake. The
+client shares the event loop with the app, so absolute latencies are only
+comparable between runs on the same machine.
+
+Every replayed request comes from one client, and logs do not record client
+addresses, so rate limiting and admission control are off by default; they
+would otherwise reject most of the replay before it reaches the code under
+test. ``--set`` turns them back on, and overrides any other setting to
+compare cache and TTL changes. The report lists the settings used:
+
+Usage:
+    python -m scripts.replay_traffic app.log --speed 10
+    python -m scripts.replay_traffic app.log --max-rate --set CACHE_TTL_SECONDS=60
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+REPLAYED_MESSAGES = ("Request completed", "Request failed")
+
+# Settings applied unless overridden with --set
+REPLAY_DEFAULTS = {"RATE_LIMIT_ENABLED": "false", "ADMISSION_ENABLED": "false"}
+
+
+def parse_log(path: str) -> List[Tuple[float, str, str]]:
+    """``(start offset in seconds, method, path?query)`` for each logged request"""
+    requests = []
+    with open(path) as lines:
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("message") not in REPLAYED_MESSAGES or "path" not in record:
+                continue
+            started = datetime.fromisoformat(record["ts"]).timestamp() - float(
+                record.get("duration", 0)
+            )
+            target = record["path"]
+            if record.get("query"):
+                target = f"{target}?{record['query']}"
+            requests.append((started, record.get("method", "GET"), target))
+
+    requests.sort()
+    if requests:
+        first = requests[0][0]
+        requests = [
+            (start - first, method, target) for start, method, target in requests
+        ]
+    return requests
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+
+def fake_forecast(lat: float, lon: float, now: int) -> Dict[str, Any]:
+    """A OneCall-shaped document of realistic size"""
+    conditions = [{"id": 800, "main": "Clear", "description": "clear sky"}]
+    hour = now - now % 3600
+    return {
+        "lat": lat,
+        "lon": lon,
+        "timezone": "UTC",
+        "timezone_offset": 0,
+        "current": {
+            "dt": now,
+            "temp": 20.0,
+            "humidity": 60,
+            "wind_speed": 3.5,
+            "weather": conditions,
+        },
+        "hourly": [
+            {
+                "dt": hour + i * 3600,
+                "temp": 20.0 + i % 5,
+                "humidity": 60,
+                "pop": 0.1,
+                "weather": conditions,
+            }
+            for i in range(48)
+        ],
+        "daily": [
+            {
+                "dt": hour + i * 86400,
+                "temp": {"min": 15.0, "max": 25.0, "day": 21.0},
+                "pop": 0.2,
+                "weather": conditions,
+            }
+            for i in range(8)
+        ],
+    }
+
+
+class FakeOpenWeather:
+    """A local OneCall endpoint that counts calls and adds latency"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+        self._runner = None
+        self.url: Optional[str] = None
+
+    async def _onecall(self, request):
+        from aiohttp import web
+
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        lat = float(request.query.get("lat", 0))
+        lon = float(request.query.get("lon", 0))
+        return web.json_response(fake_forecast(lat, lon, int(time.time())))
+
+    async def start(self) -> None:
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/data/3.0/onecall", self._onecall)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.url = f"http://127.0.0.1:{port}/data/3.0/onecall"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class FakeDynamoDB:
+    """The subset of the boto3 table and resource APIs StorageService uses.
+
+    Calls block for ``latency`` like the real client does.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.items: Dict[str, Dict[str, Any]] = {}
+        self.calls: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def Table(self, name):
+        return self
+
+    def get_item(self, Key):
+        self.calls["get_item"] += 1
+        time.sleep(self.latency)
+        item = self.items.get(Key["location_key"])
+        return {"Item": item} if item is not None else {}
+
+    def put_item(self, Item):
+        self.calls["put_item"] += 1
+        time.sleep(self.latency)
+        with self._lock:
+            self.items[Item["location_key"]] = Item
+        return {}
+
+    def batch_get_item(self, RequestItems):
+        self.calls["batch_get_item"] += 1
+        time.sleep(self.latency)
+        keys = RequestItems["weather_forecasts"]["Keys"]
+        items = [
+            self.items[key["location_key"]]
+            for key in keys
+            if key["location_key"] in self.items
+        ]
+        return {"Responses": {"weather_forecasts": items}, "UnprocessedKeys": {}}
+
+    def batch_write_item(self, RequestItems):
+        self.calls["batch_write_item"] += 1
+        time.sleep(self.latency)
+        with self._lock:
+            for requests in RequestItems.values():
+                for request in requests:
+                    item = request["PutRequest"]["Item"]
+                    self.items[item["location_key"]] = item
+        return {"UnprocessedItems": {}}
+
+
+async def replay(
+    requests: List[Tuple[float, str, str]],
+    speed: Optional[float],
+    concurrency: int,
+    upstream_latency: float,
+    storage_latency: float,
+    reported: Iterable[str] = tuple(REPLAY_DEFAULTS),
+) -> Dict[str, Any]:
+    """Replay ``requests``, reporting the settings named in ``reported``"""
+    # Imported here so --set overrides are in the environment first
+    import httpx
+    from app.api.v1 import weather
+    from app.config import settings
+    from app.main import app
+    from app.services.storage_service import StorageService
+
+    upstream = FakeOpenWeather(upstream_latency)
+    await upstream.start()
+    dynamodb = FakeDynamoDB(storage_latency)
+    weather.weather_service.base_url = upstream.url
+    # Other storage backends (e.g. STORAGE_BACKEND=sqlite) are used as they are
+    if isinstance(weather.storage_service, StorageService):
+        weather.storage_service._dynamodb = dynamodb
+        weather.storage_service._table = dynamodb
+
+    latencies: List[float] = []
+    tiers: Counter = Counter()
+    statuses: Counter = Counter()
+    limit = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async def send(client, method, target):
+        async with limit:
+            start = time.perf_counter()
+            response = await client.request(method, target)
+            latencies.append(time.perf_counter() - start)
+        # Shed and invalid requests are answered before any tier is tried
+        tiers[response.headers.get("X-Cache-Tier", "unserved")] += 1
+        statuses[response.status_code] += 1
+
+    # Run the app's startup and shutdown hooks around the replay
+    async with app.router.lifespan_context(app):
+        # Request and slow-request logs would drown the report
+        logging.getLogger().setLevel(logging.ERROR)
+        started = time.perf_counter()
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://replay"
+        ) as client:
+            tasks = []
+            for offset, method, target in requests:
+                if speed:
+                    delay = offset / speed - (time.perf_counter() - started)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                tasks.append(asyncio.create_task(send(client, method, target)))
+            await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    await upstream.stop()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "elapsed": elapsed,
+        "tiers": dict(tiers),
+        "statuses": dict(statuses),
+        "latency": {
+            name: percentile(latencies, fraction)
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99))
+        }
+        | {"max": latencies[-1] if latencies else 0.0},
+        "upstream_calls": upstream.calls,
+        "storage_calls": dict(dynamodb.calls),
+        "settings": {name: getattr(settings, name, None) for name in reported},
+    }
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    total = report["requests"] or 1
+    print(
+        f"Replayed {report['requests']} requests in {report['elapsed']:.1f}s "
+        f"({report['requests'] / report['elapsed']:.0f} req/s)"
+    )
+    print("Tier hit ratios:")
+    for tier, count in sorted(report["tiers"].items(), key=lambda item: -item[1]):
+        print(f"  {tier:<13} {count:>8} {count / total:>7.1%}")
+    print(
+        "Latency: "
+        + "  ".join(
+            f"{name} {seconds * 1000:.1f}ms"
+            for name, seconds in report["latency"].items()
+        )
+    )
+    print(f"Statuses: {report['statuses']}")
+    print(f"Upstream calls: {report['upstream_calls']}")
+    print(f"Storage calls: {report['storage_calls']}")
+    print(
+        "Settings: "
+        + "  ".join(f"{name}={value}" for name, value in report["settings"].items())
+    )
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("log", help="JSON request log written by the API")
+    timing = parser.add_mutually_exclusive_group()
+    timing.add_argument(
+        "--speed", type=float, default=1.0, help="Multiple of the recorded rate"
+    )
+    timing.add_argument(
+        "--max-rate", action="store_true", help="Ignore recorded timing"
+    )
+    parser.add_argument("--concurrency", type=int, default=256)
+    parser.add_argument("--upstream-latency", type=float, default=0.15)
+    parser.add_argument("--storage-latency", type=float, default=0.005)
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Override a setting for this run, e.g. CACHE_TTL_SECONDS=60",
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    overrides = dict(REPLAY_DEFAULTS)
+    for override in args.set:
+        name, _, value = override.partition("=")
+        overrides[name] = value
+    os.environ.update(overrides)
+    # The fakes need no credentials, but Settings requires them to be set
+    for name in ("OPENWEATHER_API_KEY", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"):
+        os.environ.setdefault(name, "replay")
+
+    requests = parse_log(args.log)
+    if not requests:
+        sys.exit(f"No replayable requests found in {args.log}")
+    report = asyncio.run(
+        replay(
+            requests,
+            None if args.max_rate else args.speed,
+            args.concurrency,
+            args.upstream_latency,
+            args.storage_latency,
+            sorted(overrides),
+        )
+    )
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
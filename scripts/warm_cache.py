@@ -0,0 +1,294 @@
+"""Warm the weather_forecasts table ahead of expected traffic.
+
+Points come from a bounding box sampled at a grid resolution, or from a file
+with one ``lat,lon`` per line. Points already fresh in storage are found with
+batched reads and skipped; the rest are fetched from OpenWeather by a bounded
+pool of workers sharing a requests-per-minute budget, and written in
+BatchWriteItem groups.
+
+Fetched points are appended to a checkpoint file, with the time, once their
+batch is written, leaving out any whose write failed, so an interrupted run
+picks up where it left off. Entries older than the storage TTL are ignored,
+as their stored copies have expired, and a run that finishes without
+failures removes the file. Forecasts are warmed in the canonical units the
+API stores; other units are converted from them on request.
+
+Usage:
+    python -m scripts.warm_cache --bbox -74.3,40.5,-73.7,40.9 --resolution 0.05
+    python -m scripts.warm_cache --coords points.txt --rpm 600 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Iterable, List, Optional, Set, Tuple
+from app.config import settings
+from app.exceptions import UpstreamError
+from app.services.metrics import metrics
+from app.services.storage_service import (
+    BATCH_GET_LIMIT,
+    ForecastStorage,
+    create_storage_service,
+)
+from app.services.unit_conversion import CANONICAL_UNITS
+from app.services.weather_service import WeatherService
+from app.services.write_behind import BATCH_WRITE_LIMIT, WriteBehindQueue
+
+Point = Tuple[float, float]
+
+# Rounded so keys match the coordinates clients send for the same grid point
+COORDINATE_DECIMALS = 4
+MAX_ATTEMPTS = 3
+
+
+def grid_points(bbox: str, resolution: float) -> List[Point]:
+    min_lon, min_lat, max_lon, max_lat = (float(part) for part in bbox.split(","))
+    rows = int((max_lat - min_lat) / resolution + 1e-9) + 1
+    cols = int((max_lon - min_lon) / resolution + 1e-9) + 1
+    return [
+        (
+            round(min_lat + row * resolution, COORDINATE_DECIMALS),
+            round(min_lon + col * resolution, COORDINATE_DECIMALS),
+        )
+        for row in range(rows)
+        for col in range(cols)
+    ]
+
+
+def read_points(path: str) -> List[Point]:
+    points = []
+    with open(path) as lines:
+        for line in lines:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                lat, lon = (float(part) for part in line.split(","))
+                points.append(
+                    (round(lat, COORDINATE_DECIMALS), round(lon, COORDINATE_DECIMALS))
+                )
+    return points
+
+
+class RequestBudget:
+    """Spaces upstream calls evenly to stay within a requests-per-minute quota"""
+
+    def __init__(self, rpm: float):
+        self.interval = 60.0 / rpm
+        self._next = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every worker back, e.g. after upstream asked us to slow down"""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+class CacheWarmer:
+    def __init__(
+        self,
+        units: str,
+        concurrency: int,
+        rpm: float,
+        checkpoint: str,
+        weather: WeatherService,
+        storage: ForecastStorage,
+        max_age: Optional[float] = None,
+    ):
+        self.units = units
+        self.concurrency = concurrency
+        self.budget = RequestBudget(rpm)
+        self.checkpoint = checkpoint
+        # Warmed items are stored with the default storage TTL
+        self.max_age = settings.STORAGE_TTL_SECONDS if max_age is None else max_age
+        self.weather = weather
+        self.storage = storage
+        self.writes = WriteBehindQueue(storage)
+        self.fetched = 0
+        self.skipped = 0
+        self.failed = 0
+        self.unwritten = 0
+        self._unflushed: List[str] = []
+        self._flush_lock = asyncio.Lock()
+
+    def key(self, point: Point) -> str:
+        return f"{point[0]}_{point[1]}_{self.units}"
+
+    def load_checkpoint(self) -> Set[str]:
+        """Keys checkpointed recently enough to still be fresh in storage"""
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return set()
+        cutoff = time.time() - self.max_age
+        done = set()
+        with open(self.checkpoint) as lines:
+            for line in lines:
+                key, _, written = line.strip().partition(" ")
+                try:
+                    if float(written) > cutoff:
+                        done.add(key)
+                except ValueError:
+                    continue  # Cut short by a crash
+        return done
+
+    def _record(self, keys: Iterable[str]) -> None:
+        if self.checkpoint:
+            now = int(time.time())
+            with open(self.checkpoint, "a") as done:
+                done.writelines(f"{key} {now}\n" for key in keys)
+
+    async def _flush(self) -> None:
+        # Checkpoint only what has been written, so a crash or a failed
+        # write never skips a point on the next run
+        async with self._flush_lock:
+            keys, self._unflushed = self._unflushed, []
+            unwritten = {item["location_key"] for item in await self.writes.flush()}
+            self.unwritten += len(unwritten)
+            if unwritten:
+                # Keys enqueued during the flush may have gone out with it
+                self._unflushed = [k for k in self._unflushed if k not in unwritten]
+            self._record(key for key in keys if key not in unwritten)
+
+    async def _skip_fresh(self, points: List[Point]) -> List[Point]:
+        """Points not fresh in storage.
+
+        Fresh ones are not checkpointed: their stored copies may expire well
+        before one this run writes, and checking them again is cheap.
+        """
+        stale = []
+        for start in range(0, len(points), BATCH_GET_LIMIT):
+            chunk = points[start : start + BATCH_GET_LIMIT]
+            stored = await self.storage.get_forecasts_raw(
+                [(lat, lon, self.units) for lat, lon in chunk]
+            )
+            missing = [p for p, found in zip(chunk, stored) if not found]
+            self.skipped += len(chunk) - len(missing)
+            stale.extend(missing)
+        return stale
+
+    async def _warm(self, point: Point) -> None:
+        lat, lon = point
+        forecast = None
+        for _ in range(MAX_ATTEMPTS):
+            await self.budget.wait()
+            try:
+                forecast = await self.weather.fetch_onecall_raw(lat, lon, self.units)
+                break
+            except UpstreamError as e:
+                if e.kind == UpstreamError.CLIENT_ERROR:
+                    break
+                if e.kind == UpstreamError.RATE_LIMITED:
+                    self.budget.pause(e.retry_after or 60)
+
+        if not forecast:
+            self.failed += 1
+            return
+        self.writes.enqueue(lat, lon, self.units, forecast)
+        self.fetched += 1
+        self._unflushed.append(self.key(point))
+        if self.writes.depth >= BATCH_WRITE_LIMIT:
+            await self._flush()
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            point = await queue.get()
+            try:
+                await self._warm(point)
+            except Exception as e:
+                self.failed += 1
+                print(f"Error warming {point}: {e}", file=sys.stderr)
+            finally:
+                queue.task_done()
+
+    async def _report(self, total: int, interval: float) -> None:
+        start = time.monotonic()
+        while True:
+            await asyncio.sleep(interval)
+            self._print_progress(total, time.monotonic() - start)
+
+    def _print_progress(self, total: int, elapsed: float) -> None:
+        done = self.fetched + self.skipped + self.failed
+        rate = self.fetched / elapsed if elapsed else 0.0
+        eta = (total - done) / (done / elapsed) if done and elapsed else 0.0
+        print(
+            f"{done}/{total} points | fetched {self.fetched} | skipped "
+            f"{self.skipped} | failed {self.failed} | {rate:.1f} fetches/s | "
+            f"ETA {eta:.0f}s"
+        )
+
+    async def run(self, points: List[Point], progress_interval: float = 5.0) -> None:
+        done = self.load_checkpoint()
+        todo = [point for point in points if self.key(point) not in done]
+        print(f"{len(points)} points, {len(points) - len(todo)} already checkpointed")
+        total = len(todo)
+        start = time.monotonic()
+        todo = await self._skip_fresh(todo)
+        print(f"{self.skipped} already fresh in storage, {len(todo)} to fetch")
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for point in todo:
+            queue.put_nowait(point)
+        workers = [
+            asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)
+        ]
+        reporter = asyncio.create_task(self._report(total, progress_interval))
+        try:
+            await queue.join()
+        finally:
+            for task in workers + [reporter]:
+                task.cancel()
+            await self._flush()
+
+        self._print_progress(total, time.monotonic() - start)
+        lost = metrics.counters.get("write_behind.failed", 0)
+        if lost:
+            print(f"{lost} forecasts could not be written to storage")
+        if self.checkpoint and os.path.exists(self.checkpoint):
+            if self.failed or self.unwritten:
+                print(f"Checkpoint kept in {self.checkpoint}, run again to retry")
+            else:
+                # Everything is warmed; the next run starts from scratch
+                os.remove(self.checkpoint)
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--bbox", help="min_lon,min_lat,max_lon,max_lat")
+    source.add_argument("--coords", help="File with one lat,lon per line")
+    parser.add_argument("--resolution", type=float, default=0.1, help="Degrees")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rpm", type=float, default=60, help="Upstream requests/min")
+    parser.add_argument(
+        "--checkpoint", default=".warm_cache.checkpoint", help="'' to disable"
+    )
+    parser.add_argument("--progress-interval", type=float, default=5.0)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    points = (
+        grid_points(args.bbox, args.resolution)
+        if args.bbox
+        else read_points(args.coords)
+    )
+    warmer = CacheWarmer(
+        CANONICAL_UNITS,
+        args.concurrency,
+        args.rpm,
+        args.checkpoint,
+        WeatherService(),
+        create_storage_service(),
+    )
+    asyncio.run(warmer.run(points, args.progress_interval))
+
+
+if __name__ == "__main__":
+    main()
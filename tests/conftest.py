@@ -0,0 +1,17 @@
+import pytest
+from app.services.rate_limiter import rate_limiter
+from app.services.ttl_policy import ttl_policy
+
+
+@pytest.fixture(autouse=True)
+def reset_rate_limits():
+    # Every test client shares one address, so budgets must not carry over
+    rate_limiter.reset()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_ttl_policy():
+    # Learned TTLs would otherwise depend on which tests ran before
+    ttl_policy.reset()
+    yield
@@ -0,0 +1,168 @@
+import os
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.memory_profiler import allocation_tracker
+from app.services.admission import admission
+from app.services.metrics import metrics
+from app.services.ttl_policy import ttl_policy
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+@pytest.fixture
+def mock_settings():
+    with patch("app.api.v1.diagnostics.settings") as mock:
+        mock.DIAGNOSTICS_ENABLED = True
+        mock.DIAGNOSTICS_TOKEN = "secret"
+        mock.MEMORY_SIZE_SAMPLE = 100
+        yield mock
+
+
+class TestDiagnostics:
+    def test_disabled_by_default(self, client):
+        response = client.get("/api/v1/diagnostics/metrics")
+
+        assert response.status_code == 404
+
+    def test_requires_token(self, client, mock_settings):
+        response = client.get(
+            "/api/v1/diagnostics/metrics", headers={"X-Diagnostics-Token": "wrong"}
+        )
+
+        assert response.status_code == 403
+
+    def test_metrics(self, client, mock_settings):
+        # Arrange
+        metrics.incr("test.requests", 3)
+
+        # Act
+        response = client.get(
+            "/api/v1/diagnostics/metrics", headers={"X-Diagnostics-Token": "secret"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["counters"]["test.requests"] >= 3
+
+    def test_admission_limit_override(self, client, mock_settings):
+        # Arrange
+        headers = {"X-Diagnostics-Token": "secret"}
+        original = admission.misses.limit
+
+        # Act
+        try:
+            response = client.put(
+                "/api/v1/diagnostics/admission/miss",
+                params={"limit": 8},
+                headers=headers,
+            )
+            snapshot = client.get("/api/v1/diagnostics/admission", headers=headers)
+        finally:
+            admission.misses.set_limit(original)
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["limit"] == 8
+        assert snapshot.json()["miss"]["limit"] == 8
+
+    def test_admission_unknown_class(self, client, mock_settings):
+        response = client.put(
+            "/api/v1/diagnostics/admission/other",
+            params={"limit": 8},
+            headers={"X-Diagnostics-Token": "secret"},
+        )
+
+        assert response.status_code == 404
+
+    def test_loop_lag(self, client, mock_settings):
+        response = client.get(
+            "/api/v1/diagnostics/loop", headers={"X-Diagnostics-Token": "secret"}
+        )
+
+        assert response.status_code == 200
+        assert set(response.json()) >= {"count", "max_ms", "histogram", "blocked"}
+
+    def test_ttl_policy(self, client, mock_settings):
+        # Arrange
+        ttl_policy.observe("onecall_1_2_standard", {"alerts": [{"event": "Storm"}]})
+
+        # Act
+        response = client.get(
+            "/api/v1/diagnostics/ttl", headers={"X-Diagnostics-Token": "secret"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["locations"] == 1
+        assert response.json()["relative_upstream_rate"] == 2.5
+
+    def test_memory(self, client, mock_settings):
+        # Arrange
+        ttl_policy.observe("onecall_1_2_standard", {"current": {"temp": 280.0}})
+
+        # Act
+        response = client.get(
+            "/api/v1/diagnostics/memory", headers={"X-Diagnostics-Token": "secret"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["pid"] == os.getpid()
+        assert body["tracing"] is False
+        structures = {entry["name"]: entry for entry in body["structures"]}
+        assert structures["ttl_policy"]["entries"] == 1
+        assert structures["ttl_policy"]["bytes"] > 0
+        assert {"weather_cache", "write_behind", "rate_limiter"} <= set(structures)
+
+    def test_allocation_tracing(self, client, mock_settings):
+        # Arrange
+        headers = {"X-Diagnostics-Token": "secret", "X-Worker-Pid": str(os.getpid())}
+
+        # Act
+        try:
+            started = client.post("/api/v1/diagnostics/memory/tracing", headers=headers)
+            report = client.get(
+                "/api/v1/diagnostics/memory/allocations",
+                params={"limit": 3},
+                headers=headers,
+            )
+            stopped = client.delete(
+                "/api/v1/diagnostics/memory/tracing", headers=headers
+            )
+        finally:
+            allocation_tracker.stop()
+
+        # Assert
+        assert started.status_code == 200
+        assert started.json()["pid"] == os.getpid()
+        assert report.status_code == 200
+        assert report.json()["pid"] == os.getpid()
+        assert len(report.json()["top"]) <= 3
+        assert stopped.json() == {"pid": os.getpid(), "tracing": False}
+        assert not allocation_tracker.tracing
+
+    def test_allocations_require_tracing(self, client, mock_settings):
+        response = client.get(
+            "/api/v1/diagnostics/memory/allocations",
+            headers={"X-Diagnostics-Token": "secret"},
+        )
+
+        assert response.status_code == 409
+
+    def test_memory_refuses_other_worker(self, client, mock_settings):
+        # Act
+        response = client.post(
+            "/api/v1/diagnostics/memory/tracing",
+            headers={"X-Diagnostics-Token": "secret", "X-Worker-Pid": "0"},
+        )
+
+        # Assert
+        assert response.status_code == 409
+        assert response.headers["X-Worker-Pid"] == str(os.getpid())
+        assert not allocation_tracker.tracing
@@ -1,7 +1,19 @@
+import asyncio
+import time
+from datetime import timedelta
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import AsyncMock, Mock, patch
+from app.api.v1 import weather
+from app.config import settings
 from app.main import app
+from app.exceptions import UpstreamError
+from app.models.forecast import RawForecast
+from app.services.admission import ConcurrencyLimiter, admission
+from app.services.cache_service import NegativeEntry, WeatherCache
+from app.services.forecast_history import ForecastHistory
+from app.services.spatial_index import SpatialIndex
+from app.services.storage_service import StorageService
 
 
 # Test data should be in a separate fixture file
@@ -24,6 +36,7 @@ def client():
 def mock_weather_service():
     with patch("app.api.v1.weather.weather_service") as mock:
         mock.fetch_onecall_data = AsyncMock(return_value=None)  # Default to None
+        mock.fetch_onecall_raw = AsyncMock(return_value=None)
         mock.api_key = "test_key"
         yield mock
 
@@ -34,6 +47,8 @@ def mock_cache_service():
         # Use Mock instead of lambda for better assertion capabilities
         mock.get = Mock(return_value=None)
         mock.set = Mock()
+        mock.get_negative = Mock(return_value=None)
+        mock.get_stale = Mock(return_value=None)
         yield mock
 
 
@@ -41,6 +56,8 @@ def mock_cache_service():
 def mock_storage_service():
     with patch("app.api.v1.weather.storage_service") as mock:
         mock.get_forecast = AsyncMock(return_value=None)
+        mock.get_forecast_raw = AsyncMock(return_value=None)
+        mock.get_forecasts_raw = AsyncMock(return_value=[])
         mock.store_forecast = AsyncMock(return_value=True)
         yield mock
 
@@ -58,27 +75,37 @@ class TestWeatherForecast:
     ):
         """Test successful weather forecast retrieval from API"""
         # Arrange
-        mock_weather_service.fetch_onecall_data.return_value = sample_forecast
+        upstream = RawForecast(b'{"lat":40.7128,"lon":-74.006}')
+        mock_weather_service.fetch_onecall_raw.return_value = upstream
 
         # Act
         response = client.get(
             "/api/v1/weather/forecast/coordinates",
-            params={"lat": 40.7128, "lon": -74.0060},
+            params={"lat": 40.7128, "lon": -74.0060, "units": "standard"},
         )
 
         # Assert
         assert response.status_code == 200
-        assert response.json() == sample_forecast
+        assert response.content == upstream.body
+        assert response.headers["X-Cache-Tier"] == "upstream"
 
         # Verify the flow
-        mock_cache_service.get.assert_called_once_with("onecall_40.7128_-74.006_metric")
-        mock_storage_service.get_forecast.assert_awaited_once_with(
-            40.7128, -74.0060, "metric"
+        mock_cache_service.get.assert_called_once_with(
+            "onecall_40.7128_-74.006_standard"
         )
-        mock_weather_service.fetch_onecall_data.assert_awaited_once()
+        mock_storage_service.get_forecast_raw.assert_awaited_once_with(
+            40.7128, -74.0060, "standard"
+        )
+        mock_weather_service.fetch_onecall_raw.assert_awaited_once()
         mock_cache_service.set.assert_called_once_with(
-            "onecall_40.7128_-74.006_metric", sample_forecast
+            "onecall_40.7128_-74.006_standard", upstream, 300
+        )
+        # Storage keeps its copy for the full storage TTL
+        mock_storage_service.store_forecast.assert_awaited_once_with(
+            40.7128, -74.0060, "standard", upstream, ttl_seconds=3600
         )
+        # The upstream body is passed through without being parsed
+        assert not upstream.is_parsed
 
     def test_get_weather_forecast_from_cache(
         self,
@@ -101,11 +128,12 @@ class TestWeatherForecast:
         # Assert
         assert response.status_code == 200
         assert response.json() == sample_forecast
+        assert response.headers["X-Cache-Tier"] == "cache"
 
         # Verify cache hit and no further calls
         mock_cache_service.get.assert_called_once()
-        mock_storage_service.get_forecast.assert_not_awaited()
-        mock_weather_service.fetch_onecall_data.assert_not_awaited()
+        mock_storage_service.get_forecast_raw.assert_not_awaited()
+        mock_weather_service.fetch_onecall_raw.assert_not_awaited()
 
     def test_get_weather_forecast_from_storage(
         self,
@@ -117,12 +145,13 @@ class TestWeatherForecast:
     ):
         """Test weather forecast retrieval from storage"""
         # Arrange
-        mock_storage_service.get_forecast.return_value = sample_forecast
+        stored = RawForecast.from_data(sample_forecast)
+        mock_storage_service.get_forecast_raw.return_value = stored
 
         # Act
         response = client.get(
             "/api/v1/weather/forecast/coordinates",
-            params={"lat": 40.7128, "lon": -74.0060},
+            params={"lat": 40.7128, "lon": -74.0060, "units": "standard"},
         )
 
         # Assert
@@ -131,12 +160,102 @@ class TestWeatherForecast:
 
         # Verify storage hit and cache update
         mock_cache_service.get.assert_called_once()
-        mock_storage_service.get_forecast.assert_awaited_once()
-        mock_weather_service.fetch_onecall_data.assert_not_awaited()
+        mock_storage_service.get_forecast_raw.assert_awaited_once()
+        mock_weather_service.fetch_onecall_raw.assert_not_awaited()
         mock_cache_service.set.assert_called_once_with(
-            "onecall_40.7128_-74.006_metric", sample_forecast
+            "onecall_40.7128_-74.006_standard", stored, None
         )
 
+    def test_get_weather_forecast_converts_units(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test other units are converted from one standard-units fetch"""
+        # Arrange
+        upstream = RawForecast(b'{"current":{"temp":293.15,"wind_speed":10.0}}')
+        mock_weather_service.fetch_onecall_raw.return_value = upstream
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060, "units": "imperial"},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"current": {"temp": 68.0, "wind_speed": 22.37}}
+        assert response.headers["X-Cache-Tier"] == "upstream"
+        assert (
+            mock_weather_service.fetch_onecall_raw.call_args[1]["units"] == "standard"
+        )
+        mock_storage_service.store_forecast.assert_awaited_once_with(
+            40.7128, -74.0060, "standard", upstream, ttl_seconds=3600
+        )
+        cached_keys = [call.args[0] for call in mock_cache_service.set.call_args_list]
+        assert cached_keys == [
+            "onecall_40.7128_-74.006_standard",
+            "onecall_40.7128_-74.006_imperial",
+        ]
+
+    def test_get_weather_forecast_converts_cached_canonical(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test a new unit variant is served from the cached standard copy"""
+        # Arrange
+        mock_cache_service.get.side_effect = {
+            "onecall_40.7128_-74.006_standard": RawForecast(
+                b'{"current":{"temp":293.15}}'
+            )
+        }.get
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"current": {"temp": 20.0}}
+        assert response.headers["X-Cache-Tier"] == "cache"
+        mock_storage_service.get_forecast_raw.assert_not_awaited()
+        mock_weather_service.fetch_onecall_raw.assert_not_awaited()
+
+    def test_conversion_near_expiry_expires_with_canonical(
+        self, client, mock_weather_service, mock_storage_service
+    ):
+        """Test a variant converted just before the canonical copy expires is
+        not cached past it"""
+        # Arrange
+        cache = WeatherCache(ttl_seconds=300)
+        canonical_key = "onecall_40.7128_-74.006_standard"
+        cache.set(canonical_key, RawForecast(b'{"current":{"temp":293.15}}'))
+        data, timestamp = cache._cache[canonical_key]
+        cache._cache[canonical_key] = (data, timestamp - timedelta(seconds=290))
+
+        # Act
+        with patch("app.api.v1.weather.weather_cache", cache):
+            response = client.get(
+                "/api/v1/weather/forecast/coordinates",
+                params={"lat": 40.7128, "lon": -74.0060, "units": "metric"},
+            )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"current": {"temp": 20.0}}
+        # Ten seconds were left on the canonical copy, not a full TTL
+        assert 0 < cache.remaining_ttl("onecall_40.7128_-74.006_metric") <= 10
+
+    def test_get_weather_forecast_unknown_units(self, client):
+        """Test units outside metric, imperial and standard are rejected"""
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060, "units": "kelvin"},
+        )
+
+        # Assert
+        assert response.status_code == 400
+
     @pytest.mark.parametrize(
         "lat,lon,expected_status",
         [
@@ -163,12 +282,12 @@ class TestWeatherForecast:
     ):
         """Test weather forecast not found scenario"""
         # Arrange
-        mock_weather_service.fetch_onecall_data.return_value = None
+        mock_weather_service.fetch_onecall_raw.return_value = None
 
         # Act
         response = client.get(
             "/api/v1/weather/forecast/coordinates",
-            params={"lat": 40.7128, "lon": -74.0060},
+            params={"lat": 40.7128, "lon": -74.0060, "units": "standard"},
         )
 
         # Assert
@@ -177,8 +296,8 @@ class TestWeatherForecast:
 
         # Verify the flow
         mock_cache_service.get.assert_called_once()
-        mock_storage_service.get_forecast.assert_awaited_once()
-        mock_weather_service.fetch_onecall_data.assert_awaited_once()
+        mock_storage_service.get_forecast_raw.assert_awaited_once()
+        mock_weather_service.fetch_onecall_raw.assert_awaited_once()
 
     @pytest.mark.parametrize(
         "units,exclude,expected_exclude",
@@ -201,7 +320,9 @@ class TestWeatherForecast:
     ):
         """Test weather forecast retrieval with different parameters"""
         # Arrange
-        mock_weather_service.fetch_onecall_data.return_value = sample_forecast
+        mock_weather_service.fetch_onecall_raw.return_value = RawForecast.from_data(
+            sample_forecast
+        )
 
         # Act
         params = {
@@ -218,14 +339,700 @@ class TestWeatherForecast:
         # Assert
         assert response.status_code == 200
 
-        # Build expected args dict
+        # Build expected args dict, upstream is always asked for standard units
         expected_args = {
             "lat": 40.7128,
             "lon": -74.0060,
-            "units": units,
+            "units": "standard",
             "api_key": "test_key",
         }
         if expected_exclude is not None:
             expected_args["exclude"] = expected_exclude
 
-        assert mock_weather_service.fetch_onecall_data.call_args[1] == expected_args
+        assert mock_weather_service.fetch_onecall_raw.call_args[1] == expected_args
+
+
+class TestNegativeCache:
+    def test_negative_hit_skips_upstream(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test a remembered failure is returned without calling upstream"""
+        # Arrange
+        mock_cache_service.get_negative.return_value = NegativeEntry(
+            UpstreamError.SERVER_ERROR, time.time() + 10, None
+        )
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060},
+        )
+
+        # Assert
+        assert response.status_code == 503
+        assert 9 <= int(response.headers["Retry-After"]) <= 10
+        mock_weather_service.fetch_onecall_raw.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "error,status,ttl",
+        [
+            (UpstreamError(UpstreamError.RATE_LIMITED, 429, 42), 503, 42),
+            (UpstreamError(UpstreamError.RATE_LIMITED, 429, 9999), 503, 300),
+            (UpstreamError(UpstreamError.SERVER_ERROR, 502), 503, 15),
+            (UpstreamError(UpstreamError.CLIENT_ERROR, 400), 404, 60),
+        ],
+    )
+    def test_upstream_failure_sets_negative_entry(
+        self,
+        client,
+        mock_weather_service,
+        mock_cache_service,
+        mock_storage_service,
+        error,
+        status,
+        ttl,
+    ):
+        """Test upstream failures are remembered for their class TTL"""
+        # Arrange
+        mock_weather_service.fetch_onecall_raw.side_effect = error
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060},
+        )
+
+        # Assert
+        assert response.status_code == status
+        mock_cache_service.set_negative.assert_called_once_with(
+            "onecall_40.7128_-74.006_standard", error.kind, ttl, error.retry_after
+        )
+        if status == 503:
+            assert response.headers["Retry-After"] == str(ttl)
+
+
+class TestForecastVersions:
+    @pytest.fixture(autouse=True)
+    def history(self):
+        history = ForecastHistory()
+        with patch.object(settings, "FORECAST_HISTORY_ENABLED", True):
+            with patch("app.api.v1.weather.forecast_history", history):
+                yield history
+
+    def _get(self, client, **params):
+        return client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060, "units": "standard", **params},
+        )
+
+    def test_since_returns_changes(self, client, mock_cache_service):
+        """Test a known version gets a JSON Patch to the current forecast"""
+        # Arrange
+        mock_cache_service.get.return_value = RawForecast(
+            b'{"current":{"temp":290.0,"humidity":60}}'
+        )
+        version = self._get(client).headers["X-Forecast-Version"]
+        mock_cache_service.get.return_value = RawForecast(
+            b'{"current":{"temp":291.5,"humidity":60}}'
+        )
+
+        # Act
+        response = self._get(client, since=version)
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "application/json-patch+json"
+        assert response.headers["X-Forecast-Version"] != version
+        assert response.json() == [
+            {"op": "replace", "path": "/current/temp", "value": 291.5}
+        ]
+
+    def test_since_current_version_not_modified(self, client, mock_cache_service):
+        """Test polling with the current version gets an empty 304"""
+        # Arrange
+        mock_cache_service.get.return_value = RawForecast(b'{"current":{}}')
+        version = self._get(client).headers["X-Forecast-Version"]
+
+        # Act
+        response = self._get(client, since=version)
+
+        # Assert
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["X-Forecast-Version"] == version
+
+    def test_since_unknown_version_returns_full_forecast(
+        self, client, mock_cache_service
+    ):
+        """Test a version outside the history falls back to the full body"""
+        # Arrange
+        cached = RawForecast(b'{"current":{"temp":290.0}}')
+        mock_cache_service.get.return_value = cached
+
+        # Act
+        response = self._get(client, since="0123456789abcdef")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "application/json"
+        assert response.content == cached.body
+
+    def test_selections_versioned_under_cache_key(
+        self, client, mock_cache_service, history
+    ):
+        """Test field selections are forgotten along with their cache entry"""
+        # Arrange
+        mock_cache_service.get.return_value = RawForecast(
+            b'{"current":{"temp":290.0,"humidity":60}}'
+        )
+        full = self._get(client).headers["X-Forecast-Version"]
+        selected = self._get(client, fields="current.temp")
+        selected = selected.headers["X-Forecast-Version"]
+
+        # Act
+        weather._forget("onecall_40.7128_-74.006_standard")
+
+        # Assert
+        assert full != selected
+        assert len(history) == 0
+
+
+class TestFieldSelection:
+    def test_fields_selects_subset(self, client, mock_cache_service):
+        """Test only the requested paths are returned, and versioned"""
+        # Arrange
+        mock_cache_service.get.return_value = RawForecast(
+            b'{"current":{"temp":290.0,"humidity":60},"hourly":[{"dt":1,"pop":0.2}]}'
+        )
+
+        # Act
+        with patch.object(settings, "FORECAST_HISTORY_ENABLED", True):
+            response = client.get(
+                "/api/v1/weather/forecast/coordinates",
+                params={
+                    "lat": 40.7128,
+                    "lon": -74.0060,
+                    "units": "standard",
+                    "fields": "current.temp,hourly[].pop",
+                },
+            )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"current": {"temp": 290.0}, "hourly": [{"pop": 0.2}]}
+        assert "X-Forecast-Version" in response.headers
+
+    def test_invalid_fields(self, client, mock_weather_service, mock_cache_service):
+        """Test a malformed expression is rejected before any lookup"""
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060, "fields": "current..temp"},
+        )
+
+        # Assert
+        assert response.status_code == 400
+        mock_cache_service.get.assert_not_called()
+
+
+class TestInterpolation:
+    @pytest.fixture
+    def index(self):
+        index = SpatialIndex()
+        for key in [
+            "onecall_40.1_-74.1_standard",
+            "onecall_40.1_-73.9_standard",
+            "onecall_39.9_-74.0_standard",
+        ]:
+            index.add(key)
+        with patch("app.api.v1.weather.spatial_index", index):
+            yield index
+
+    def test_interpolates_from_nearby_points(
+        self,
+        client,
+        mock_weather_service,
+        mock_cache_service,
+        mock_storage_service,
+        index,
+    ):
+        """Test an uncached point is blended from the surrounding cache"""
+        # Arrange
+        neighbours = {
+            "onecall_40.1_-74.1_standard": {"current": {"dt": 1, "temp": 283.15}},
+            "onecall_40.1_-73.9_standard": {"current": {"dt": 1, "temp": 283.15}},
+            "onecall_39.9_-74.0_standard": {"current": {"dt": 1, "temp": 283.15}},
+        }
+        mock_cache_service.get.side_effect = neighbours.get
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.0, "lon": -74.0, "interpolate": True},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["X-Interpolated"] == "idw"
+        body = response.json()
+        assert body["current"]["temp"] == 10.0
+        assert (body["lat"], body["lon"]) == (40.0, -74.0)
+        assert len(body["interpolation"]["sources"]) == 3
+        mock_weather_service.fetch_onecall_raw.assert_not_called()
+
+    def test_evicted_points_read_from_storage(
+        self,
+        client,
+        mock_weather_service,
+        mock_cache_service,
+        mock_storage_service,
+        index,
+    ):
+        """Test neighbours missing from the cache are loaded from storage"""
+        # Arrange
+        mock_storage_service.get_forecasts_raw.return_value = [
+            RawForecast(b'{"current":{"dt":1,"temp":12.0}}') for _ in range(3)
+        ]
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={
+                "lat": 40.0,
+                "lon": -74.0,
+                "units": "standard",
+                "interpolate": True,
+            },
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["current"]["temp"] == 12.0
+        # One batched read for all three evicted neighbours
+        mock_storage_service.get_forecasts_raw.assert_awaited_once()
+        assert len(mock_storage_service.get_forecasts_raw.call_args[0][0]) == 3
+
+    def test_falls_back_to_upstream_without_neighbours(
+        self,
+        client,
+        mock_weather_service,
+        mock_cache_service,
+        mock_storage_service,
+        index,
+    ):
+        """Test too few surrounding points falls through to an upstream fetch"""
+        # Arrange
+        index.remove("onecall_39.9_-74.0_standard")
+        mock_weather_service.fetch_onecall_raw.return_value = RawForecast(b"{}")
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.0, "lon": -74.0, "interpolate": True},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert "X-Interpolated" not in response.headers
+        mock_weather_service.fetch_onecall_raw.assert_awaited_once()
+        assert "onecall_40.0_-74.0_standard" in index
+
+
+class TestRegion:
+    @pytest.fixture
+    def index(self, mock_cache_service):
+        index = SpatialIndex()
+        cached = {}
+        for i in range(5):
+            key = f"onecall_40.{i}_-74.0_standard"
+            index.add(key)
+            cached[key] = RawForecast(
+                b'{"current":{"dt":1,"temp":29%d.15,"weather":[{"main":"Rain"}]}}' % i
+            )
+        # A location that is indexed but no longer fresh in the cache
+        index.add("onecall_40.9_-74.0_standard")
+        mock_cache_service.get.side_effect = cached.get
+        with patch("app.api.v1.weather.spatial_index", index):
+            yield index
+
+    def test_region_summaries(self, client, index):
+        """Test fresh locations in the box are summarised"""
+        # Act
+        response = client.get(
+            "/api/v1/weather/region", params={"bbox": "-75,40.1,-73,41"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["count"] == 4
+        assert body["next_cursor"] is None
+        assert body["items"][0] == {
+            "lat": 40.1,
+            "lon": -74.0,
+            "dt": 1,
+            "temp": 18.0,
+            "humidity": None,
+            "wind_speed": None,
+            "condition": "Rain",
+        }
+
+    def test_region_pagination(self, client, index):
+        """Test cursors walk the box one page at a time"""
+        # Act
+        pages = []
+        cursor = None
+        while True:
+            params = {"bbox": "-75,40,-73,41", "limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            body = client.get("/api/v1/weather/region", params=params).json()
+            pages.append([item["lat"] for item in body["items"]])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                break
+
+        # Assert
+        assert pages == [[40.0, 40.1], [40.2, 40.3], [40.4]]
+
+    @pytest.mark.parametrize("bbox", ["1,2,3", "a,b,c,d", "-73,40,-75,41", "0,-91,1,0"])
+    def test_region_invalid_bbox(self, client, index, bbox):
+        response = client.get("/api/v1/weather/region", params={"bbox": bbox})
+
+        assert response.status_code == 400
+
+
+class TestAdmission:
+    def test_miss_rejected_when_overloaded(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test a miss beyond the limit is shed with Retry-After"""
+        # Arrange
+        limiter = ConcurrencyLimiter("miss", 1)
+        limiter.in_flight = 1
+
+        # Act
+        with patch.object(admission, "misses", limiter):
+            response = client.get(
+                "/api/v1/weather/forecast/coordinates",
+                params={"lat": 40.7128, "lon": -74.0060},
+            )
+
+        # Assert
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+        mock_storage_service.get_forecast_raw.assert_not_called()
+
+    def test_cache_hit_admitted_while_misses_saturated(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test cache hits are served while the miss path is full"""
+        # Arrange
+        mock_cache_service.get.return_value = RawForecast(b'{"lat":1}')
+        limiter = ConcurrencyLimiter("miss", 1)
+        limiter.in_flight = 1
+
+        # Act
+        with patch.object(admission, "misses", limiter):
+            response = client.get(
+                "/api/v1/weather/forecast/coordinates",
+                params={"lat": 40.7128, "lon": -74.0060},
+            )
+
+        # Assert
+        assert response.status_code == 200
+
+
+async def _stuck(*args, **kwargs):
+    await asyncio.sleep(2)
+
+
+async def _slow_miss(*args, **kwargs):
+    await asyncio.sleep(0.2)
+
+
+class TestDeadline:
+    def test_slow_upstream_times_out(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test upstream is cut off at the deadline and not negatively cached"""
+        # Arrange
+        mock_weather_service.fetch_onecall_raw.side_effect = _stuck
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060},
+            headers={"X-Request-Deadline-Ms": "300"},
+        )
+
+        # Assert
+        assert response.status_code == 504
+        assert response.headers["X-Deadline-Exhausted"] == "upstream"
+        mock_cache_service.set_negative.assert_not_called()
+
+    def test_stale_forecast_served_at_deadline(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test an expired cache entry is served when upstream runs out of time"""
+        # Arrange
+        mock_weather_service.fetch_onecall_raw.side_effect = _stuck
+        mock_cache_service.get_stale.return_value = RawForecast(b'{"lat":1}')
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060, "units": "standard"},
+            headers={"X-Request-Deadline-Ms": "300"},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {"lat": 1}
+        assert response.headers["X-Cache-Tier"] == "stale"
+        assert response.headers["X-Deadline-Exhausted"] == "upstream"
+        mock_cache_service.get_stale.assert_called_once_with(
+            "onecall_40.7128_-74.006_standard"
+        )
+
+    def test_stale_canonical_converted_not_cached(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test a stale canonical forecast is converted for other units"""
+        # Arrange
+        mock_weather_service.fetch_onecall_raw.side_effect = _stuck
+        mock_cache_service.get_stale.side_effect = lambda key: (
+            RawForecast(b'{"current":{"temp":293.15}}')
+            if key.endswith("_standard")
+            else None
+        )
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060, "units": "metric"},
+            headers={"X-Request-Deadline-Ms": "300"},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["current"]["temp"] == pytest.approx(20.0)
+        mock_cache_service.set.assert_not_called()
+
+    def test_upstream_skipped_when_storage_spends_budget(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test a tier that cannot finish in the time left is not started"""
+        # Arrange
+        mock_storage_service.get_forecast_raw.side_effect = _slow_miss
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060},
+            headers={"X-Request-Deadline-Ms": "300"},
+        )
+
+        # Assert
+        assert response.status_code == 504
+        assert response.headers["X-Deadline-Exhausted"] == "storage"
+        mock_weather_service.fetch_onecall_raw.assert_not_awaited()
+
+    def test_blocking_storage_read_bounded(
+        self, client, mock_weather_service, mock_cache_service
+    ):
+        """Test a DynamoDB read that blocks does not hold the request past its
+        deadline"""
+        # Arrange
+        storage = StorageService()
+        storage._table = Mock()
+        storage._table.get_item.side_effect = lambda **kwargs: time.sleep(1.0)
+        mock_cache_service.get_stale.return_value = RawForecast(b'{"lat":1}')
+
+        # Act
+        with patch("app.api.v1.weather.storage_service", storage):
+            response = client.get(
+                "/api/v1/weather/forecast/coordinates",
+                params={"lat": 40.7128, "lon": -74.0060},
+                headers={"X-Request-Deadline-Ms": "300"},
+            )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["X-Cache-Tier"] == "stale"
+        assert response.headers["X-Deadline-Exhausted"] == "storage"
+        # Measured in the app; the client also waits for the abandoned thread
+        assert float(response.headers["X-Response-Time"].rstrip("s")) < 0.8
+        mock_weather_service.fetch_onecall_raw.assert_not_awaited()
+
+
+class TestForecastAggregate:
+    def test_get_forecast_aggregate(
+        self,
+        client,
+        mock_weather_service,
+        mock_cache_service,
+        mock_storage_service,
+        sample_forecast,
+    ):
+        """Test aggregation over the cached hourly section"""
+        # Arrange
+        mock_cache_service.get.return_value = dict(
+            sample_forecast,
+            hourly=[
+                {"dt": 1000, "temp": 18.0, "rain": {"1h": 0.5}},
+                {"dt": 4600, "temp": 24.0},
+            ],
+        )
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/aggregate",
+            params={"lat": 40.7128, "lon": -74.0060, "threshold": 20},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["temperature"] == {"min": 18.0, "max": 24.0, "mean": 21.0}
+        assert body["precipitation"] == {"total": 0.5}
+        assert body["windows"]["above"] == [{"start": 4600, "end": 4600, "count": 1}]
+        mock_weather_service.fetch_onecall_raw.assert_not_awaited()
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"section": "minutely"},
+            {"field": "unknown", "threshold": 1},
+        ],
+    )
+    def test_get_forecast_aggregate_invalid(
+        self,
+        client,
+        mock_weather_service,
+        mock_cache_service,
+        mock_storage_service,
+        sample_forecast,
+        params,
+    ):
+        """Test aggregation with an unknown section or field"""
+        # Arrange
+        mock_cache_service.get.return_value = sample_forecast
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/aggregate",
+            params={"lat": 40.7128, "lon": -74.0060, **params},
+        )
+
+        # Assert
+        assert response.status_code == 400
+
+    def test_get_forecast_aggregate_parses_cached_body(
+        self,
+        client,
+        mock_weather_service,
+        mock_cache_service,
+        mock_storage_service,
+    ):
+        """Test aggregation parses a raw cached body only once"""
+        # Arrange
+        cached = RawForecast(b'{"hourly":[{"dt":1000,"temp":18.0}]}')
+        mock_cache_service.get.return_value = cached
+
+        # Act
+        first = client.get(
+            "/api/v1/weather/forecast/aggregate",
+            params={"lat": 40.7128, "lon": -74.0060},
+        )
+        second = client.get(
+            "/api/v1/weather/forecast/aggregate",
+            params={"lat": 40.7128, "lon": -74.0060},
+        )
+
+        # Assert
+        assert first.json() == second.json()
+        assert first.json()["temperature"]["max"] == 18.0
+        assert cached.is_parsed
+
+
+class TestAdaptiveTTL:
+    def test_alerts_shorten_ttl(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test forecasts with active alerts are cached briefly, while storage
+        keeps its usual TTL"""
+        # Arrange
+        upstream = RawForecast(
+            b'{"current":{"temp":290.0},"alerts":[{"event":"Gale"}]}'
+        )
+        mock_weather_service.fetch_onecall_raw.return_value = upstream
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060, "units": "standard"},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        mock_cache_service.set.assert_called_once_with(
+            "onecall_40.7128_-74.006_standard", upstream, 120
+        )
+        mock_storage_service.store_forecast.assert_awaited_once_with(
+            40.7128, -74.0060, "standard", upstream, ttl_seconds=3600
+        )
+        assert not upstream.is_parsed
+
+    def test_storage_hit_cached_for_remaining_life(
+        self, client, mock_weather_service, mock_cache_service, mock_storage_service
+    ):
+        """Test a stored copy is cached no longer than it had left in storage"""
+        # Arrange
+        mock_storage_service.get_forecast_raw.return_value = RawForecast(
+            b'{"lat":1}', expires_at=time.time() + 45
+        )
+
+        # Act
+        response = client.get(
+            "/api/v1/weather/forecast/coordinates",
+            params={"lat": 40.7128, "lon": -74.0060, "units": "standard"},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        key, _, ttl = mock_cache_service.set.call_args.args
+        assert key == "onecall_40.7128_-74.006_standard"
+        assert 40 <= ttl <= 45
+        mock_weather_service.fetch_onecall_raw.assert_not_awaited()
+
+
+class TestWriteBehind:
+    def test_miss_enqueues_when_write_behind_running(
+        self,
+        client,
+        mock_weather_service,
+        mock_cache_service,
+        mock_storage_service,
+        sample_forecast,
+    ):
+        """Test a miss hands the write to the write-behind queue"""
+        # Arrange
+        upstream = RawForecast.from_data(sample_forecast)
+        mock_weather_service.fetch_onecall_raw.return_value = upstream
+
+        with patch("app.api.v1.weather.write_behind") as mock_write_behind:
+            mock_write_behind.running = True
+
+            # Act
+            response = client.get(
+                "/api/v1/weather/forecast/coordinates",
+                params={"lat": 40.7128, "lon": -74.0060},
+            )
+
+        # Assert
+        assert response.status_code == 200
+        mock_write_behind.enqueue.assert_called_once_with(
+            40.7128, -74.0060, "standard", upstream, 3600
+        )
+        mock_storage_service.store_forecast.assert_not_awaited()
@@ -1,12 +1,24 @@
 import logging
+import time
 import pytest
 from fastapi import FastAPI, Request
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch
 from app.middleware.logging_middleware import logging_middleware
 from app.middleware.error_middleware import error_handling_middleware
+from app.middleware.deadline_middleware import deadline_middleware
 from app.middleware.performance_middleware import performance_middleware
-from app.exceptions import WeatherNotFoundError, WeatherAPIError
+from app.middleware.rate_limit_middleware import rate_limit_middleware
+from app.services.rate_limiter import SlidingWindowLimiter
+from app.deadline import remaining, within
+from app.exceptions import (
+    RateLimitedError,
+    ServiceOverloadedError,
+    WeatherNotFoundError,
+    WeatherAPIError,
+)
+from app.timing import set_tier, span
+from app.config import settings
 
 @pytest.fixture
 def test_app():
@@ -32,6 +44,32 @@ def test_app():
     async def weather_api_error():
         raise WeatherAPIError("Weather API error")
     
+    @app.get("/overloaded")
+    async def overloaded():
+        raise ServiceOverloadedError(7)
+    
+    @app.get("/rate-limited")
+    async def rate_limited():
+        raise RateLimitedError(5)
+    
+    @app.get("/timed")
+    async def timed_endpoint():
+        with span("cache"):
+            pass
+        return {"message": "timed"}
+    
+    @app.get("/tiered")
+    async def tiered_endpoint():
+        set_tier("cache")
+        return {"message": "tiered"}
+    
+    @app.get("/busy")
+    async def busy_endpoint():
+        end = time.perf_counter() + 0.1
+        while time.perf_counter() < end:
+            pass
+        return {"message": "busy"}
+    
     @app.get("/slow")
     async def slow_endpoint():
         import asyncio
@@ -64,6 +102,50 @@ class TestLoggingMiddleware:
         assert any("Request started" in record.message for record in caplog.records)
         assert any("Request failed" in record.message for record in caplog.records)
 
+    def test_structured_fields(self, client, caplog):
+        caplog.set_level(logging.INFO)
+        
+        response = client.get("/test")
+        
+        completed = next(
+            record for record in caplog.records if record.message == "Request completed"
+        )
+        assert completed.request_id == response.headers["X-Request-ID"]
+        assert completed.status == 200
+        assert completed.path == "/test"
+
+    def test_query_and_tier_logged(self, client, caplog):
+        caplog.set_level(logging.INFO)
+        
+        client.get("/tiered?lat=1.5&lon=2")
+        
+        completed = next(
+            record for record in caplog.records if record.message == "Request completed"
+        )
+        assert completed.query == "lat=1.5&lon=2"
+        assert completed.tier == "cache"
+
+    @patch("app.middleware.logging_middleware.log_sampler.rate", 0.0)
+    def test_sampled_out_request_not_logged(self, client, caplog):
+        caplog.set_level(logging.INFO)
+        
+        response = client.get("/test")
+        
+        assert response.status_code == 200
+        assert not any(
+            record.name == "app.middleware.logging_middleware"
+            for record in caplog.records
+        )
+
+    @patch("app.middleware.logging_middleware.log_sampler.rate", 0.0)
+    def test_sampled_out_error_still_logged(self, client, caplog):
+        caplog.set_level(logging.INFO)
+        
+        response = client.get("/error")
+        
+        assert response.status_code == 500
+        assert any("Request failed" in record.message for record in caplog.records)
+
 
 class TestErrorHandlingMiddleware:
     def test_weather_not_found_error(self, client):
@@ -78,6 +160,19 @@ class TestErrorHandlingMiddleware:
         assert response.status_code == 503
         assert response.json() == {"detail": "Weather service temporarily unavailable"}
 
+    def test_service_overloaded_error(self, client):
+        response = client.get("/overloaded")
+        
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "7"
+        assert response.json() == {"detail": "Service overloaded, please retry"}
+
+    def test_rate_limited_error(self, client):
+        response = client.get("/rate-limited")
+        
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "5"
+
     def test_unhandled_error(self, client):
         response = client.get("/error")
         
@@ -100,6 +195,55 @@ class TestPerformanceMiddleware:
         warning_message = mock_logger.warning.call_args[0][0]
         assert "Very slow request detected" in warning_message
 
+    @patch("app.middleware.performance_middleware.loop_monitor")
+    @patch("app.middleware.performance_middleware.logger")
+    def test_slow_request_reports_loop_lag(self, mock_logger, mock_monitor, client):
+        mock_monitor.max_lag_since.return_value = 0.4
+        
+        client.get("/slow")
+        
+        args = mock_logger.warning.call_args[0]
+        assert "Max loop lag" in args[0]
+        assert args[-1] == 0.4
+
+    def test_server_timing_header(self, client):
+        response = client.get("/timed")
+        
+        metrics = response.headers["Server-Timing"].split(", ")
+        assert metrics[0].startswith("cache;dur=")
+        assert metrics[-1].startswith("total;dur=")
+
+    def test_cache_tier_header(self, client):
+        assert client.get("/tiered").headers["X-Cache-Tier"] == "cache"
+        assert "X-Cache-Tier" not in client.get("/test").headers
+
+    def test_profile_header_ignored_when_disabled(self, client):
+        response = client.get("/test", headers={"X-Profile": "1"})
+        
+        assert response.json() == {"message": "success"}
+
+    @patch("app.middleware.performance_middleware.settings")
+    def test_profile_header_returns_folded_stacks(self, mock_settings, client):
+        mock_settings.PROFILING_ENABLED = True
+        mock_settings.PROFILING_TOKEN = "secret"
+        mock_settings.PROFILING_INTERVAL = 0.001
+        
+        response = client.get("/busy", headers={"X-Profile": "secret"})
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert int(response.headers["X-Profile-Samples"]) > 0
+        assert "busy_endpoint" in response.text
+
+    @patch("app.middleware.performance_middleware.settings")
+    def test_profile_header_requires_token(self, mock_settings, client):
+        mock_settings.PROFILING_ENABLED = True
+        mock_settings.PROFILING_TOKEN = "secret"
+        
+        response = client.get("/test", headers={"X-Profile": "wrong"})
+        
+        assert response.json() == {"message": "success"}
+
 class TestMiddlewareIntegration:
     def test_middleware_order(self, client):
         response = client.get("/test")
@@ -136,4 +280,131 @@ class TestMiddlewareIntegration:
         
         # Verify logging
         mock_log_logger.info.assert_called()
-        mock_perf_logger.warning.assert_called_once()
\ No newline at end of file
+        mock_perf_logger.warning.assert_called_once()
+
+
+class TestRateLimitMiddleware:
+    @pytest.fixture
+    def limited_client(self):
+        app = FastAPI()
+        app.middleware("http")(rate_limit_middleware)
+        app.middleware("http")(error_handling_middleware)
+        app.middleware("http")(performance_middleware)
+
+        @app.get("/hit")
+        async def hit():
+            set_tier("cache")
+            return {}
+
+        @app.get("/miss")
+        async def miss():
+            set_tier("upstream")
+            return {}
+
+        @app.get("/health")
+        async def health():
+            return {}
+
+        limiter = SlidingWindowLimiter(default_limit=12, routes={"/miss": 20})
+        with patch(
+            "app.middleware.rate_limit_middleware.rate_limiter", limiter
+        ), patch.object(settings, "RATE_LIMIT_API_KEYS", ["other"]):
+            yield TestClient(app)
+
+    def test_hits_limited_per_client(self, limited_client):
+        # Arrange
+        for _ in range(12):
+            assert limited_client.get("/hit").status_code == 200
+
+        # Act
+        rejected = limited_client.get("/hit")
+        other = limited_client.get("/hit", headers={"X-API-Key": "other"})
+
+        # Assert
+        assert rejected.status_code == 429
+        assert int(rejected.headers["Retry-After"]) >= 1
+        assert other.status_code == 200
+
+    def test_unknown_keys_share_address_budget(self, limited_client):
+        # Arrange
+        for i in range(12):
+            response = limited_client.get("/hit", headers={"X-API-Key": f"k{i}"})
+            assert response.status_code == 200
+
+        # Act
+        response = limited_client.get("/hit", headers={"X-API-Key": "fresh"})
+
+        # Assert
+        assert response.status_code == 429
+
+    def test_misses_cost_more(self, limited_client):
+        # Act
+        statuses = [limited_client.get("/miss").status_code for _ in range(3)]
+
+        # Assert
+        # Two misses use the 20 unit route budget, the default one is untouched
+        assert statuses == [200, 200, 429]
+        assert limited_client.get("/hit").status_code == 200
+
+    def test_exempt_paths_not_limited(self, limited_client):
+        # Act
+        statuses = {limited_client.get("/health").status_code for _ in range(20)}
+
+        # Assert
+        assert statuses == {200}
+
+
+class TestDeadlineMiddleware:
+    @pytest.fixture
+    def deadline_client(self):
+        app = FastAPI()
+        app.middleware("http")(error_handling_middleware)
+        app.middleware("http")(deadline_middleware)
+
+        @app.get("/budget")
+        async def budget():
+            return {"remaining": remaining()}
+
+        @app.get("/stuck")
+        async def stuck():
+            import asyncio
+
+            await within("upstream", asyncio.sleep(2))
+
+        return TestClient(app)
+
+    @pytest.mark.parametrize(
+        "headers,expected",
+        [
+            ({}, 5.0),
+            ({"X-Request-Deadline-Ms": "250"}, 0.25),
+            ({"X-Request-Deadline-Ms": "9999999"}, 30.0),
+            ({"X-Request-Deadline-Ms": "soon"}, 5.0),
+        ],
+    )
+    def test_budget_from_header_or_default(self, deadline_client, headers, expected):
+        # Act
+        with patch.object(settings, "REQUEST_DEADLINE", 5.0):
+            response = deadline_client.get("/budget", headers=headers)
+
+        # Assert
+        assert expected - 0.1 < response.json()["remaining"] <= expected
+
+    def test_no_deadline_by_default(self, deadline_client):
+        # Act
+        response = deadline_client.get("/budget")
+
+        # Assert
+        assert response.json()["remaining"] is None
+
+    def test_exhausted_tier_reported(self, deadline_client):
+        # Act
+        response = deadline_client.get(
+            "/stuck", headers={"X-Request-Deadline-Ms": "50"}
+        )
+
+        # Assert
+        assert response.status_code == 504
+        assert response.headers["X-Deadline-Exhausted"] == "upstream"
+        assert response.json() == {"detail": "Request deadline exceeded in upstream"}
+
@@ -0,0 +1,26 @@
+from decimal import Decimal
+from app.models.forecast import RawForecast, dumps, loads
+
+
+def test_raw_forecast_parses_lazily():
+    # Arrange
+    forecast = RawForecast(b'{"current": {"temp": 20.5}}')
+
+    # Assert
+    assert not forecast.is_parsed
+    assert forecast.data == {"current": {"temp": 20.5}}
+    assert forecast.is_parsed
+    assert forecast.data is forecast.data
+
+
+def test_raw_forecast_from_data():
+    # Act
+    forecast = RawForecast.from_data({"lat": 1.5})
+
+    # Assert
+    assert loads(forecast.body) == {"lat": 1.5}
+    assert forecast.is_parsed
+
+
+def test_dumps_decimal():
+    assert loads(dumps({"temp": Decimal("20.5")})) == {"temp": "20.5"}
@@ -0,0 +1,93 @@
+from datetime import UTC, datetime
+import pickle
+import pytest
+from pydantic import BaseModel
+from app.models.weather import WeatherData, WeatherDataBatch, WeatherRecord
+
+
+@pytest.fixture
+def observations():
+    timestamp = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+    return [
+        WeatherData(
+            location_id=str(index),
+            temperature=20.0 + index,
+            humidity=60.0,
+            condition="Clear" if index % 2 else "Clouds",
+            timestamp=timestamp,
+            wind_speed=3.5,
+            pressure=1013.0,
+        )
+        for index in range(3)
+    ]
+
+
+def test_from_trusted_matches_validated(observations):
+    # Act
+    model = WeatherData.from_trusted(**observations[0].model_dump())
+
+    # Assert
+    assert model == observations[0]
+
+
+def test_from_trusted_state_matches_validated(observations):
+    # Arrange
+    validated = observations[0]
+
+    # Act
+    model = WeatherData.from_trusted(**validated.model_dump())
+    copied = pickle.loads(pickle.dumps(model))
+
+    # Assert
+    # Every slot pydantic keeps per instance, so a new one fails here
+    for name in BaseModel.__slots__:
+        assert getattr(model, name) == getattr(validated, name)
+    assert model.model_dump_json() == validated.model_dump_json()
+    assert model.model_copy(update={"humidity": 1.0}).humidity == 1.0
+    assert copied == validated
+
+
+def test_batch_round_trip(observations):
+    # Act
+    batch = WeatherDataBatch.from_models(observations)
+
+    # Assert
+    assert len(batch) == 3
+    assert batch.to_models() == observations
+
+
+def test_batch_records(observations):
+    # Arrange
+    batch = WeatherDataBatch.from_models(observations)
+
+    # Act
+    record = batch[1]
+
+    # Assert
+    assert isinstance(record, WeatherRecord)
+    assert record.location_id == "1"
+    assert record.temperature == 21.0
+    assert record.timestamp == observations[1].timestamp
+    assert not hasattr(record, "__dict__")
+
+
+def test_batch_extend(observations):
+    # Arrange
+    batch = WeatherDataBatch.from_models(observations[:1])
+
+    # Act
+    batch.extend(WeatherDataBatch.from_models(observations[1:]))
+
+    # Assert
+    assert [record.location_id for record in batch] == ["0", "1", "2"]
+
+
+def test_from_trusted_is_mutable(observations):
+    # Arrange
+    model = WeatherData.from_trusted(**observations[0].model_dump())
+
+    # Act
+    model.temperature = 5.0
+
+    # Assert
+    assert model.temperature == 5.0
@@ -0,0 +1,163 @@
+import json
+import logging
+from unittest.mock import patch
+import aiohttp
+from app.api.v1 import weather
+from scripts.replay_traffic import (
+    REPLAY_DEFAULTS,
+    FakeDynamoDB,
+    FakeOpenWeather,
+    parse_log,
+    percentile,
+    replay,
+)
+
+
+def _record(message, ts, path="/api/v1/weather", query="", duration=0.0):
+    return json.dumps(
+        {
+            "message": message,
+            "ts": ts,
+            "method": "GET",
+            "path": path,
+            "query": query,
+            "duration": duration,
+        }
+    )
+
+
+def test_parse_log(tmp_path):
+    # Arrange
+    log = tmp_path / "app.log"
+    log.write_text(
+        "\n".join(
+            [
+                "not json",
+                _record("Request started", "2024-01-01T00:00:00+00:00"),
+                _record(
+                    "Request completed",
+                    "2024-01-01T00:00:02.500+00:00",
+                    query="lat=1.0&lon=2.0",
+                    duration=0.5,
+                ),
+                json.dumps({"message": "Request completed", "ts": "x"})[:-5],
+                json.dumps({"message": "Request completed"}),
+                _record("Request failed", "2024-01-01T00:00:01+00:00", path="/x"),
+            ]
+        )
+    )
+
+    # Act
+    requests = parse_log(str(log))
+
+    # Assert
+    # Sorted by start time, which subtracts the logged duration
+    assert requests == [
+        (0.0, "GET", "/x"),
+        (1.0, "GET", "/api/v1/weather?lat=1.0&lon=2.0"),
+    ]
+
+
+def test_parse_log_empty(tmp_path):
+    # Arrange
+    log = tmp_path / "app.log"
+    log.write_text("garbage\n{}\n")
+
+    # Act & Assert
+    assert parse_log(str(log)) == []
+
+
+def test_percentile():
+    # Act & Assert
+    assert percentile([], 0.5) == 0.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 3.0
+    assert percentile([1.0, 2.0], 0.99) == 2.0
+
+
+def test_fake_dynamodb_round_trip():
+    # Arrange
+    table = FakeDynamoDB(latency=0).Table("weather_forecasts")
+    item = {"location_key": "1.0_2.0_standard", "forecast_data": "{}"}
+
+    # Act
+    table.put_item(Item=item)
+    table.batch_write_item(
+        RequestItems={
+            "weather_forecasts": [
+                {"PutRequest": {"Item": {"location_key": "3.0_4.0_standard"}}}
+            ]
+        }
+    )
+    found = table.get_item(Key={"location_key": "1.0_2.0_standard"})
+    missing = table.get_item(Key={"location_key": "9.0_9.0_standard"})
+    batch = table.batch_get_item(
+        RequestItems={
+            "weather_forecasts": {
+                "Keys": [
+                    {"location_key": "3.0_4.0_standard"},
+                    {"location_key": "9.0_9.0_standard"},
+                ]
+            }
+        }
+    )
+
+    # Assert
+    assert found == {"Item": item}
+    assert missing == {}
+    assert batch["Responses"]["weather_forecasts"] == [
+        {"location_key": "3.0_4.0_standard"}
+    ]
+    assert table.calls == {
+        "put_item": 1,
+        "batch_write_item": 1,
+        "get_item": 2,
+        "batch_get_item": 1,
+    }
+
+
+async def test_fake_openweather_serves_onecall():
+    # Arrange
+    upstream = FakeOpenWeather(latency=0)
+    await upstream.start()
+
+    # Act
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(upstream.url, params={"lat": 1.5, "lon": 2.5}) as r:
+                status = r.status
+                body = await r.json()
+    finally:
+        await upstream.stop()
+
+    # Assert
+    assert status == 200
+    assert (body["lat"], body["lon"]) == (1.5, 2.5)
+    assert len(body["hourly"]) == 48
+    assert upstream.calls == 1
+
+
+async def test_replay_reports_settings_used():
+    # Arrange
+    # Replay points the app's services at its fakes; undo that afterwards
+    service, storage = weather.weather_service, weather.storage_service
+    root = logging.getLogger()
+    level = root.level
+
+    # Act
+    fakes = patch.multiple(storage, _dynamodb=storage._dynamodb, _table=storage._table)
+    try:
+        with patch.object(service, "base_url", service.base_url), fakes:
+            report = await replay(
+                [(0.0, "GET", "/health"), (0.0, "GET", "/health")],
+                speed=None,
+                concurrency=2,
+                upstream_latency=0,
+                storage_latency=0,
+            )
+    finally:
+        root.setLevel(level)
+
+    # Assert
+    assert report["requests"] == 2
+    assert report["statuses"] == {200: 2}
+    assert set(report["settings"]) == set(REPLAY_DEFAULTS)
@@ -0,0 +1,134 @@
+import time
+import pytest
+from app.exceptions import UpstreamError
+from app.models.forecast import RawForecast
+from app.services.sqlite_storage import SQLiteStorageService
+from scripts.warm_cache import CacheWarmer, RequestBudget
+
+
+class FakeWeather:
+    """Counts OneCall fetches, failing for the points in ``failing``"""
+
+    def __init__(self, failing=()):
+        self.failing = dict(failing)
+        self.calls = []
+
+    async def fetch_onecall_raw(self, lat, lon, units):
+        self.calls.append((lat, lon))
+        if (lat, lon) in self.failing:
+            raise UpstreamError(self.failing[(lat, lon)])
+        return RawForecast.from_data({"lat": lat, "lon": lon})
+
+
+POINTS = [(1.0, 1.0), (1.0, 2.0), (2.0, 1.0)]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorageService(str(tmp_path / "forecasts.db"))
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def checkpoint(tmp_path):
+    return tmp_path / "warm.checkpoint"
+
+
+def _warmer(weather, storage, checkpoint, max_age=None):
+    return CacheWarmer(
+        "standard", 2, 60_000, str(checkpoint), weather, storage, max_age
+    )
+
+
+async def test_budget_spaces_requests():
+    # Arrange
+    budget = RequestBudget(rpm=1200)  # 50ms apart
+
+    # Act
+    start = time.monotonic()
+    for _ in range(3):
+        await budget.wait()
+    elapsed = time.monotonic() - start
+
+    # Assert
+    assert 0.09 <= elapsed < 0.5
+
+
+async def test_budget_pause_holds_workers():
+    # Arrange
+    budget = RequestBudget(rpm=60_000)
+    budget.pause(0.1)
+
+    # Act
+    start = time.monotonic()
+    await budget.wait()
+
+    # Assert
+    assert time.monotonic() - start >= 0.09
+
+
+async def test_client_errors_stop_retries(storage, checkpoint):
+    # Arrange
+    weather = FakeWeather({(1.0, 2.0): UpstreamError.CLIENT_ERROR})
+    warmer = _warmer(weather, storage, checkpoint)
+
+    # Act
+    await warmer.run(POINTS, progress_interval=60)
+
+    # Assert
+    assert weather.calls.count((1.0, 2.0)) == 1
+    assert (warmer.fetched, warmer.failed) == (2, 1)
+
+
+async def test_checkpoint_written_and_resumed(storage, checkpoint):
+    # Arrange
+    weather = FakeWeather({(1.0, 2.0): UpstreamError.SERVER_ERROR})
+    first = _warmer(weather, storage, checkpoint)
+
+    # Act
+    await first.run(POINTS, progress_interval=60)
+    recorded = first.load_checkpoint()
+    retry = FakeWeather()
+    second = _warmer(retry, storage, checkpoint)
+    await second.run(POINTS, progress_interval=60)
+
+    # Assert
+    # The failed point stays out of the checkpoint and is all the rerun fetches
+    assert recorded == {"1.0_1.0_standard", "2.0_1.0_standard"}
+    assert retry.calls == [(1.0, 2.0)]
+    # A run that finishes without failures leaves nothing to resume
+    assert not checkpoint.exists()
+
+
+async def test_expired_checkpoint_entries_ignored(storage, checkpoint):
+    # Arrange
+    stale = int(time.time()) - 120
+    checkpoint.write_text(
+        f"1.0_1.0_standard {stale}\n1.0_2.0_standard {int(time.time())}\n2.0_1.0"
+    )
+    weather = FakeWeather()
+    warmer = _warmer(weather, storage, checkpoint, max_age=60)
+
+    # Act
+    done = warmer.load_checkpoint()
+    await warmer.run(POINTS, progress_interval=60)
+
+    # Assert
+    assert done == {"1.0_2.0_standard"}
+    assert sorted(weather.calls) == [(1.0, 1.0), (2.0, 1.0)]
+
+
+async def test_fresh_in_storage_not_checkpointed(storage, checkpoint):
+    # Arrange
+    await storage.store_forecast(1.0, 1.0, "standard", {"lat": 1.0})
+    weather = FakeWeather({(2.0, 1.0): UpstreamError.CLIENT_ERROR})
+    warmer = _warmer(weather, storage, checkpoint)
+
+    # Act
+    await warmer.run(POINTS, progress_interval=60)
+
+    # Assert
+    assert warmer.skipped == 1
+    assert (1.0, 1.0) not in weather.calls
+    assert warmer.load_checkpoint() == {"1.0_2.0_standard"}
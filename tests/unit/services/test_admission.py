@@ -0,0 +1,159 @@
+import asyncio
+import random
+import pytest
+from app.exceptions import DeadlineExceededError, ServiceOverloadedError
+from app.services.admission import AdmissionController, ConcurrencyLimiter
+from app.services.metrics import metrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+async def test_rejects_without_queue():
+    # Arrange
+    limiter = ConcurrencyLimiter("test", 1)
+    await limiter.acquire()
+
+    # Act
+    with pytest.raises(ServiceOverloadedError) as exc_info:
+        await limiter.acquire()
+
+    # Assert
+    assert exc_info.value.retry_after >= 1
+    assert metrics.counters["admission.test.rejected"] == 1
+    assert limiter.in_flight == 1
+
+
+async def test_queued_waiter_gets_released_slot():
+    # Arrange
+    limiter = ConcurrencyLimiter("test", 1, max_queue=1, queue_timeout=1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    # Act
+    limiter.release()
+    await waiter
+
+    # Assert
+    assert limiter.in_flight == 1
+    assert limiter.waiting == 0
+
+
+async def test_queue_full_and_timeout_reject():
+    # Arrange
+    limiter = ConcurrencyLimiter("test", 1, max_queue=1, queue_timeout=0.01)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    # Act & Assert
+    with pytest.raises(ServiceOverloadedError):
+        await limiter.acquire()
+    with pytest.raises(ServiceOverloadedError):
+        await waiter
+    assert limiter.waiting == 0
+    assert limiter.in_flight == 1
+
+
+async def test_wait_bounded_by_deadline():
+    # Arrange
+    limiter = ConcurrencyLimiter("test", 1, max_queue=1, queue_timeout=5.0)
+    await limiter.acquire()
+
+    # Act & Assert
+    with pytest.raises(DeadlineExceededError) as error:
+        await limiter.acquire(timeout=0.01)
+    assert error.value.tier == "admission"
+    assert limiter.waiting == 0
+
+
+async def test_raising_limit_admits_waiters():
+    # Arrange
+    limiter = ConcurrencyLimiter("test", 1, max_queue=2, queue_timeout=1, max_limit=4)
+    await limiter.acquire()
+    waiters = [asyncio.create_task(limiter.acquire()) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    # Act
+    limiter.set_limit(3)
+    await asyncio.gather(*waiters)
+
+    # Assert
+    assert limiter.in_flight == 3
+
+
+def test_adaptive_limit_follows_latency():
+    # Arrange
+    limiter = ConcurrencyLimiter(
+        "test", 10, adaptive=True, min_limit=2, max_limit=20, tolerance=2.0
+    )
+    limiter.in_flight = 40
+
+    # Act
+    for _ in range(10):
+        limiter.release(0.01)
+    grown = limiter.limit
+    for _ in range(30):
+        limiter.release(0.5)
+
+    # Assert
+    assert grown == 11
+    assert limiter.limit < grown
+
+
+def test_mixed_tiers_do_not_collapse_limit():
+    # Arrange
+    limiter = ConcurrencyLimiter(
+        "test", 32, adaptive=True, min_limit=4, max_limit=128, tolerance=2.0
+    )
+    limiter.in_flight = 10_000
+    rng = random.Random(0)
+
+    # Act
+    # Steady load: fast storage reads mixed with slower, jittery upstream calls
+    for _ in range(5000):
+        if rng.random() < 0.5:
+            limiter.release(rng.uniform(0.002, 0.006), "storage")
+        else:
+            limiter.release(rng.uniform(0.15, 0.4), "upstream")
+
+    # Assert
+    assert limiter.limit >= 32
+    assert set(limiter.snapshot()["tiers"]) == {"storage", "upstream"}
+
+
+async def test_miss_gives_back_hit_slot():
+    # Arrange
+    controller = AdmissionController(hit_limit=1, miss_limit=1)
+
+    # Act
+    async with controller.request():
+        assert controller.hits.in_flight == 1
+        async with controller.miss():
+            hits_during_miss = controller.hits.in_flight
+            misses_during_miss = controller.misses.in_flight
+
+    # Assert
+    assert hits_during_miss == 0
+    assert misses_during_miss == 1
+    assert controller.hits.in_flight == 0
+    assert controller.misses.in_flight == 0
+
+
+async def test_disabled_controller_admits_everything():
+    # Arrange
+    controller = AdmissionController(enabled=False, hit_limit=1, miss_limit=1)
+
+    # Act
+    async with controller.request():
+        async with controller.request():
+            async with controller.miss():
+                in_flight = controller.misses.in_flight
+
+    # Assert
+    assert in_flight == 0
@@ -0,0 +1,162 @@
+import pytest
+from app.services.aggregation_service import AggregationService
+
+
+@pytest.fixture
+def aggregation_service():
+    return AggregationService()
+
+
+@pytest.fixture
+def sample_forecast():
+    return {
+        "lat": 40.7128,
+        "lon": -74.0060,
+        "hourly": [
+            {"dt": 1000, "temp": 18.0, "pop": 0.1},
+            {"dt": 4600, "temp": 22.5, "pop": 0.6, "rain": {"1h": 1.5}},
+            {"dt": 8200, "temp": 24.0, "pop": 0.8, "rain": {"1h": 2.0}},
+            {"dt": 11800, "temp": 19.5, "pop": 0.2, "snow": {"1h": 0.5}},
+            {"dt": 15400, "temp": 21.0, "pop": 0.7},
+        ],
+        "daily": [
+            {"dt": 1000, "temp": {"day": 20.0, "min": 15.0, "max": 25.0}, "rain": 3.5},
+            {"dt": 87400, "temp": {"day": 22.0, "min": 17.0, "max": 27.0}},
+        ],
+    }
+
+
+class TestAggregationService:
+    def test_hourly_summary(self, aggregation_service, sample_forecast):
+        # Act
+        result = aggregation_service.aggregate("key", sample_forecast, "hourly")
+
+        # Assert
+        assert result["count"] == 5
+        assert result["start"] == 1000
+        assert result["end"] == 15400
+        assert result["temperature"] == {"min": 18.0, "max": 24.0, "mean": 21.0}
+        assert result["precipitation"] == {"total": 4.0}
+        assert "windows" not in result
+
+    def test_daily_summary_uses_min_and_max(self, aggregation_service, sample_forecast):
+        # Act
+        result = aggregation_service.aggregate("key", sample_forecast, "daily")
+
+        # Assert
+        assert result["temperature"] == {"min": 15.0, "max": 27.0, "mean": 21.0}
+        assert result["precipitation"] == {"total": 3.5}
+
+    def test_windows_above_threshold(self, aggregation_service, sample_forecast):
+        # Act
+        result = aggregation_service.aggregate(
+            "key", sample_forecast, "hourly", field="pop", threshold=0.5
+        )
+
+        # Assert
+        assert result["windows"]["above"] == [
+            {"start": 4600, "end": 8200, "count": 2},
+            {"start": 15400, "end": 15400, "count": 1},
+        ]
+
+    def test_missing_temperatures_skipped(self, aggregation_service, sample_forecast):
+        # Arrange
+        del sample_forecast["hourly"][0]["temp"]
+        del sample_forecast["hourly"][3]["temp"]
+
+        # Act
+        result = aggregation_service.aggregate(
+            "key", sample_forecast, "hourly", field="temp", threshold=20.0
+        )
+
+        # Assert
+        assert result["count"] == 5
+        assert result["temperature"] == {"min": 21.0, "max": 24.0, "mean": 22.5}
+        assert result["precipitation"] == {"total": 4.0}
+        assert result["windows"]["above"] == [
+            {"start": 4600, "end": 8200, "count": 2},
+            {"start": 15400, "end": 15400, "count": 1},
+        ]
+
+    def test_all_temperatures_missing(self, aggregation_service):
+        # Act
+        result = aggregation_service.aggregate(
+            "key", {"hourly": [{"dt": 1000}, {"dt": 4600}]}, "hourly"
+        )
+
+        # Assert
+        assert result["count"] == 2
+        assert result["temperature"] is None
+
+    def test_unknown_field(self, aggregation_service, sample_forecast):
+        with pytest.raises(ValueError):
+            aggregation_service.aggregate(
+                "key", sample_forecast, "hourly", field="nope", threshold=1
+            )
+
+    def test_empty_section(self, aggregation_service):
+        # Act
+        result = aggregation_service.aggregate("key", {"current": {}}, "hourly")
+
+        # Assert
+        assert result["count"] == 0
+        assert result["temperature"] is None
+        assert result["precipitation"] == {"total": 0.0}
+
+    def test_arrays_reused_for_same_entry(self, aggregation_service, sample_forecast):
+        # Act
+        first = aggregation_service.get_arrays("key", sample_forecast, "hourly")
+        second = aggregation_service.get_arrays("key", sample_forecast, "hourly")
+
+        # Assert
+        assert first is second
+
+    def test_arrays_rebuilt_for_new_entry(self, aggregation_service, sample_forecast):
+        # Arrange
+        first = aggregation_service.get_arrays("key", sample_forecast, "hourly")
+        refreshed = dict(sample_forecast, hourly=sample_forecast["hourly"][:2])
+
+        # Act
+        second = aggregation_service.get_arrays("key", refreshed, "hourly")
+
+        # Assert
+        assert second is not first
+        assert len(second) == 2
+
+    def test_max_entries(self, sample_forecast):
+        # Arrange
+        service = AggregationService(max_entries=1)
+
+        # Act
+        service.get_arrays("first", sample_forecast, "hourly")
+        service.get_arrays("second", sample_forecast, "hourly")
+
+        # Assert
+        assert list(service._arrays) == ["second"]
+
+    def test_hit_refreshes_recency(self, sample_forecast):
+        # Arrange
+        service = AggregationService(max_entries=2)
+        service.get_arrays("first", sample_forecast, "hourly")
+        service.get_arrays("second", sample_forecast, "hourly")
+
+        # Act
+        service.get_arrays("first", sample_forecast, "hourly")
+        service.get_arrays("third", sample_forecast, "hourly")
+
+        # Assert
+        assert list(service._arrays) == ["first", "third"]
+
+    def test_forget_and_prune(self, aggregation_service, sample_forecast):
+        # Arrange
+        for key in ("first", "second", "third"):
+            aggregation_service.get_arrays(key, sample_forecast, "hourly")
+
+        # Act
+        aggregation_service.forget("first")
+        aggregation_service.forget("unknown")
+        pruned = aggregation_service.prune(lambda key: key == "third")
+
+        # Assert
+        assert pruned == 1
+        assert list(aggregation_service._arrays) == ["third"]
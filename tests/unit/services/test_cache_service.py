@@ -1,7 +1,10 @@
+import time
 from datetime import datetime, timedelta, UTC
 from unittest.mock import patch, Mock
 import pytest
-from app.services.cache_service import WeatherCache
+from app.services.cache_service import WeatherCache, create_weather_cache
+from app.services.cache_snapshot import write_snapshot
+from app.services.spatial_index import SpatialIndex
 
 
 @pytest.fixture
@@ -110,6 +113,64 @@ def test_cleanup_expired(cache):
         assert cache.get("expired_key") is None
 
 
+def test_get_stale_within_grace_period():
+    # Arrange
+    cache = WeatherCache(ttl_seconds=10, stale_seconds=60)
+    with patch("app.services.cache_service.datetime") as mock_datetime:
+        initial_time = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        mock_datetime.now = Mock(
+            side_effect=[
+                initial_time,
+                initial_time + timedelta(seconds=30),
+                initial_time + timedelta(seconds=30),
+                initial_time + timedelta(seconds=71),
+            ]
+        )
+
+        # Act
+        cache.set("key", "data")
+        fresh = cache.get("key")
+        stale = cache.get_stale("key")
+        too_old = cache.get_stale("key")
+
+    # Assert
+    assert fresh is None
+    assert stale == "data"
+    assert too_old is None
+
+
+def test_per_key_ttl():
+    # Arrange
+    cache = WeatherCache(ttl_seconds=300)
+    with patch("app.services.cache_service.datetime") as mock_datetime:
+        initial_time = datetime(2024, 1, 1, 12, 0, tzinfo=UTC)
+        later = initial_time + timedelta(seconds=120)
+        mock_datetime.now = Mock(side_effect=[initial_time, initial_time, later, later])
+
+        # Act
+        cache.set("volatile", "storm", ttl_seconds=60)
+        cache.set("default", "calm")
+        volatile = cache.get("volatile")
+        default = cache.get("default")
+
+    # Assert
+    assert volatile is None
+    assert default == "calm"
+
+
+def test_remaining_ttl(cache):
+    # Arrange
+    cache.set("default", {"temperature": 20})
+    cache.set("short", {"temperature": 21}, ttl_seconds=30)
+    cache.set("expired", {"temperature": 22}, ttl_seconds=-1)
+
+    # Act & Assert
+    assert 299 < cache.remaining_ttl("default") <= 300
+    assert 29 < cache.remaining_ttl("short") <= 30
+    assert cache.remaining_ttl("expired") is None
+    assert cache.remaining_ttl("missing") is None
+
+
 def test_cache_ttl_initialization():
     # Arrange & Act
     custom_ttl = 600
@@ -117,3 +178,134 @@ def test_cache_ttl_initialization():
 
     # Assert
     assert cache.ttl == timedelta(seconds=custom_ttl)
+
+
+@pytest.mark.parametrize(
+    "backend,expected", [("memory", "WeatherCache"), ("shared", "SharedMemoryCache")]
+)
+def test_create_weather_cache(tmp_path, backend, expected):
+    # Arrange
+    with patch("app.services.cache_service.settings") as mock_settings:
+        mock_settings.CACHE_BACKEND = backend
+        mock_settings.CACHE_TTL_SECONDS = 60
+        mock_settings.SHARED_CACHE_PATH = str(tmp_path / "cache")
+        mock_settings.SHARED_CACHE_SLOTS = 16
+        mock_settings.SHARED_CACHE_SLOT_SIZE = 512
+        mock_settings.CACHE_STALE_SECONDS = 600
+
+        # Act
+        cache = create_weather_cache()
+
+    # Assert
+    assert type(cache).__name__ == expected
+    assert cache.ttl == timedelta(seconds=60)
+    assert cache.get_stale("missing") is None
+
+
+def test_negative_entry_set_and_get(cache):
+    # Act
+    cache.set_negative("key", "rate_limited", 30, retry_after=30)
+    entry = cache.get_negative("key")
+
+    # Assert
+    assert entry.kind == "rate_limited"
+    assert entry.retry_after == 30
+    assert 29 <= entry.remaining(datetime.now(UTC).timestamp()) <= 30
+    assert cache.get("key") is None
+
+
+def test_negative_entry_expires(cache):
+    # Arrange
+    cache.set_negative("key", "timeout", 10)
+    expired_time = datetime.now(UTC) + timedelta(seconds=11)
+
+    # Act
+    with patch("app.services.cache_service.datetime") as mock_datetime:
+        mock_datetime.now = Mock(return_value=expired_time)
+        entry = cache.get_negative("key")
+
+    # Assert
+    assert entry is None
+
+
+def test_set_clears_negative_entry(cache):
+    # Arrange
+    cache.set_negative("key", "server_error", 15)
+
+    # Act
+    cache.set("key", {"temperature": 20})
+
+    # Assert
+    assert cache.get_negative("key") is None
+
+
+def test_invalidate_and_cleanup_remove_negative_entries(cache):
+    # Arrange
+    cache.set_negative("invalidated", "client_error", 60)
+    cache.set_negative("expired", "timeout", -1)
+    cache.set_negative("active", "timeout", 60)
+
+    # Act
+    cache.invalidate("invalidated")
+    cache.cleanup_expired()
+
+    # Assert
+    assert set(cache._negative) == {"active"}
+
+
+def test_keys_include_snapshot_entries(cache, tmp_path):
+    # Arrange
+    path = str(tmp_path / "snapshot")
+    cache.set("saved", {"temperature": 20})
+    cache.save_snapshot(path)
+    restored = WeatherCache(ttl_seconds=300)
+    restored.load_snapshot(path)
+    restored.set("live", {"temperature": 21})
+
+    # Act
+    keys = restored.keys()
+
+    # Assert
+    assert sorted(keys) == ["live", "saved"]
+    restored.clear()
+
+
+def test_expired_entry_leaves_index():
+    # Arrange
+    cache = WeatherCache(ttl_seconds=300, stale_seconds=60)
+    index = SpatialIndex()
+    cache.on_remove = index.remove
+    for key in ["onecall_1.0_2.0_standard", "onecall_1.1_2.0_standard"]:
+        cache.set(key, {"temperature": 20})
+        index.add(key)
+    data, _ = cache._cache["onecall_1.0_2.0_standard"]
+    cache._cache["onecall_1.0_2.0_standard"] = (
+        data,
+        datetime.now(UTC) - timedelta(seconds=361),
+    )
+
+    # Act
+    cache.cleanup_expired()
+    cache.invalidate("onecall_1.1_2.0_standard")
+
+    # Assert
+    assert len(index) == 0
+
+
+def test_expired_snapshot_entry_leaves_index(cache, tmp_path):
+    # Arrange
+    path = str(tmp_path / "snapshot")
+    write_snapshot(path, [("onecall_1.0_2.0_standard", {"temp": 20}, time.time() + 60)])
+    cache.load_snapshot(path)
+    index = SpatialIndex()
+    cache.on_remove = index.remove
+    index.add("onecall_1.0_2.0_standard")
+
+    # Act
+    with patch("app.services.cache_service.datetime") as mock_datetime:
+        mock_datetime.now.return_value = datetime.now(UTC) + timedelta(seconds=61)
+        cache.cleanup_expired()
+
+    # Assert
+    assert len(index) == 0
+    assert cache.keys() == []
@@ -0,0 +1,168 @@
+import time
+import pytest
+from app.models.forecast import RawForecast
+from app.services.cache_service import WeatherCache
+from app.services.cache_snapshot import SnapshotReader, write_snapshot
+
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    return str(tmp_path / "cache.snapshot")
+
+
+class TestSnapshotFile:
+    def test_round_trip(self, snapshot_path):
+        # Arrange
+        expires_at = time.time() + 60
+        records = [
+            ("raw", RawForecast(b'{"lat":1}'), expires_at),
+            ("json", {"temp": 20}, expires_at),
+        ]
+
+        # Act
+        count = write_snapshot(snapshot_path, records)
+        reader = SnapshotReader(snapshot_path)
+
+        # Assert
+        assert count == 2
+        raw, raw_expiry = reader.pop("raw")
+        assert raw.body == b'{"lat":1}'
+        assert not raw.is_parsed
+        assert raw_expiry == expires_at
+        assert reader.pop("json") == ({"temp": 20}, expires_at)
+        assert len(reader) == 0
+        reader.close()
+
+    def test_expired_records_skipped(self, snapshot_path):
+        # Arrange
+        write_snapshot(
+            snapshot_path,
+            [
+                ("old", {"temp": 1}, time.time() - 1),
+                ("new", {"temp": 2}, time.time() + 60),
+            ],
+        )
+
+        # Act
+        reader = SnapshotReader(snapshot_path)
+
+        # Assert
+        assert list(reader.index) == ["new"]
+        reader.close()
+
+    def test_rejects_other_files(self, snapshot_path):
+        # Arrange
+        with open(snapshot_path, "wb") as other:
+            other.write(b"not a snapshot at all")
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            SnapshotReader(snapshot_path)
+
+    @pytest.mark.parametrize("cut", [8, 30, 60])
+    def test_rejects_truncated_files(self, snapshot_path, cut):
+        # Arrange
+        write_snapshot(
+            snapshot_path,
+            [("key", {"temp": 20, "name": "x" * 40}, time.time() + 60)],
+        )
+        with open(snapshot_path, "r+b") as snapshot:
+            snapshot.truncate(cut)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            SnapshotReader(snapshot_path)
+
+    def test_overlapping_writers(self, snapshot_path, tmp_path):
+        # Arrange
+        def records():
+            # Another worker saves to the same path halfway through this write
+            yield ("first", {"temp": 20}, time.time() + 60)
+            write_snapshot(snapshot_path, [("other", {"temp": 5}, time.time() + 60)])
+            yield ("second", {"temp": 21}, time.time() + 60)
+
+        # Act
+        count = write_snapshot(snapshot_path, records())
+        reader = SnapshotReader(snapshot_path)
+
+        # Assert
+        assert count == 2
+        assert sorted(reader.index) == ["first", "second"]
+        assert [p.name for p in tmp_path.iterdir()] == ["cache.snapshot"]
+        reader.close()
+
+
+class TestWeatherCacheSnapshot:
+    def test_restart_keeps_entries(self, snapshot_path):
+        # Arrange
+        cache = WeatherCache(ttl_seconds=300)
+        cache.set("raw", RawForecast(b'{"lat":1}'))
+        cache.set("json", {"temp": 20})
+
+        # Act
+        saved = cache.save_snapshot(snapshot_path)
+        restarted = WeatherCache(ttl_seconds=300)
+        loaded = restarted.load_snapshot(snapshot_path)
+
+        # Assert
+        assert saved == loaded == 2
+        assert restarted._cache == {}
+        assert restarted.get("raw").body == b'{"lat":1}'
+        assert restarted.get("json") == {"temp": 20}
+        assert restarted._snapshot is None
+
+    def test_remaining_ttl_preserved(self, snapshot_path):
+        # Arrange
+        expires_at = time.time() + 30
+        write_snapshot(snapshot_path, [("key", {"temp": 20}, expires_at)])
+        cache = WeatherCache(ttl_seconds=300)
+        cache.load_snapshot(snapshot_path)
+
+        # Act
+        cache.get("key")
+
+        # Assert
+        _, timestamp = cache._cache["key"]
+        assert (timestamp + cache.ttl).timestamp() == pytest.approx(expires_at)
+
+    def test_set_overrides_snapshot(self, snapshot_path):
+        # Arrange
+        write_snapshot(snapshot_path, [("key", {"temp": 20}, time.time() + 60)])
+        cache = WeatherCache()
+        cache.load_snapshot(snapshot_path)
+
+        # Act
+        cache.set("key", {"temp": 25})
+
+        # Assert
+        assert cache.get("key") == {"temp": 25}
+
+    def test_invalidate_drops_snapshot_entry(self, snapshot_path):
+        # Arrange
+        write_snapshot(snapshot_path, [("key", {"temp": 20}, time.time() + 60)])
+        cache = WeatherCache()
+        cache.load_snapshot(snapshot_path)
+
+        # Act
+        cache.invalidate("key")
+
+        # Assert
+        assert cache.get("key") is None
+
+    def test_resave_keeps_unrequested_entries(self, snapshot_path):
+        # Arrange
+        write_snapshot(snapshot_path, [("cold", {"temp": 20}, time.time() + 60)])
+        cache = WeatherCache()
+        cache.load_snapshot(snapshot_path)
+        cache.set("hot", {"temp": 25})
+
+        # Act
+        cache.save_snapshot(snapshot_path)
+
+        # Assert
+        assert cache.get("cold") == {"temp": 20}
+        restarted = WeatherCache()
+        assert restarted.load_snapshot(snapshot_path) == 2
+
+    def test_missing_snapshot(self, snapshot_path):
+        assert WeatherCache().load_snapshot(snapshot_path) == 0
@@ -0,0 +1,113 @@
+import pytest
+from app.services.field_selection import FieldSelectionService
+
+
+@pytest.fixture
+def service():
+    return FieldSelectionService(max_paths=4, max_subsets=2)
+
+
+@pytest.fixture
+def forecast():
+    return {
+        "lat": 40.7,
+        "current": {"dt": 1000, "temp": 20.5, "weather": [{"main": "Clear"}]},
+        "hourly": [
+            {"dt": 1000, "temp": 20.0, "pop": 0.1},
+            {"dt": 4600, "temp": 21.0},
+        ],
+        "daily": [{"dt": 1000, "temp": {"min": 15.0, "max": 25.0}}],
+    }
+
+
+def test_select_dotted_paths(service, forecast):
+    # Arrange
+    selector = service.compile("current.temp,hourly[].pop,daily[].temp.max")
+
+    # Act
+    selected = selector.apply(forecast)
+
+    # Assert
+    assert selected == {
+        "current": {"temp": 20.5},
+        "hourly": [{"pop": 0.1}, {}],
+        "daily": [{"temp": {"max": 25.0}}],
+    }
+
+
+def test_whole_section_shared_not_copied(service, forecast):
+    # Arrange
+    selector = service.compile("current,current.temp,lat")
+
+    # Act
+    selected = selector.apply(forecast)
+
+    # Assert
+    assert selected["current"] is forecast["current"]
+    assert selected["lat"] == 40.7
+
+
+def test_equivalent_expressions_share_selector(service):
+    # Act
+    first = service.compile("hourly[].pop, current.temp")
+    second = service.compile("current.temp,hourly[].pop")
+
+    # Assert
+    assert first.expression == second.expression
+    assert service.compile("current.temp,hourly[].pop") is second
+
+
+@pytest.mark.parametrize(
+    "expression", ["", " , ", "current..temp", "hourly[0].pop", "a,b,c,d,e"]
+)
+def test_invalid_expressions(service, expression):
+    # Act & Assert
+    with pytest.raises(ValueError):
+        service.compile(expression)
+
+
+def test_subsets_cached_per_payload(service, forecast):
+    # Arrange
+    selector = service.compile("current.temp")
+
+    # Act
+    first = service.select("key", forecast, forecast, selector)
+    again = service.select("key", forecast, forecast, selector)
+    refreshed = dict(forecast, current={"temp": 22.0})
+    updated = service.select("key", refreshed, refreshed, selector)
+
+    # Assert
+    assert first is again
+    assert first == b'{"current":{"temp":20.5}}'
+    assert updated == b'{"current":{"temp":22.0}}'
+
+
+def test_forget_drops_subsets_of_key(service, forecast):
+    # Arrange
+    current = service.compile("current.temp")
+    hourly = service.compile("hourly[].pop")
+    service.select("key", forecast, forecast, current)
+    service.select("key", forecast, forecast, hourly)
+
+    # Act
+    service.forget("key")
+    service.forget("unknown")
+
+    # Assert
+    assert len(service._subsets) == 0
+    assert service._expressions == {}
+
+
+def test_eviction_and_prune_keep_index_in_step(service, forecast):
+    # Arrange
+    selector = service.compile("current.temp")
+    for key in ("first", "second", "third"):
+        service.select(key, forecast, forecast, selector)
+
+    # Act
+    pruned = service.prune(lambda key: key == "third")
+
+    # Assert
+    assert pruned == 1
+    assert list(service._subsets) == [("third", "current.temp")]
+    assert list(service._expressions) == ["third"]
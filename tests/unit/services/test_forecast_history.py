@@ -0,0 +1,145 @@
+import copy
+import pytest
+from app.models.forecast import dumps, loads
+from app.services.forecast_history import (
+    ForecastHistory,
+    apply_patch,
+    diff,
+    version_of,
+)
+
+
+def _forecast(hour=0, temp=20.0):
+    start = 3600 * hour
+    return {
+        "lat": 40.0,
+        "current": {"dt": start, "temp": temp, "weather": [{"main": "Clear"}]},
+        "hourly": [{"dt": start + i * 3600, "temp": 20.0 + hour + i} for i in range(6)],
+    }
+
+
+@pytest.fixture
+def history():
+    return ForecastHistory(max_versions=3)
+
+
+def test_diff_round_trip():
+    # Arrange
+    old = _forecast()
+    new = copy.deepcopy(old)
+    new["current"]["temp"] = 21.5
+    new["current"]["rain"] = {"1h": 0.2}
+    del new["lat"]
+    new["hourly"].pop()
+
+    # Act
+    ops = diff(old, new)
+
+    # Assert
+    assert apply_patch(old, ops) == new
+    assert {"op": "replace", "path": "/current/temp", "value": 21.5} in ops
+    assert old == _forecast()
+
+
+def test_diff_aligns_rolled_timeline():
+    # Arrange
+    old = _forecast(hour=0)
+    new = _forecast(hour=2)
+    new["hourly"][-1]["temp"] = 30.0
+
+    # Act
+    ops = diff(old["hourly"], new["hourly"], "/hourly")
+
+    # Assert
+    # Two expired entries, none of the overlapping ones changed, two new ones
+    assert [op["op"] for op in ops] == ["remove", "remove", "add", "add"]
+    assert apply_patch(old, diff(old, new)) == new
+
+
+def test_diff_escapes_keys():
+    # Act
+    ops = diff({"a/b": 1}, {"a/b": 2, "~": 3})
+
+    # Assert
+    assert {"op": "replace", "path": "/a~1b", "value": 2} in ops
+    assert apply_patch({"a/b": 1}, ops) == {"a/b": 2, "~": 3}
+
+
+def test_record_returns_content_version(history):
+    # Arrange
+    body = dumps(_forecast())
+
+    # Act
+    first = history.record("key", body)
+    again = history.record("key", bytes(body))
+
+    # Assert
+    assert first == again == version_of(body)
+
+
+def test_patch_since_older_versions(history):
+    # Arrange
+    documents = [_forecast(temp=20.0), _forecast(temp=21.0), _forecast(hour=1)]
+    versions = [history.record("key", dumps(document)) for document in documents]
+
+    # Act
+    from_first = loads(history.patch("key", versions[0]))
+    from_second = loads(history.patch("key", versions[1]))
+
+    # Assert
+    assert apply_patch(documents[0], from_first) == documents[2]
+    assert apply_patch(documents[1], from_second) == documents[2]
+
+
+def test_patch_unknown_or_expired_version(history):
+    # Arrange
+    versions = [
+        history.record("key", dumps(_forecast(temp=float(temp)))) for temp in range(4)
+    ]
+
+    # Act & Assert
+    assert history.patch("key", versions[0]) is None
+    assert history.patch("key", versions[1]) is not None
+    assert history.patch("key", "unknown") is None
+    assert history.patch("other", versions[1]) is None
+
+
+def test_least_recent_locations_evicted():
+    # Arrange
+    history = ForecastHistory(max_locations=2)
+    for key in ("a", "b", "c"):
+        history.record(key, dumps(_forecast()))
+
+    # Act & Assert
+    assert len(history) == 2
+
+
+def test_variants_kept_apart(history):
+    # Arrange
+    full = dumps(_forecast())
+    selected = dumps({"current": {"temp": 290.0}})
+
+    # Act
+    history.record("key", full)
+    version = history.record("key", selected, "current.temp")
+    history.record("key", dumps({"current": {"temp": 291.0}}), "current.temp")
+
+    # Assert
+    assert len(history) == 1
+    assert history.patch("key", version, "current.temp") is not None
+    assert history.patch("key", version) is None
+
+
+def test_forget_and_prune(history):
+    # Arrange
+    for key in ("a", "b", "c"):
+        history.record(key, dumps(_forecast()), "")
+        history.record(key, dumps({}), "current.temp")
+
+    # Act
+    history.forget("a")
+    pruned = history.prune(lambda key: key != "b")
+
+    # Assert
+    assert pruned == 1
+    assert len(history) == 1
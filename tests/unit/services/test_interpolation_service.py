@@ -0,0 +1,77 @@
+import pytest
+from app.services.interpolation_service import InterpolationService, surrounds
+
+
+@pytest.fixture
+def service():
+    return InterpolationService(power=2)
+
+
+def _forecast(temp, humidity, wind_deg, hourly_dts=(1000, 4600)):
+    return {
+        "lat": 0,
+        "lon": 0,
+        "timezone": "UTC",
+        "current": {
+            "dt": 1000,
+            "temp": temp,
+            "humidity": humidity,
+            "wind_deg": wind_deg,
+        },
+        "hourly": [
+            {"dt": dt, "temp": temp + i, "weather": [{"main": "Clear"}]}
+            for i, dt in enumerate(hourly_dts)
+        ],
+        "alerts": [{"event": "Wind"}],
+    }
+
+
+def test_weights_favour_nearer_points(service):
+    # Act
+    weights = service.weights([1.0, 2.0])
+
+    # Assert
+    assert weights == pytest.approx([0.8, 0.2])
+
+
+def test_exact_match_takes_all_weight(service):
+    assert service.weights([0.0, 2.0, 3.0]) == [1.0, 0.0, 0.0]
+
+
+def test_interpolate_blends_numeric_fields(service):
+    # Arrange
+    sources = [
+        (_forecast(10.0, 60, 350), 1.0),
+        (_forecast(20.0, 80, 10, hourly_dts=(1000, 4600, 8200)), 1.0),
+    ]
+
+    # Act
+    result = service.interpolate(1.5, 2.5, sources)
+
+    # Assert
+    assert (result["lat"], result["lon"]) == (1.5, 2.5)
+    assert result["current"]["temp"] == 15.0
+    assert result["current"]["humidity"] == 70
+    assert result["current"]["wind_deg"] == 0
+    assert [entry["dt"] for entry in result["hourly"]] == [1000, 4600]
+    assert [entry["temp"] for entry in result["hourly"]] == [15.0, 16.0]
+    assert result["hourly"][0]["weather"] == [{"main": "Clear"}]
+    assert result["alerts"] == [{"event": "Wind"}]
+
+
+def test_interpolate_drops_sections_missing_at_any_source(service):
+    # Arrange
+    partial = _forecast(20.0, 80, 10)
+    del partial["hourly"]
+
+    # Act
+    result = service.interpolate(0, 0, [(_forecast(10.0, 60, 0), 1.0), (partial, 2.0)])
+
+    # Assert
+    assert "hourly" not in result
+    assert "current" in result
+
+
+def test_surrounds():
+    assert surrounds(0, 0, [(1, 1), (-1, 1), (-1, -1)])
+    assert not surrounds(0, 0, [(1, 1), (2, 2), (1, -1)])
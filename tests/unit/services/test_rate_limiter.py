@@ -0,0 +1,97 @@
+import pytest
+from app.exceptions import RateLimitedError
+from app.services.rate_limiter import DEFAULT_ROUTE, SlidingWindowLimiter
+
+
+@pytest.fixture
+def limiter():
+    return SlidingWindowLimiter(
+        default_limit=10, window=60, routes={"/api/v1/weather/region": 2}
+    )
+
+
+def test_rejects_over_limit_with_retry_after(limiter):
+    # Arrange
+    for _ in range(10):
+        limiter.acquire("a", "/api/v1/weather/forecast", 1, now=30)
+
+    # Act & Assert
+    with pytest.raises(RateLimitedError) as e:
+        limiter.acquire("a", "/api/v1/weather/forecast", 1, now=30)
+    # Nothing carries over from an earlier window: wait for this one to end
+    # and part of its count to slide out
+    assert 30 < e.value.retry_after <= 36
+
+
+def test_previous_window_slides_out(limiter):
+    # Arrange
+    for _ in range(10):
+        limiter.acquire("a", "/", 1, now=59)
+
+    # Act & Assert
+    # 30s into the next window half of the previous count still applies
+    for _ in range(5):
+        limiter.acquire("a", "/", 1, now=90)
+    with pytest.raises(RateLimitedError):
+        limiter.acquire("a", "/", 1, now=90)
+    # A gap of two windows forgets everything
+    limiter.acquire("a", "/", 10, now=180)
+
+
+def test_route_budgets_are_separate(limiter):
+    # Arrange
+    limiter.acquire("a", "/api/v1/weather/region", 2, now=0)
+
+    # Act & Assert
+    with pytest.raises(RateLimitedError):
+        limiter.acquire("a", "/api/v1/weather/region", 1, now=0)
+    assert limiter.acquire("a", "/api/v1/weather/forecast", 10, now=0) == DEFAULT_ROUTE
+
+
+def test_charge_adds_cost_after_the_fact(limiter):
+    # Arrange
+    route = limiter.acquire("a", "/", 1, now=0)
+
+    # Act
+    limiter.charge("a", route, 9, now=0)
+
+    # Assert
+    with pytest.raises(RateLimitedError):
+        limiter.acquire("a", "/", 1, now=0)
+
+
+def test_idle_clients_evicted(limiter):
+    # Arrange
+    limiter.acquire("a", "/", 1, now=0)
+    limiter.acquire("b", "/", 1, now=60)
+
+    # Act
+    limiter.acquire("c", "/", 1, now=125)
+
+    # Assert
+    assert len(limiter) == 2
+
+
+def test_max_clients_evicts_least_recent():
+    # Arrange
+    limiter = SlidingWindowLimiter(default_limit=10, max_clients=2)
+
+    # Act
+    for client in ("a", "b", "a", "c"):
+        limiter.acquire(client, "/", 1, now=0)
+
+    # Assert
+    assert len(limiter) == 2
+    limiter.acquire("a", "/", 8, now=0)
+
+
+def test_split_shares_limits_between_workers():
+    # Arrange
+    limiter = SlidingWindowLimiter(default_limit=12, routes={"/miss": 20})
+
+    # Act
+    limiter.split(4)
+
+    # Assert
+    assert limiter.route_for("/hit") == (DEFAULT_ROUTE, 3)
+    assert limiter.route_for("/miss") == ("/miss", 5)
@@ -0,0 +1,243 @@
+import multiprocessing
+from unittest.mock import patch
+import pytest
+from app.models.forecast import RawForecast
+from app.services.shared_cache import SharedMemoryCache
+
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "weather-cache")
+
+
+@pytest.fixture
+def cache(cache_path):
+    cache = SharedMemoryCache(cache_path, ttl_seconds=300, slots=64, slot_size=1024)
+    yield cache
+    cache.close()
+
+
+def _write_from_child(path, key, body):
+    cache = SharedMemoryCache(path, ttl_seconds=300, slots=64, slot_size=1024)
+    cache.set(key, RawForecast(body))
+    cache.close()
+
+
+def test_raw_forecast_round_trip(cache):
+    # Act
+    cache.set("onecall_1_2_metric", RawForecast(b'{"lat":1}'))
+    result = cache.get("onecall_1_2_metric")
+
+    # Assert
+    assert isinstance(result, RawForecast)
+    assert result.body == b'{"lat":1}'
+    assert not result.is_parsed
+
+
+def test_dict_round_trip(cache):
+    cache.set("key", {"temperature": 20})
+    assert cache.get("key") == {"temperature": 20}
+
+
+def test_overwrite_same_key(cache):
+    # Act
+    cache.set("key", {"temperature": 20})
+    cache.set("key", {"temperature": 25})
+
+    # Assert
+    assert cache.get("key") == {"temperature": 25}
+    assert len(cache) == 1
+
+
+def test_get_nonexistent_key(cache):
+    assert cache.get("nonexistent_key") is None
+
+
+def test_expiration(cache):
+    # Arrange
+    with patch("app.services.shared_cache.time.time", return_value=1000.0):
+        cache.set("key", {"temperature": 20})
+
+    # Act & Assert
+    with patch("app.services.shared_cache.time.time", return_value=1299.0):
+        assert cache.get("key") == {"temperature": 20}
+    with patch("app.services.shared_cache.time.time", return_value=1301.0):
+        assert cache.get("key") is None
+        cache.cleanup_expired()
+    assert len(cache) == 0
+
+
+def test_removed_keys_reported(cache_path):
+    # Arrange
+    cache = SharedMemoryCache(cache_path, slots=2, slot_size=256, bucket_size=2)
+    removed = []
+    cache.on_remove = removed.append
+    with patch("app.services.shared_cache.time.time", return_value=1000.0):
+        cache.set("expired", {"index": 0}, ttl_seconds=10)
+        cache.set("evicted", {"index": 1})
+
+    # Act
+    with patch("app.services.shared_cache.time.time", return_value=1100.0):
+        cache.cleanup_expired()
+        cache.set("first", {"index": 2})
+        cache.set("second", {"index": 3})
+        cache.invalidate("second")
+
+    # Assert
+    assert removed == ["expired", "evicted", "second"]
+    cache.close()
+
+
+def test_remaining_ttl(cache):
+    # Arrange
+    with patch("app.services.shared_cache.time.time", return_value=1000.0):
+        cache.set("key", {"temperature": 20}, ttl_seconds=60)
+
+    # Act & Assert
+    with patch("app.services.shared_cache.time.time", return_value=1045.0):
+        assert cache.remaining_ttl("key") == 15.0
+        assert cache.remaining_ttl("missing") is None
+    with patch("app.services.shared_cache.time.time", return_value=1061.0):
+        assert cache.remaining_ttl("key") is None
+
+
+def test_per_key_ttl(cache):
+    # Arrange
+    with patch("app.services.shared_cache.time.time", return_value=1000.0):
+        cache.set("volatile", {"temperature": 20}, ttl_seconds=60)
+        cache.set("default", {"temperature": 21})
+
+    # Act & Assert
+    with patch("app.services.shared_cache.time.time", return_value=1120.0):
+        assert cache.get("volatile") is None
+        assert cache.get("default") == {"temperature": 21}
+
+
+def test_get_stale_within_grace_period(cache_path):
+    # Arrange
+    cache = SharedMemoryCache(
+        cache_path, ttl_seconds=300, slots=64, slot_size=1024, stale_seconds=60
+    )
+    with patch("app.services.shared_cache.time.time", return_value=1000.0):
+        cache.set("key", {"temperature": 20})
+
+    # Act & Assert
+    with patch("app.services.shared_cache.time.time", return_value=1350.0):
+        assert cache.get("key") is None
+        cache.cleanup_expired()
+        assert cache.get_stale("key") == {"temperature": 20}
+    with patch("app.services.shared_cache.time.time", return_value=1361.0):
+        assert cache.get_stale("key") is None
+    cache.close()
+
+
+def test_invalidate_and_clear(cache):
+    # Arrange
+    cache.set("first", {"temp": 20})
+    cache.set("second", {"temp": 25})
+
+    # Act
+    cache.invalidate("first")
+
+    # Assert
+    assert cache.get("first") is None
+    assert cache.get("second") == {"temp": 25}
+    cache.clear()
+    assert cache.get("second") is None
+
+
+def test_oversized_value_not_cached(cache):
+    # Act
+    cache.set("key", RawForecast(b"x" * 2048))
+
+    # Assert
+    assert cache.get("key") is None
+    assert cache.oversized == 1
+
+
+def test_full_bucket_evicts(cache_path):
+    # Arrange
+    cache = SharedMemoryCache(cache_path, slots=2, slot_size=256, bucket_size=2)
+
+    # Act
+    for index in range(5):
+        cache.set(f"key{index}", {"index": index})
+
+    # Assert
+    assert len(cache) == 2
+    assert cache.get("key4") == {"index": 4}
+    cache.close()
+
+
+def test_visible_across_processes(cache, cache_path):
+    # Act
+    process = multiprocessing.get_context("fork").Process(
+        target=_write_from_child, args=(cache_path, "shared", b'{"from":"child"}')
+    )
+    process.start()
+    process.join()
+
+    # Assert
+    assert process.exitcode == 0
+    assert cache.get("shared").data == {"from": "child"}
+
+
+def test_reopen_keeps_entries(cache, cache_path):
+    # Arrange
+    cache.set("key", {"temp": 20})
+
+    # Act
+    reopened = SharedMemoryCache(cache_path, slots=64, slot_size=1024)
+
+    # Assert
+    assert reopened.get("key") == {"temp": 20}
+    reopened.close()
+
+
+def test_layout_change_resets(cache, cache_path):
+    # Arrange
+    cache.set("key", {"temp": 20})
+
+    # Act
+    reopened = SharedMemoryCache(cache_path, slots=32, slot_size=1024)
+
+    # Assert
+    assert reopened.get("key") is None
+    reopened.close()
+
+
+def test_negative_entry_round_trip(cache):
+    # Act
+    cache.set_negative("key", "rate_limited", 30, retry_after=30)
+    entry = cache.get_negative("key")
+
+    # Assert
+    assert entry.kind == "rate_limited"
+    assert entry.retry_after == 30
+    assert cache.get("key") is None
+
+
+def test_set_clears_negative_entry(cache):
+    # Arrange
+    cache.set_negative("key", "server_error", 15)
+
+    # Act
+    cache.set("key", {"temperature": 20})
+
+    # Assert
+    assert cache.get_negative("key") is None
+    assert cache.get("key") == {"temperature": 20}
+
+
+def test_oversized_value_counted_and_logged(cache, caplog):
+    # Act
+    with patch("app.services.shared_cache.metrics") as metrics:
+        cache.set("first", RawForecast(b"x" * 2048))
+        cache.set("second", RawForecast(b"x" * 2048))
+
+    # Assert
+    assert metrics.incr.call_count == 2
+    metrics.incr.assert_called_with("cache.oversized")
+    warnings = [r for r in caplog.records if r.levelname == "WARNING"]
+    assert len(warnings) == 1
+    assert "first" in warnings[0].getMessage()
@@ -0,0 +1,120 @@
+import pytest
+from app.services.spatial_index import SpatialIndex, haversine_km, parse_forecast_key
+
+
+@pytest.fixture
+def index():
+    return SpatialIndex(cell_degrees=0.25)
+
+
+def test_parse_forecast_key():
+    assert parse_forecast_key("onecall_40.7_-74.0_metric") == (40.7, -74.0, "metric")
+    assert parse_forecast_key("negative:onecall_1_2_metric") is None
+    assert parse_forecast_key("onecall_a_b_metric") is None
+
+
+def test_haversine_km():
+    # One degree of latitude is roughly 111 km
+    assert haversine_km(0, 0, 1, 0) == pytest.approx(111.2, abs=0.1)
+
+
+def test_nearby_orders_by_distance_across_cells(index):
+    # Arrange
+    for key in [
+        "onecall_40.0_-74.0_metric",
+        "onecall_40.1_-74.0_metric",
+        "onecall_39.8_-74.3_metric",
+        "onecall_42.0_-74.0_metric",
+        "onecall_40.0_-74.0_imperial",
+    ]:
+        index.add(key)
+
+    # Act
+    result = index.nearby(40.05, -74.0, "metric", radius_km=50)
+
+    # Assert
+    assert [key for key, *_ in result] == [
+        "onecall_40.0_-74.0_metric",
+        "onecall_40.1_-74.0_metric",
+        "onecall_39.8_-74.3_metric",
+    ]
+    assert result[0][3] == pytest.approx(5.56, abs=0.01)
+
+
+def test_nearby_limit(index):
+    # Arrange
+    for i in range(5):
+        index.add(f"onecall_40.0{i}_-74.0_metric")
+
+    # Act
+    result = index.nearby(40.0, -74.0, "metric", radius_km=50, limit=2)
+
+    # Assert
+    assert len(result) == 2
+
+
+def test_remove(index):
+    # Arrange
+    index.add("onecall_40.0_-74.0_metric")
+
+    # Act
+    index.remove("onecall_40.0_-74.0_metric")
+    index.remove("onecall_40.0_-74.0_metric")
+
+    # Assert
+    assert len(index) == 0
+    assert index.nearby(40.0, -74.0, "metric", radius_km=50) == []
+
+
+def test_add_rejects_other_keys(index):
+    assert not index.add("weather_london")
+    assert len(index) == 0
+
+
+@pytest.mark.parametrize("cell_degrees", [0.25, 0.001])
+def test_within_box(cell_degrees):
+    # Arrange
+    index = SpatialIndex(cell_degrees=cell_degrees)
+    for key in [
+        "onecall_40.0_-74.0_metric",
+        "onecall_40.5_-73.5_metric",
+        "onecall_41.5_-74.0_metric",
+        "onecall_40.2_-74.2_imperial",
+    ]:
+        index.add(key)
+
+    # Act
+    result = index.within(40.0, -74.0, 41.0, -73.0, "metric")
+
+    # Assert
+    assert sorted(result) == ["onecall_40.0_-74.0_metric", "onecall_40.5_-73.5_metric"]
+
+
+def test_within_in_key_order_after_cursor(index):
+    # Arrange
+    keys = [f"onecall_40.{i}_-7{i % 3}.5_metric" for i in range(9)]
+    for key in reversed(keys):
+        index.add(key)
+
+    # Act
+    first = list(index.within(39.0, -80.0, 41.0, -70.0, "metric"))
+    rest = list(index.within(39.0, -80.0, 41.0, -70.0, "metric", after=first[3]))
+
+    # Assert
+    assert first == sorted(keys)
+    assert rest == first[4:]
+
+
+def test_prune(index):
+    # Arrange
+    for key in ["onecall_40.0_-74.0_metric", "onecall_40.1_-74.0_metric"]:
+        index.add(key)
+
+    # Act
+    removed = index.prune(lambda key: key.startswith("onecall_40.0"))
+
+    # Assert
+    assert removed == 1
+    assert list(index.within(39.0, -75.0, 41.0, -73.0, "metric")) == [
+        "onecall_40.0_-74.0_metric"
+    ]
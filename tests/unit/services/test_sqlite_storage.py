@@ -0,0 +1,149 @@
+import sqlite3
+import threading
+import pytest
+from datetime import UTC, datetime
+from app.models.forecast import RawForecast
+from app.services.sqlite_storage import SQLiteStorageService
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = SQLiteStorageService(str(tmp_path / "forecasts.db"))
+    yield storage
+    storage.close()
+
+
+class TestSQLiteStorageService:
+    async def test_store_and_get_raw(self, storage):
+        # Arrange
+        forecast = RawForecast(b'{"lat":40.7128}')
+
+        # Act
+        stored = await storage.store_forecast(
+            40.7128, -74.006, "standard", forecast, ttl_seconds=120
+        )
+        result = await storage.get_forecast_raw(40.7128, -74.006, "standard")
+
+        # Assert
+        assert stored is True
+        assert result.body == forecast.body
+        assert not result.is_parsed
+        now = datetime.now(UTC).timestamp()
+        assert now + 110 < result.expires_at <= now + 120
+
+    async def test_get_missing(self, storage):
+        # Act & Assert
+        assert await storage.get_forecast_raw(1.0, 2.0, "standard") is None
+        assert await storage.get_forecast(1.0, 2.0, "standard") is None
+
+    async def test_expired_items_not_returned(self, storage):
+        # Arrange
+        item = storage.build_item(1.0, 2.0, "standard", {"lat": 1.0})
+        item["ttl"] = int(datetime.now(UTC).timestamp()) - 1
+
+        # Act
+        await storage.batch_store_items([item])
+
+        # Assert
+        assert await storage.get_forecast_raw(1.0, 2.0, "standard") is None
+
+    async def test_batch_store_and_read(self, storage):
+        # Arrange
+        items = [
+            storage.build_item(float(i), 0.0, "standard", {"i": i}) for i in range(3)
+        ]
+
+        # Act
+        unprocessed = await storage.batch_store_items(items)
+        results = await storage.get_forecasts_raw(
+            [(2.0, 0.0, "standard"), (9.0, 0.0, "standard"), (0.0, 0.0, "standard")]
+        )
+
+        # Assert
+        assert unprocessed == []
+        assert [r.data if r else None for r in results] == [{"i": 2}, None, {"i": 0}]
+
+    async def test_overwrite_keeps_latest(self, storage):
+        # Act
+        await storage.store_forecast(1.0, 2.0, "standard", {"v": 1})
+        await storage.store_forecast(1.0, 2.0, "standard", {"v": 2})
+
+        # Assert
+        assert await storage.get_forecast(1.0, 2.0, "standard") == {"v": 2}
+
+    async def test_reads_run_off_event_loop(self, storage):
+        # Arrange
+        await storage.store_forecast(1.0, 2.0, "standard", {"v": 1})
+        read_threads = []
+        read, read_many = storage._read, storage._read_many
+
+        def record(method):
+            def recorded(*args):
+                read_threads.append(threading.get_ident())
+                return method(*args)
+
+            return recorded
+
+        storage._read, storage._read_many = record(read), record(read_many)
+
+        # Act
+        single = await storage.get_forecast_raw(1.0, 2.0, "standard")
+        batch = await storage.get_forecasts_raw([(1.0, 2.0, "standard")])
+
+        # Assert
+        assert single.data == batch[0].data == {"v": 1}
+        assert len(read_threads) == 2
+        assert threading.get_ident() not in read_threads
+
+    def test_wal_mode(self, storage):
+        # Act
+        mode = storage.connection.execute("PRAGMA journal_mode").fetchone()[0]
+
+        # Assert
+        assert mode == "wal"
+
+    async def test_close_closes_worker_connections(self, storage):
+        # Arrange
+        await storage.store_forecast(1.0, 2.0, "standard", {"v": 1})
+        await storage.get_forecasts_raw([(1.0, 2.0, "standard")])
+        main = storage.connection
+        connections = set(storage._connections)
+
+        # Act
+        storage.close()
+
+        # Assert
+        assert main in connections
+        assert len(connections) >= 2
+        for connection in connections:
+            with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+                connection.execute("SELECT 1")
+        assert await storage.get_forecast(1.0, 2.0, "standard") == {"v": 1}
+
+    def test_fork_gets_fresh_connections(self, storage):
+        # Arrange
+        inherited = storage.connection
+        storage._pid = -1  # As seen from a forked child
+        opened = []
+
+        def connect():
+            opened.append(storage.connection)
+
+        threads = [threading.Thread(target=connect) for _ in range(8)]
+
+        # Act
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        tracked = set(storage._connections)
+        storage.close()
+
+        # Assert
+        assert inherited not in opened
+        assert tracked == set(opened) and len(tracked) == len(threads)
+        assert inherited.execute("SELECT 1").fetchone() == (1,)
+        for connection in opened:
+            with pytest.raises(sqlite3.ProgrammingError, match="closed"):
+                connection.execute("SELECT 1")
+        inherited.close()
@@ -1,6 +1,12 @@
 import pytest
 from unittest.mock import MagicMock, PropertyMock, patch
-from app.services.storage_service import StorageService
+from app.config import settings
+from app.models.forecast import RawForecast
+from app.services.storage_service import (
+    ForecastStorage,
+    StorageService,
+    create_storage_service,
+)
 from datetime import UTC, datetime, timedelta
 
 
@@ -127,3 +133,151 @@ class TestStorageService:
 
         # Assert
         assert result is None
+
+    async def test_store_forecast_raw_body(self, storage_service, mock_dynamodb_table):
+        # Arrange
+        lat, lon, units = 40.7128, -74.0060, "metric"
+        forecast = RawForecast(b'{"lat":40.7128}')
+
+        # Act
+        result = await storage_service.store_forecast(lat, lon, units, forecast)
+
+        # Assert
+        assert result is True
+        item = mock_dynamodb_table.put_item.call_args[1]["Item"]
+        assert item["forecast_data"] == '{"lat":40.7128}'
+        assert not forecast.is_parsed
+
+    @pytest.mark.parametrize("ttl_seconds,expected", [(None, 3600), (720, 720)])
+    async def test_store_forecast_ttl(
+        self, storage_service, mock_dynamodb_table, ttl_seconds, expected
+    ):
+        # Act
+        before = int(datetime.now(UTC).timestamp())
+        await storage_service.store_forecast(
+            1.0, 2.0, "standard", {"lat": 1.0}, ttl_seconds=ttl_seconds
+        )
+
+        # Assert
+        item = mock_dynamodb_table.put_item.call_args[1]["Item"]
+        assert before + expected <= item["ttl"] <= before + expected + 1
+
+    async def test_get_forecast_raw(self, storage_service, mock_dynamodb_table):
+        # Arrange
+        lat, lon, units = 40.7128, -74.0060, "metric"
+
+        # Act
+        result = await storage_service.get_forecast_raw(lat, lon, units)
+
+        # Assert
+        assert result.body == b'{"key": "value"}'
+        assert not result.is_parsed
+        assert result.data == {"key": "value"}
+
+    async def test_batch_store_items(self, storage_service):
+        # Arrange
+        items = [{"location_key": "1_2_metric"}, {"location_key": "3_4_metric"}]
+        storage_service._dynamodb = MagicMock()
+        storage_service._dynamodb.batch_write_item.return_value = {
+            "UnprocessedItems": {
+                "weather_forecasts": [{"PutRequest": {"Item": items[1]}}]
+            }
+        }
+
+        # Act
+        unprocessed = await storage_service.batch_store_items(items)
+
+        # Assert
+        assert unprocessed == [items[1]]
+        request = storage_service._dynamodb.batch_write_item.call_args[1]
+        assert request["RequestItems"]["weather_forecasts"] == [
+            {"PutRequest": {"Item": item}} for item in items
+        ]
+
+    async def test_get_forecasts_raw_batches(self, storage_service):
+        # Arrange
+        ttl = int((datetime.now(UTC) + timedelta(minutes=10)).timestamp())
+        storage_service._dynamodb = MagicMock()
+        storage_service._dynamodb.batch_get_item.side_effect = [
+            {
+                "Responses": {
+                    "weather_forecasts": [
+                        {
+                            "location_key": "1_2_standard",
+                            "forecast_data": "{}",
+                            "ttl": ttl,
+                        }
+                    ]
+                },
+                "UnprocessedKeys": {
+                    "weather_forecasts": {"Keys": [{"location_key": "3_4_standard"}]}
+                },
+            },
+            {
+                "Responses": {
+                    "weather_forecasts": [
+                        {
+                            "location_key": "3_4_standard",
+                            "forecast_data": "[]",
+                            "ttl": ttl,
+                        }
+                    ]
+                }
+            },
+        ]
+
+        # Act
+        results = await storage_service.get_forecasts_raw(
+            [(1, 2, "standard"), (5, 6, "standard"), (3, 4, "standard")]
+        )
+
+        # Assert
+        assert [r.body if r else None for r in results] == [b"{}", None, b"[]"]
+        assert storage_service._dynamodb.batch_get_item.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "backend,expected",
+    [("dynamodb", "StorageService"), ("sqlite", "SQLiteStorageService")],
+)
+def test_create_storage_service(backend, expected, tmp_path):
+    # Arrange
+    with patch.multiple(
+        "app.services.storage_service.settings",
+        STORAGE_BACKEND=backend,
+        STORAGE_SQLITE_PATH=str(tmp_path / "forecasts.db"),
+    ):
+        # Act
+        storage = create_storage_service()
+
+    # Assert
+    assert type(storage).__name__ == expected
+
+
+def test_dynamodb_calls_bounded():
+    # Act
+    config = StorageService()._dynamodb.meta.client.meta.config
+
+    # Assert
+    assert config.connect_timeout == settings.DYNAMODB_CONNECT_TIMEOUT
+    assert config.read_timeout == settings.DYNAMODB_READ_TIMEOUT
+    assert config.retries == {
+        "mode": "standard",
+        "total_max_attempts": settings.DYNAMODB_MAX_ATTEMPTS,
+    }
+
+
+def test_backends_must_implement_storage_methods():
+    # Arrange
+    class ReadOnlyStorage(ForecastStorage):
+        async def get_forecast_raw(self, lat, lon, units):
+            return None
+
+        async def get_forecasts_raw(self, locations):
+            return []
+
+    # Act & Assert
+    with pytest.raises(TypeError):
+        ForecastStorage()
+    with pytest.raises(TypeError):
+        ReadOnlyStorage()
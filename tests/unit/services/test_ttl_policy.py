@@ -0,0 +1,150 @@
+import pytest
+from app.models.forecast import RawForecast
+from app.services.ttl_policy import AdaptiveTTLPolicy, signature, volatility
+
+
+def _forecast(temp=290.0, pressure=1015, pop=0.0, condition=800, alerts=None):
+    forecast = {
+        "current": {
+            "temp": temp,
+            "pressure": pressure,
+            "wind_speed": 3.0,
+            "humidity": 60,
+            "weather": [{"id": condition}],
+        },
+        "hourly": [{"pop": pop}] * 12,
+    }
+    if alerts:
+        forecast["alerts"] = alerts
+    return forecast
+
+
+@pytest.fixture
+def policy():
+    return AdaptiveTTLPolicy(base_ttl=300, min_ttl=60, max_ttl=1800, alert_ttl=120)
+
+
+def test_volatility_of_snapshots():
+    # Arrange
+    calm = signature(_forecast())
+    stormy = signature(_forecast(temp=294.0, pressure=1009, pop=0.6, condition=211))
+
+    # Act & Assert
+    assert volatility(calm, calm) == 0.0
+    # 2 for temp, 2 for pressure, 2 for pop and 1 for the new condition
+    assert volatility(calm, stormy) == pytest.approx(7.0)
+
+
+def test_first_observation_uses_base_ttl(policy):
+    # Act
+    ttl = policy.observe("key", RawForecast.from_data(_forecast()), now=0)
+
+    # Assert
+    assert ttl == 300
+    assert policy.ttl_for("key") == 300
+    assert policy.ttl_for("other") is None
+
+
+def test_calm_location_stretches_to_max(policy):
+    # Arrange
+    now = 0.0
+    policy.observe("key", _forecast(), now=now)
+
+    # Act
+    ttls = []
+    for _ in range(8):
+        now += policy.ttl_for("key")
+        ttls.append(policy.observe("key", _forecast(), now=now))
+
+    # Assert
+    assert ttls[:3] == [450, 675, 1012]
+    assert ttls[-1] == 1800
+
+
+def test_volatile_location_shortens_to_min(policy):
+    # Arrange
+    now = 0.0
+    policy.observe("key", _forecast(), now=now)
+
+    # Act
+    ttls = []
+    for step in range(1, 5):
+        now += policy.ttl_for("key")
+        ttls.append(policy.observe("key", _forecast(temp=290.0 + 4 * step), now=now))
+
+    # Assert
+    assert ttls == [150, 75, 60, 60]
+
+
+def test_change_is_scaled_to_elapsed_time(policy):
+    # Arrange
+    policy.observe("key", _forecast(), now=0)
+
+    # Act
+    # The same change spread over ten TTLs is calm weather
+    ttl = policy.observe("key", _forecast(temp=294.0), now=3000)
+
+    # Assert
+    assert ttl == 450
+
+
+def test_alerts_cap_ttl_without_forgetting_it(policy):
+    # Arrange
+    policy.observe("key", _forecast(), now=0)
+    policy.observe("key", _forecast(), now=300)
+
+    # Act
+    alerted = policy.observe("key", _forecast(alerts=[{"event": "Gale"}]), now=750)
+    cleared = policy.observe("key", _forecast(), now=870)
+
+    # Assert
+    assert alerted == 120
+    assert cleared == 1012
+
+
+def test_storage_ttl_never_below_default(policy):
+    # Act & Assert
+    # Short cache TTLs keep the storage default, stretched ones stretch it
+    assert policy.storage_ttl(None) is None
+    assert policy.storage_ttl(60) == 3600
+    assert policy.storage_ttl(300) == 3600
+    assert policy.storage_ttl(900) == 10800
+
+
+def test_disabled_policy_keeps_defaults():
+    # Arrange
+    policy = AdaptiveTTLPolicy(enabled=False)
+
+    # Act & Assert
+    assert policy.observe("key", _forecast(alerts=[{"event": "Gale"}])) is None
+    assert len(policy) == 0
+
+
+def test_locations_bounded(policy):
+    # Arrange
+    policy.max_locations = 2
+
+    # Act
+    for key in ("a", "b", "c"):
+        policy.observe(key, _forecast(), now=0)
+
+    # Assert
+    assert len(policy) == 2
+    assert policy.ttl_for("a") is None
+
+
+def test_snapshot_reports_relative_upstream_rate(policy):
+    # Arrange
+    policy.observe("calm", _forecast(), now=0)
+    policy.observe("calm", _forecast(), now=300)  # 450 s
+    policy.observe("storm", _forecast(alerts=[{"event": "Gale"}]), now=0)  # 120 s
+
+    # Act
+    snapshot = policy.snapshot()
+
+    # Assert
+    assert snapshot["locations"] == 2
+    assert snapshot["min_ttl"] == 120
+    assert snapshot["max_ttl"] == 450
+    # (300/450 + 300/120) / 2
+    assert snapshot["relative_upstream_rate"] == pytest.approx(1.583, abs=1e-3)
@@ -0,0 +1,95 @@
+import pytest
+from app.services.unit_conversion import UnitConverter
+
+
+@pytest.fixture
+def converter():
+    return UnitConverter()
+
+
+@pytest.fixture
+def forecast():
+    return {
+        "lat": 40.7,
+        "lon": -74.0,
+        "current": {
+            "dt": 1000,
+            "temp": 293.15,
+            "feels_like": 292.0,
+            "pressure": 1013,
+            "visibility": 10000,
+            "wind_speed": 4.47,
+            "wind_deg": 180,
+        },
+        "minutely": [{"dt": 1000, "precipitation": 0.5}],
+        "hourly": [{"dt": 1000, "temp": 273.15, "wind_gust": 10.0}],
+        "daily": [
+            {
+                "dt": 1000,
+                "temp": {"min": 263.15, "max": 283.15},
+                "feels_like": {"day": 278.15},
+                "rain": 1.2,
+            }
+        ],
+    }
+
+
+def test_convert_metric(converter, forecast):
+    # Act
+    converted = converter.convert(forecast, "metric")
+
+    # Assert
+    assert converted["current"]["temp"] == 20.0
+    assert converted["current"]["wind_speed"] == 4.47
+    assert converted["hourly"][0]["temp"] == 0.0
+    assert converted["daily"][0]["temp"] == {"min": -10.0, "max": 10.0}
+    assert converted["daily"][0]["feels_like"] == {"day": 5.0}
+
+
+def test_convert_imperial(converter, forecast):
+    # Act
+    converted = converter.convert(forecast, "imperial")
+
+    # Assert
+    assert converted["current"]["temp"] == 68.0
+    assert converted["current"]["wind_speed"] == 10.0
+    assert converted["hourly"][0]["wind_gust"] == 22.37
+    assert converted["daily"][0]["temp"]["min"] == 14.0
+
+
+def test_unit_independent_fields_unchanged(converter, forecast):
+    # Act
+    converted = converter.convert(forecast, "imperial")
+
+    # Assert
+    current = converted["current"]
+    assert (current["pressure"], current["visibility"]) == (1013, 10000)
+    assert current["wind_deg"] == 180
+    assert converted["minutely"] == forecast["minutely"]
+    assert converted["daily"][0]["rain"] == 1.2
+
+
+def test_convert_leaves_source_untouched(converter, forecast):
+    # Act
+    converter.convert(forecast, "metric")
+
+    # Assert
+    assert forecast["current"]["temp"] == 293.15
+    assert forecast["daily"][0]["temp"]["min"] == 263.15
+
+
+def test_standard_is_returned_as_is(converter, forecast):
+    # Act & Assert
+    assert converter.convert(forecast, "standard") is forecast
+
+
+def test_tables_compiled_once(converter):
+    # Act & Assert
+    assert converter.table("metric") is converter.table("metric")
+    assert set(converter.table("metric")) == {"temp", "feels_like", "dew_point"}
+
+
+def test_unknown_units(converter, forecast):
+    # Act & Assert
+    with pytest.raises(ValueError):
+        converter.convert(forecast, "kelvin")
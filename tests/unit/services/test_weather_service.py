@@ -1,5 +1,7 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, patch, MagicMock
+from app.exceptions import UpstreamError
 from app.services.weather_service import WeatherService
 
 
@@ -135,3 +137,197 @@ class TestWeatherService:
         assert result == sample_forecast
         mock_get_call = mock_session.return_value.__aenter__.return_value.get.call_args
         assert mock_get_call[1]["params"]["appid"] == custom_api_key
+
+    async def test_fetch_onecall_raw_success(
+        self, weather_service, mock_aiohttp_session
+    ):
+        """Test raw fetch returns the unparsed body"""
+        # Arrange
+        _, mock_response = mock_aiohttp_session
+        mock_response.read.return_value = b'{"lat":40.7128}'
+
+        # Act
+        result = await weather_service.fetch_onecall_raw(
+            lat=40.7128, lon=-74.0060, units="metric"
+        )
+
+        # Assert
+        assert result.body == b'{"lat":40.7128}'
+        assert not result.is_parsed
+        mock_response.json.assert_not_awaited()
+
+    @pytest.mark.parametrize(
+        "status,headers,kind,retry_after",
+        [
+            (404, {}, UpstreamError.CLIENT_ERROR, None),
+            (429, {"Retry-After": "42"}, UpstreamError.RATE_LIMITED, 42),
+            (429, {}, UpstreamError.RATE_LIMITED, None),
+            (502, {}, UpstreamError.SERVER_ERROR, None),
+        ],
+    )
+    async def test_fetch_onecall_raw_error_status(
+        self, weather_service, mock_aiohttp_session, status, headers, kind, retry_after
+    ):
+        """Test raw fetch classifies error statuses"""
+        # Arrange
+        _, mock_response = mock_aiohttp_session
+        mock_response.status = status
+        mock_response.headers = headers
+
+        # Act
+        with pytest.raises(UpstreamError) as exc_info:
+            await weather_service.fetch_onecall_raw(
+                lat=40.7128, lon=-74.0060, units="metric"
+            )
+
+        # Assert
+        assert exc_info.value.kind == kind
+        assert exc_info.value.status_code == status
+        assert exc_info.value.retry_after == retry_after
+
+    @pytest.mark.parametrize(
+        "error,kind",
+        [
+            (asyncio.TimeoutError(), UpstreamError.TIMEOUT),
+            (Exception("Connection error"), UpstreamError.SERVER_ERROR),
+        ],
+    )
+    async def test_fetch_onecall_raw_exception(
+        self, weather_service, mock_aiohttp_session, error, kind
+    ):
+        """Test raw fetch classifies timeouts and connection failures"""
+        # Arrange
+        mock_session, _ = mock_aiohttp_session
+        mock_session.return_value.__aenter__.return_value.get.side_effect = error
+
+        # Act
+        with pytest.raises(UpstreamError) as exc_info:
+            await weather_service.fetch_onecall_raw(
+                lat=40.7128, lon=-74.0060, units="metric"
+            )
+
+        # Assert
+        assert exc_info.value.kind == kind
+
+
+class TestWeatherParsing:
+    @pytest.fixture
+    def observation(self):
+        return {
+            "id": 5128581,
+            "main": {"temp": 20.5, "humidity": 65, "pressure": 1012},
+            "weather": [{"main": "Clouds"}],
+            "wind": {"speed": 4.1},
+        }
+
+    @pytest.mark.parametrize("trusted", [True, False])
+    def test_parse_weather_data(self, weather_service, observation, trusted):
+        # Act
+        result = weather_service._parse_weather_data(
+            observation, "5128581", trusted=trusted
+        )
+
+        # Assert
+        assert result.location_id == "5128581"
+        assert result.temperature == 20.5
+        assert result.humidity == 65.0
+        assert result.condition == "Clouds"
+        assert result.timestamp.tzinfo is not None
+
+    def test_parse_weather_batch(self, weather_service, observation):
+        # Act
+        batch = weather_service._parse_weather_batch([observation, observation])
+
+        # Assert
+        assert len(batch) == 2
+        models = batch.to_models()
+        assert models[0].location_id == "5128581"
+        assert models[1].pressure == 1012.0
+
+
+def _observation(city_id):
+    return {
+        "id": int(city_id),
+        "main": {"temp": 20.5, "humidity": 65, "pressure": 1013},
+        "weather": [{"main": "Clouds"}],
+        "wind": {"speed": 3.6},
+    }
+
+
+def _group_response(status, city_ids=()):
+    response = AsyncMock()
+    response.status = status
+    response.json.return_value = {
+        "cnt": len(city_ids),
+        "list": [_observation(city_id) for city_id in city_ids],
+    }
+    context = AsyncMock()
+    context.__aenter__.return_value = response
+    return context
+
+
+class TestWeatherBatchFetch:
+    async def test_fetch_weather_data_uses_observation_api(
+        self, weather_service, mock_aiohttp_session
+    ):
+        # Arrange
+        mock_session, mock_response = mock_aiohttp_session
+        mock_response.json.return_value = _observation("2643743")
+
+        # Act
+        result = await weather_service.fetch_weather_data("2643743")
+
+        # Assert
+        assert result.temperature == 20.5
+        url = mock_session.return_value.__aenter__.return_value.get.call_args[0][0]
+        assert url == "https://api.openweathermap.org/data/2.5/weather"
+
+    async def test_splits_into_group_queries(
+        self, weather_service, mock_aiohttp_session
+    ):
+        # Arrange
+        mock_session, _ = mock_aiohttp_session
+        ids = [str(1000 + i) for i in range(45)]
+        session = mock_session.return_value.__aenter__.return_value
+        session.get.side_effect = [
+            _group_response(200, ids[:20]),
+            _group_response(200, ids[20:40]),
+            _group_response(200, ids[40:]),
+        ]
+
+        # Act
+        batch, failed = await weather_service.fetch_weather_batch(ids + ids[:3])
+
+        # Assert
+        assert failed == []
+        assert batch.location_ids == ids
+        assert session.get.call_count == 3
+        args, kwargs = session.get.call_args_list[0]
+        assert args[0] == "https://api.openweathermap.org/data/2.5/group"
+        assert kwargs["params"]["id"] == ",".join(ids[:20])
+
+    async def test_returns_partial_results(self, weather_service, mock_aiohttp_session):
+        # Arrange
+        mock_session, _ = mock_aiohttp_session
+        ids = [str(1000 + i) for i in range(45)]
+        session = mock_session.return_value.__aenter__.return_value
+        session.get.side_effect = [
+            _group_response(200, ids[:19]),  # One city missing from the reply
+            _group_response(500),
+            Exception("Connection reset"),
+        ]
+
+        # Act
+        batch, failed = await weather_service.fetch_weather_batch(ids)
+
+        # Assert
+        assert batch.location_ids == ids[:19]
+        assert failed == ids[19:]
+
+    async def test_empty_input(self, weather_service, mock_aiohttp_session):
+        # Act
+        batch, failed = await weather_service.fetch_weather_batch([])
+
+        # Assert
+        assert len(batch) == 0
+        assert failed == []
@@ -0,0 +1,134 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+import pytest
+from app.models.forecast import RawForecast
+from app.services.metrics import metrics
+from app.services.write_behind import WriteBehindQueue
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+@pytest.fixture
+def storage():
+    storage = MagicMock()
+    storage.build_item.side_effect = lambda lat, lon, units, data, ttl=None: {
+        "location_key": f"{lat}_{lon}_{units}",
+        "forecast_data": data.body.decode(),
+    }
+    storage.batch_store_items = AsyncMock(return_value=[])
+    return storage
+
+
+@pytest.fixture
+def queue(storage):
+    return WriteBehindQueue(storage, max_pending=100, retry_delay=0)
+
+
+def _forecast(value):
+    return RawForecast(f'{{"value":{value}}}'.encode())
+
+
+class TestWriteBehindQueue:
+    async def test_flush_batches_of_25(self, queue, storage):
+        # Arrange
+        for index in range(60):
+            queue.enqueue(index, 0, "metric", _forecast(index))
+
+        # Act
+        await queue.flush()
+
+        # Assert
+        sizes = [
+            len(call.args[0]) for call in storage.batch_store_items.await_args_list
+        ]
+        assert sizes == [25, 25, 10]
+        assert queue.depth == 0
+        assert metrics.counters["write_behind.written"] == 60
+        assert metrics.timings["write_behind.flush_latency"].count == 3
+
+    async def test_coalesces_same_key(self, queue, storage):
+        # Arrange
+        queue.enqueue(1, 2, "metric", _forecast(1))
+        queue.enqueue(1, 2, "metric", _forecast(2))
+
+        # Act
+        await queue.flush()
+
+        # Assert
+        (items,) = storage.batch_store_items.await_args.args
+        assert items == [{"location_key": "1_2_metric", "forecast_data": '{"value":2}'}]
+        assert metrics.counters["write_behind.coalesced"] == 1
+
+    async def test_bounded_drops_oldest(self, storage):
+        # Arrange
+        queue = WriteBehindQueue(storage, max_pending=2)
+
+        # Act
+        for index in range(3):
+            queue.enqueue(index, 0, "metric", _forecast(index))
+
+        # Assert
+        assert list(queue._pending) == ["1_0_metric", "2_0_metric"]
+        assert metrics.counters["write_behind.dropped"] == 1
+        assert metrics.gauges["write_behind.queue_depth"] == 2
+
+    async def test_retries_unprocessed(self, queue, storage):
+        # Arrange
+        queue.enqueue(1, 0, "metric", _forecast(1))
+        queue.enqueue(2, 0, "metric", _forecast(2))
+        leftover = {"location_key": "2_0_metric", "forecast_data": '{"value":2}'}
+        storage.batch_store_items.side_effect = [[leftover], []]
+
+        # Act
+        unwritten = await queue.flush()
+
+        # Assert
+        assert unwritten == []
+        assert storage.batch_store_items.await_args_list[1].args[0] == [leftover]
+        assert metrics.counters["write_behind.retried"] == 1
+        assert metrics.counters["write_behind.written"] == 2
+
+    async def test_gives_up_after_max_retries(self, storage):
+        # Arrange
+        queue = WriteBehindQueue(storage, max_retries=2, retry_delay=0)
+        queue.enqueue(1, 0, "metric", _forecast(1))
+        storage.batch_store_items.side_effect = Exception("throttled")
+
+        # Act
+        unwritten = await queue.flush()
+
+        # Assert
+        assert storage.batch_store_items.await_count == 3
+        assert metrics.counters["write_behind.failed"] == 1
+        assert [item["location_key"] for item in unwritten] == ["1_0_metric"]
+
+    async def test_close_flushes_pending(self, queue, storage):
+        # Arrange
+        queue.start()
+        queue.enqueue(1, 0, "metric", _forecast(1))
+
+        # Act
+        await queue.close()
+
+        # Assert
+        assert not queue.running
+        storage.batch_store_items.assert_awaited_once()
+
+    async def test_background_flush_when_batch_full(self, storage):
+        # Arrange
+        queue = WriteBehindQueue(storage, flush_interval=60)
+        queue.start()
+
+        # Act
+        for index in range(25):
+            queue.enqueue(index, 0, "metric", _forecast(index))
+        await asyncio.sleep(0.01)
+
+        # Assert
+        storage.batch_store_items.assert_awaited_once()
+        await queue.close()
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from app.deadline import (
+    Deadline,
+    charge,
+    current_deadline,
+    remaining,
+    start_deadline,
+    within,
+)
+from app.exceptions import DeadlineExceededError
+
+
+async def test_within_without_deadline_passes_through():
+    async def work():
+        return "done"
+
+    assert await within("storage", work()) == "done"
+    assert remaining() is None
+
+
+async def test_within_cancels_at_deadline():
+    # Arrange
+    deadline = start_deadline(0.05)
+
+    # Act
+    with pytest.raises(DeadlineExceededError) as error:
+        await within("upstream", asyncio.sleep(1))
+
+    # Assert
+    assert error.value.tier == "upstream"
+    assert deadline.exhausted_by == "upstream"
+    assert 0.04 <= deadline.spent["upstream"] < 0.5
+
+
+async def test_within_skips_tier_that_cannot_finish():
+    # Arrange
+    deadline = start_deadline(0.1)
+    await within("storage", asyncio.sleep(0.06))
+    upstream = asyncio.sleep(0)
+
+    # Act
+    with pytest.raises(DeadlineExceededError) as error:
+        await within("upstream", upstream, minimum=0.05)
+
+    # Assert
+    assert error.value.tier == "storage"
+    assert deadline.exhausted_by == "storage"
+    assert "upstream" not in deadline.spent
+    assert current_deadline() is deadline
+
+
+def test_blame_counts_time_outside_tiers():
+    # Arrange
+    deadline = Deadline(10)
+    deadline.expires_at -= 9  # Nine seconds have gone by
+    deadline.spent["storage"] = 1.0
+
+    # Act & Assert
+    assert deadline.blame() == "request"
+    deadline.spent["storage"] = 6.0
+    assert deadline.blame() == "storage"
+
+
+async def test_charge_accumulates():
+    # Arrange
+    deadline = start_deadline(10)
+
+    # Act
+    with charge("admission"):
+        pass
+    with charge("admission"):
+        pass
+
+    # Assert
+    assert list(deadline.spent) == ["admission"]
+    assert deadline.exhaust("admission").tier == "admission"
+    assert deadline.exhaust("upstream").tier == "admission"
@@ -0,0 +1,79 @@
+import json
+import logging
+import queue
+import pytest
+from app.logging_config import JsonFormatter, LogSampler, NonBlockingQueueHandler
+
+
+def _record(msg="Request completed", args=None, **extra):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestJsonFormatter:
+    def test_includes_extra_fields(self):
+        # Act
+        line = JsonFormatter().format(_record(request_id="abc", status=200))
+
+        # Assert
+        entry = json.loads(line)
+        assert entry["message"] == "Request completed"
+        assert entry["level"] == "INFO"
+        assert entry["request_id"] == "abc"
+        assert entry["status"] == 200
+        assert "msg" not in entry
+
+    def test_merges_arguments(self):
+        # Act
+        line = JsonFormatter().format(_record("Weather API error: %s", ("boom",)))
+
+        # Assert
+        assert json.loads(line)["message"] == "Weather API error: boom"
+
+
+class TestNonBlockingQueueHandler:
+    def test_record_is_not_formatted_on_enqueue(self):
+        # Arrange
+        log_queue = queue.Queue()
+        handler = NonBlockingQueueHandler(log_queue)
+        record = _record("Weather API error: %s", ("boom",))
+
+        # Act
+        handler.handle(record)
+
+        # Assert
+        queued = log_queue.get_nowait()
+        assert queued is record
+        assert queued.args == ("boom",)
+
+    def test_drops_when_full(self):
+        # Arrange
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+
+        # Act
+        handler.handle(_record())
+        handler.handle(_record())
+
+        # Assert
+        assert handler.dropped == 1
+
+
+class TestLogSampler:
+    @pytest.mark.parametrize(
+        "sampled,status_code,duration,expected",
+        [
+            (True, 200, 0.01, True),
+            (False, 200, 0.01, False),
+            (False, 500, 0.01, True),
+            (False, 404, 0.01, True),
+            (False, 200, 0.8, True),
+        ],
+    )
+    def test_should_log(self, sampled, status_code, duration, expected):
+        sampler = LogSampler(rate=0.0, slow_threshold=0.5)
+        assert sampler.should_log(sampled, status_code, duration) is expected
+
+    def test_sample_rate_bounds(self):
+        assert LogSampler(rate=1.0).sample() is True
+        assert LogSampler(rate=0.0).sample() is False
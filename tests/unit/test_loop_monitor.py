@@ -0,0 +1,72 @@
+import asyncio
+import time
+from app.loop_monitor import LAG_BUCKETS, LoopLagMonitor
+
+
+def _block_loop(seconds):
+    time.sleep(seconds)
+
+
+def test_record_histogram():
+    # Arrange
+    monitor = LoopLagMonitor()
+
+    # Act
+    monitor.record(0.0005, now=1.0)
+    monitor.record(0.03, now=2.0)
+    monitor.record(5.0, now=3.0)
+
+    # Assert
+    assert monitor.count == 3
+    assert monitor.buckets[0] == 1
+    assert monitor.buckets[LAG_BUCKETS.index(0.05)] == 1
+    assert monitor.buckets[-1] == 1
+    assert monitor.max_lag == 5.0
+    assert monitor.snapshot()["histogram"]["le_50ms"] == 1
+
+
+def test_max_lag_since():
+    # Arrange
+    monitor = LoopLagMonitor()
+    monitor.record(0.5, now=1.0)
+    monitor.record(0.02, now=2.0)
+    monitor.record(0.01, now=3.0)
+
+    # Act & Assert
+    assert monitor.max_lag_since(1.5) == 0.02
+    assert monitor.max_lag_since(0.0) == 0.5
+    assert monitor.max_lag_since(4.0) == 0.0
+
+
+async def test_measures_lag_and_captures_blocking_stack():
+    # Arrange
+    monitor = LoopLagMonitor(interval=0.01, block_threshold=0.05, debug=True)
+    monitor.start()
+    await asyncio.sleep(0.05)
+
+    # Act
+    _block_loop(0.3)
+    await asyncio.sleep(0.05)
+    await monitor.stop()
+
+    # Assert
+    assert monitor.max_lag >= 0.25
+    assert len(monitor.blocked) == 1
+    assert "_block_loop" in "".join(monitor.blocked[0]["stack"])
+    assert monitor.blocked[0]["blocked_ms"] >= 50
+    assert not monitor.running
+
+
+async def test_no_watchdog_without_debug():
+    # Arrange
+    monitor = LoopLagMonitor(interval=0.01, block_threshold=0.05)
+    monitor.start()
+
+    # Act
+    _block_loop(0.1)
+    await asyncio.sleep(0.03)
+    await monitor.stop()
+
+    # Assert
+    assert monitor.count > 0
+    assert list(monitor.blocked) == []
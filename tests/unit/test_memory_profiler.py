@@ -0,0 +1,94 @@
+import sys
+import pytest
+from app.memory_profiler import AllocationTracker, deep_size, structure_sizes
+from app.services.ttl_policy import AdaptiveTTLPolicy
+
+
+@pytest.fixture
+def tracker():
+    tracker = AllocationTracker(max_seconds=60)
+    yield tracker
+    tracker.stop()
+
+
+def test_deep_size_follows_nested_containers():
+    # Arrange
+    nested = {"hourly": [{"temp": float(i), "name": "x" * 100} for i in range(10)]}
+
+    # Act
+    size = deep_size(nested)
+
+    # Assert
+    assert size > sys.getsizeof(nested) + 10 * 100
+
+
+def test_deep_size_follows_app_objects():
+    # Arrange
+    policy = AdaptiveTTLPolicy()
+    empty = deep_size(policy)
+    for i in range(50):
+        policy.observe(f"onecall_{i}_0_standard", {"current": {"temp": 280.0}})
+
+    # Act
+    size = deep_size(policy)
+
+    # Assert
+    assert size > empty + 50 * sys.getsizeof(1.0)
+
+
+def test_deep_size_extrapolates_sampled_containers():
+    # Arrange
+    items = [str(i) * 50 for i in range(1000, 2000)]
+
+    # Act
+    sampled = deep_size(items, sample=10)
+    exact = deep_size(items, sample=1000)
+
+    # Assert
+    assert sampled == pytest.approx(exact, rel=0.05)
+
+
+def test_structure_sizes_count_shared_data_once():
+    # Arrange
+    shared = ["y" * 10000]
+    structures = {"first": ({"a": shared}, 1), "second": ({"b": shared}, 1)}
+
+    # Act
+    first, second = structure_sizes(structures)
+
+    # Assert
+    assert first["bytes"] > 10000
+    assert second["bytes"] < 1000
+    assert first["entries"] == 1
+
+
+def test_allocation_report_shows_growth(tracker):
+    # Arrange
+    tracker.start()
+
+    # Act
+    retained = [bytearray(1024) for _ in range(1000)]
+    report = tracker.report(limit=5)
+
+    # Assert
+    assert tracker.tracing
+    assert report["traced_bytes"] >= 1024 * 1000
+    assert report["growth"][0]["size_diff"] >= 1024 * 1000
+    assert "test_memory_profiler.py" in report["growth"][0]["site"]
+    del retained
+
+
+def test_allocation_report_requires_tracing(tracker):
+    with pytest.raises(RuntimeError):
+        tracker.report()
+
+
+def test_stop_ends_tracing(tracker):
+    # Arrange
+    tracker.start(frames=5)
+
+    # Act
+    tracker.stop()
+
+    # Assert
+    assert not tracker.tracing
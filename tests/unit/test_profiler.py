@@ -0,0 +1,26 @@
+import threading
+import time
+from app.profiler import SamplingProfiler
+
+
+def _busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_profiler_collects_folded_stacks():
+    # Arrange
+    profiler = SamplingProfiler(thread_id=threading.get_ident(), interval=0.001)
+
+    # Act
+    profiler.start()
+    _busy(0.1)
+    profiler.stop()
+
+    # Assert
+    assert profiler.sample_count > 0
+    line = profiler.folded().splitlines()[0]
+    stack, count = line.rsplit(" ", 1)
+    assert int(count) > 0
+    assert "_busy" in stack
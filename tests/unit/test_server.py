@@ -0,0 +1,75 @@
+from unittest.mock import mock_open, patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app import server
+from app.config import settings
+from app.middleware.error_middleware import error_handling_middleware
+from app.middleware.rate_limit_middleware import rate_limit_middleware
+from app.services.rate_limiter import SlidingWindowLimiter
+
+
+def test_available_cpus_honours_cgroup_quota():
+    # Arrange
+    with patch("os.sched_getaffinity", return_value={0, 1, 2, 3}), patch(
+        "builtins.open", mock_open(read_data="150000 100000\n")
+    ):
+        # Act
+        cpus = server.available_cpus()
+
+    # Assert
+    assert cpus == 2
+
+
+def test_available_cpus_without_quota():
+    # Arrange
+    with patch("os.sched_getaffinity", return_value={0, 1, 2}), patch(
+        "builtins.open", mock_open(read_data="max 100000\n")
+    ):
+        # Act
+        cpus = server.available_cpus()
+
+    # Assert
+    assert cpus == 3
+
+
+def test_build_config_falls_back_without_speedups():
+    # Arrange
+    with patch.object(server, "_installed", return_value=False):
+        # Act
+        config = server.build_config(FastAPI())
+
+    # Assert
+    assert config.loop == "asyncio"
+    assert config.http == "h11"
+    assert config.timeout_keep_alive == settings.SERVER_KEEPALIVE
+    assert config.backlog == settings.SERVER_BACKLOG
+    assert config.access_log is False
+    assert config.forwarded_allow_ips == settings.SERVER_FORWARDED_ALLOW_IPS
+
+
+def test_rate_limits_key_forwarded_client_address():
+    # Arrange
+    app = FastAPI()
+    app.middleware("http")(rate_limit_middleware)
+    app.middleware("http")(error_handling_middleware)
+
+    @app.get("/hit")
+    async def hit():
+        return {}
+
+    limiter = SlidingWindowLimiter(default_limit=2)
+    with patch.object(settings, "SERVER_FORWARDED_ALLOW_IPS", "testclient"):
+        config = server.build_config(app)
+    config.load()
+    client = TestClient(config.loaded_app)
+    first = {"X-Forwarded-For": "203.0.113.1"}
+    second = {"X-Forwarded-For": "203.0.113.2"}
+
+    # Act
+    with patch("app.middleware.rate_limit_middleware.rate_limiter", limiter):
+        statuses = [client.get("/hit", headers=first).status_code for _ in range(3)]
+        other = client.get("/hit", headers=second)
+
+    # Assert
+    assert statuses == [200, 200, 429]
+    assert other.status_code == 200
@@ -0,0 +1,37 @@
+import time
+from app.timing import RequestTimer, current_timer, span, start_request_timer
+
+
+def test_span_without_timer_is_noop():
+    with span("cache"):
+        pass
+
+
+def test_span_accumulates(monkeypatch):
+    # Arrange
+    timer = start_request_timer()
+    ticks = iter([1.0, 1.25, 2.0, 2.5])
+    monkeypatch.setattr(time, "perf_counter", lambda: next(ticks))
+
+    # Act
+    with span("storage"):
+        pass
+    with span("storage"):
+        pass
+
+    # Assert
+    assert current_timer() is timer
+    assert timer.spans == {"storage": 0.75}
+
+
+def test_server_timing_header():
+    # Arrange
+    timer = RequestTimer()
+    timer.add("cache", 0.0012)
+    timer.add("upstream", 0.25)
+
+    # Act
+    header = timer.server_timing(0.3)
+
+    # Assert
+    assert header == "cache;dur=1.2, upstream;dur=250.0, total;dur=300.0"